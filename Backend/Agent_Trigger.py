@@ -1,11 +1,47 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, Response, stream_with_context
 from flask_cors import CORS
 import boto3
 import json
 import time
 import botocore
+import logging
+from Backend.utils.encoding import dumps_str, encode_body, loads
+from Backend.config.logger import configure_logging
+from Backend.config.tracing import inject_context, set_attributes, span
+from Backend.metrics.proxy_metrics import instrument, record_cache, record_error, render, stage
+
+configure_logging()
+logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
+instrument(app)
+
+SSE_READ_CHUNK_SIZE = 10
+AGENT_READ_TIMEOUT_SECONDS = 180
+# Leave the agent time to return its timeout answer before the proxy stops reading
+DEADLINE_MARGIN_SECONDS = 10
+
+# boto3 clients are thread-safe and slow to build, so each worker keeps one per service and config
+_clients = {}
+
+def cached_client(service, **config):
+    key = (service, tuple(sorted(config.items())))
+    client = _clients.get(key)
+    record_cache("boto3_client", client is not None)
+    if client is None:
+        client = _clients.setdefault(key, boto3.client(
+            service, region_name='ap-south-1',
+            config=botocore.config.Config(retries={'max_attempts': 0}, **config) if config else None))
+    return client
+
+def respond(data=None, status=200, raw_json=None):
+    """Encode a response for the client's Accept (JSON, or opt-in MessagePack) and Accept-Encoding (br/gzip)"""
+    if status >= 400 and isinstance(data, dict):
+        record_error(request.url_rule.rule, data.get("error", f"http_{status}"))
+    body, headers = encode_body(data, request.headers.get("Accept"), request.headers.get("Accept-Encoding"),
+                                raw_json=raw_json)
+    return Response(body, status=status, headers=headers)
+
 
 def parse_athena_results(result_set):
     headers = [col.get("VarCharValue", "") for col in result_set["Rows"][0]["Data"]]
@@ -38,50 +74,122 @@ CORS(app, resources={r"/*": {"origins": "*"}})
 # --------------------------------------------
 @app.route("/query", methods=["POST"])
 def send_to_bknd():
-    config = botocore.config.Config(
-    read_timeout=180,
-    connect_timeout=10,
-    retries={'max_attempts': 0}
-    )
+    # Deadline for the whole request, stamped at the edge and enforced down to Athena
+    deadline = time.time() + AGENT_READ_TIMEOUT_SECONDS - DEADLINE_MARGIN_SECONDS
 
     payload = request.get_json()
-    print(payload)
+    logger.info("📩 /query payload", extra={"category": "payload", "payload": payload})
     
     # Validate user_id presence
     if not payload.get("user_id"):
-        return jsonify({
+        return respond({
             "error": "missing_actor_id",
             "message": "user_id is required"
-        }), 400
+        }, 400)
     
     # Validate session_id presence
     if not payload.get("session_id"):
-        return jsonify({
+        return respond({
             "error": "missing_session_id",
             "message": "session_id is required"
-        }), 400
+        }, 400)
     
-    client = boto3.client('bedrock-agentcore', region_name='ap-south-1', config=config)
+    client = cached_client('bedrock-agentcore', read_timeout=AGENT_READ_TIMEOUT_SECONDS, connect_timeout=10)
     session_id = payload.get("session_id", "")
+
+    # Clients opt in to streaming with an explicit flag or an SSE Accept header
+    stream = bool(payload.get("stream")) or "text/event-stream" in request.headers.get("Accept", "")
     
-    bknd_payload = json.dumps({
+    bknd_payload = {
         "user_query": payload.get("user_query", ""),
         "user_id": payload.get("user_id", ""),
-        "session_id": session_id
-    })
+        "session_id": session_id,
+        "stream": stream,
+        "deadline": deadline
+    }
+
+    with span("proxy.invoke_agent_runtime", **{"session.id": session_id, "agent.stream": stream}) as current:
+        # Use session_id as runtimeSessionId for proper session isolation
+        # Frontend generates 33-character session IDs to meet AWS Bedrock requirement
+        # The payload carries this span's context so the agent's spans join the same trace
+        with stage("agent_invoke"):
+            response = client.invoke_agent_runtime(
+                agentRuntimeArn='arn:aws:bedrock-agentcore:ap-south-1:628897991744:runtime/Test_Agent-LNZiEg4CnQ',
+                runtimeSessionId=session_id,
+                payload=json.dumps(inject_context(bknd_payload)),
+                qualifier="DEFAULT"
+            )
+        if not stream:
+            with stage("agent_read"):
+                response_body = response['response'].read()
+            set_attributes(current, **{"http.response.body.size": len(response_body)})
+
+    if stream:
+        return Response(
+            stream_with_context(relay_agent_events(response)),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
+    # AgentCore already returns JSON; relay the bytes instead of decoding and re-encoding them
+    logger.info("✅ Agent response: %d bytes", len(response_body))
+    return respond(raw_json=response_body)
+
+
+def relay_agent_events(response):
+    """Pass AgentCore server-sent events through to the client as they arrive"""
+    if "text/event-stream" not in response.get("contentType", ""):
+        # Validation errors come back as a plain JSON body; deliver them as a single final event
+        response_data = loads(response['response'].read())
+        yield f"data: {dumps_str({'event': 'data', 'response': response_data})}\n\n"
+        return
 
-    # Use session_id as runtimeSessionId for proper session isolation
-    # Frontend generates 33-character session IDs to meet AWS Bedrock requirement
-    response = client.invoke_agent_runtime(
-        agentRuntimeArn='arn:aws:bedrock-agentcore:ap-south-1:628897991744:runtime/Test_Agent-LNZiEg4CnQ',
-        runtimeSessionId=session_id,
-        payload=bknd_payload,
-        qualifier="DEFAULT"
-    )
-    response_body = response['response'].read()
-    response_data = json.loads(response_body)
-    print("Agent Response:", response_data)
-    return jsonify(response_data)
+    # Small read size so each event is forwarded without waiting for a full buffer
+    for line in response['response'].iter_lines(chunk_size=SSE_READ_CHUNK_SIZE):
+        if line:
+            yield line.decode("utf-8") + "\n\n"
+
+
+# --------------------------------------------
+#  PAGED FETCH OF DOWNSAMPLED CHART DATA
+# --------------------------------------------
+@app.route("/data", methods=["POST"])
+def fetch_chart_data():
+    """Page through the full data behind a downsampled chart (result_id from the "downsampled" field)"""
+    payload = request.get_json()
+
+    if not payload.get("user_id") or not payload.get("session_id"):
+        return respond({
+            "error": "missing_identifiers",
+            "message": "user_id and session_id are required"
+        }, 400)
+    if not payload.get("result_id"):
+        return respond({
+            "error": "missing_result_id",
+            "message": "result_id is required"
+        }, 400)
+
+    client = cached_client('bedrock-agentcore', read_timeout=30, connect_timeout=10)
+
+    # The result lives with the runtime session that produced it
+    with span("proxy.fetch_data", **{"session.id": payload["session_id"]}), stage("agent_invoke"):
+        response = client.invoke_agent_runtime(
+            agentRuntimeArn='arn:aws:bedrock-agentcore:ap-south-1:628897991744:runtime/Test_Agent-LNZiEg4CnQ',
+            runtimeSessionId=payload["session_id"],
+            payload=json.dumps(inject_context({
+                "action": "fetch_data",
+                "user_id": payload["user_id"],
+                "session_id": payload["session_id"],
+                "result_id": payload["result_id"],
+                "offset": payload.get("offset", 0),
+                "limit": payload.get("limit", 500)
+            })),
+            qualifier="DEFAULT"
+        )
+        response_data = loads(response['response'].read())
+    if response_data.get("error"):
+        return respond(response_data, 404 if response_data["error"] == "result_not_found" else 400)
+    return respond(response_data)
 
 
 # --------------------------------------------
@@ -90,48 +198,50 @@ def send_to_bknd():
 @app.route("/users", methods=["POST"])
 def get_users():
     payload = request.get_json()
-    print(payload)
+    logger.info("📩 /users payload", extra={"category": "payload", "payload": payload})
     user_id = payload.get("user_id", "")
     query = "SELECT CIF_NO,CUSTOMER_NAME,MOBILE_PHONE,EMAIL_ADDRESS FROM dm_customer_master;"
 
     if not query:
-        return jsonify({"error": "Query parameter missing"}), 400
+        return respond({"error": "Query parameter missing"}, 400)
 
-    # Athena connection
-    session = boto3.Session(region_name="ap-south-1")
-    athena = session.client("athena")
+    athena = cached_client("athena")
 
     DATABASE = "sentra_db"
     OUTPUT = "s3://bedrock-agentcore-runtime-628897991744-ap-south-1-3m5mgapsu7/TestQueryOutput/"
 
-    # Start query execution
-    resp = athena.start_query_execution(
-        QueryString=query,
-        QueryExecutionContext={"Database": DATABASE},
-        ResultConfiguration={"OutputLocation": OUTPUT}
-    )
-    exec_id = resp["QueryExecutionId"]
+    with stage("athena_poll"):
+        # Start query execution
+        resp = athena.start_query_execution(
+            QueryString=query,
+            QueryExecutionContext={"Database": DATABASE},
+            ResultConfiguration={"OutputLocation": OUTPUT}
+        )
+        exec_id = resp["QueryExecutionId"]
 
-    # Poll until query finishes
-    while True:
-        status = athena.get_query_execution(QueryExecutionId=exec_id)
-        state = status["QueryExecution"]["Status"]["State"]
+        # Poll until query finishes
+        while True:
+            status = athena.get_query_execution(QueryExecutionId=exec_id)
+            state = status["QueryExecution"]["Status"]["State"]
 
-        if state in ("SUCCEEDED", "FAILED", "CANCELLED"):
-            break
+            if state in ("SUCCEEDED", "FAILED", "CANCELLED"):
+                break
 
-        time.sleep(1)
+            time.sleep(1)
 
     if state != "SUCCEEDED":
-        return jsonify({
+        record_error(request.url_rule.rule, f"athena_{state.lower()}")
+        return respond({
             "status": "error",
             "execution_id": exec_id,
             "state": state
         })
 
     # Fetch results
-    results = athena.get_query_results(QueryExecutionId=exec_id)
-    clean_rows = parse_athena_results(results["ResultSet"])
+    with stage("athena_results"):
+        results = athena.get_query_results(QueryExecutionId=exec_id)
+    with stage("result_parse"):
+        clean_rows = parse_athena_results(results["ResultSet"])
 
     if user_id == 'kamaljeet.singh':
         final_rows = clean_rows
@@ -141,13 +251,22 @@ def get_users():
         final_rows = clean_rows[26:100]
         
 
-    return jsonify({
+    return respond({
         "status": "ok",
         "execution_id": exec_id,
         "rows": final_rows
     })
 
 
+# --------------------------------------------
+#  PROMETHEUS METRICS
+# --------------------------------------------
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    body, content_type, status = render()
+    return Response(body, status=status, content_type=content_type)
+
+
 # --------------------------------------------
 #  RUN
 # --------------------------------------------
@@ -0,0 +1,135 @@
+"""
+Per-Request Budgets
+Caps how many tool calls, model turns, tokens and Athena bytes a single question may use.
+Usage lives in agent state under "usage" so tools can add to it. Once any budget runs out,
+further tool calls are refused and the model is told to answer with what it already has.
+"""
+import os
+import logging
+import threading
+from strands.hooks import (AfterModelCallEvent, BeforeModelCallEvent, BeforeToolCallEvent,
+                           HookProvider, HookRegistry)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LIMITS = {
+    "max_tool_calls": int(os.getenv("MAX_TOOL_CALLS", "8")),
+    "max_model_turns": int(os.getenv("MAX_MODEL_TURNS", "10")),
+    "max_input_tokens": int(os.getenv("MAX_INPUT_TOKENS", "400000")),
+    "max_output_tokens": int(os.getenv("MAX_OUTPUT_TOKENS", "16000")),
+    "max_bytes_scanned": int(os.getenv("MAX_BYTES_SCANNED", str(10 * 1024 ** 3))),
+}
+
+# Which usage counter each limit applies to
+LIMITED_COUNTERS = {
+    "max_tool_calls": "tool_calls",
+    "max_model_turns": "model_turns",
+    "max_input_tokens": "input_tokens",
+    "max_output_tokens": "output_tokens",
+    "max_bytes_scanned": "bytes_scanned",
+}
+
+ANSWER_NOW_MESSAGE = ("Budget exhausted ({reason}). Do not call any more tools; "
+                      "answer now in the required JSON format using the data you already have.")
+OUT_OF_TURNS_MESSAGE = ("I could not finish this analysis within the limits for a single request. "
+                        "Please try a more specific question.")
+
+
+# Supporting queries run in parallel and each adds its scanned bytes
+_usage_lock = threading.Lock()
+
+
+def empty_usage():
+    return {counter: 0 for counter in LIMITED_COUNTERS.values()}
+
+
+def add_usage(agent, **amounts):
+    """Add to the request's usage counters in agent state (no-op without an agent, e.g. direct tool calls)"""
+    if agent is None:
+        return
+    with _usage_lock:
+        usage = agent.state.get("usage") or empty_usage()
+        for counter, amount in amounts.items():
+            usage[counter] = usage.get(counter, 0) + (amount or 0)
+        agent.state.set("usage", usage)
+
+
+class RequestBudget(HookProvider):
+    def __init__(self):
+        self.limits = dict(DEFAULT_LIMITS)
+        self._cancelled_call = False  # the current model call was cancelled by on_before_model_call
+
+    def tighten(self, limits):
+        """Apply per-request overrides; callers may lower a limit but never raise it above the default"""
+        for name, value in (limits or {}).items():
+            if name not in DEFAULT_LIMITS:
+                logger.warning("⚠️ Ignoring unknown budget limit: %s", name)
+                continue
+            try:
+                self.limits[name] = min(DEFAULT_LIMITS[name], int(value))
+            except (TypeError, ValueError):
+                logger.warning("⚠️ Ignoring invalid value for budget limit %s: %r", name, value)
+
+    def start(self, agent, limits=None):
+        """Reset usage at the start of a request, applying that request's limit overrides"""
+        self.limits = dict(DEFAULT_LIMITS)
+        self.tighten(limits)
+        self._cancelled_call = False
+        agent.state.set("usage", empty_usage())
+        # The budget that cut the request short, if any
+        agent.state.set("budget_stop", None)
+
+    def usage(self, agent):
+        return agent.state.get("usage") or empty_usage()
+
+    def exhausted(self, agent):
+        """Return the name of the first budget that has run out, or None"""
+        usage = self.usage(agent)
+        for name, counter in LIMITED_COUNTERS.items():
+            if usage.get(counter, 0) >= self.limits[name]:
+                return name
+        return None
+
+    def report(self, agent):
+        """Usage summary for the response metadata"""
+        return {"usage": self.usage(agent), "limits": dict(self.limits),
+                "budget_exhausted": agent.state.get("budget_stop") or self.exhausted(agent)}
+
+    def on_before_tool_call(self, event: BeforeToolCallEvent):
+        agent = event.agent
+        reason = self.exhausted(agent)
+        # Keep the last model turn free for the answer itself
+        if reason is None and self.usage(agent)["model_turns"] >= self.limits["max_model_turns"] - 1:
+            reason = "max_model_turns"
+        if reason:
+            logger.warning("🛑 Refusing %s call: %s reached", event.tool_use.get("name"), reason)
+            event.cancel_tool = ANSWER_NOW_MESSAGE.format(reason=reason)
+            if not agent.state.get("budget_stop"):
+                agent.state.set("budget_stop", reason)
+            return
+        add_usage(agent, tool_calls=1)
+
+    def on_before_model_call(self, event: BeforeModelCallEvent):
+        if self.usage(event.agent)["model_turns"] >= self.limits["max_model_turns"]:
+            # The model ignored the refusals; stop the loop with a fallback answer
+            logger.warning("🛑 Model turn budget exhausted - ending agent loop")
+            event.cancel = OUT_OF_TURNS_MESSAGE
+            event.agent.state.set("budget_stop", "max_model_turns")
+            self._cancelled_call = True
+
+    def on_after_model_call(self, event: AfterModelCallEvent):
+        if self._cancelled_call:
+            # No model call was made, only the fallback answer
+            self._cancelled_call = False
+            return
+        if event.stop_response is None:
+            return
+        usage = event.stop_response.message.get("metadata", {}).get("usage", {})
+        add_usage(event.agent, model_turns=1,
+                  input_tokens=usage.get("inputTokens", 0),
+                  output_tokens=usage.get("outputTokens", 0))
+
+    def register_hooks(self, registry: HookRegistry):
+        registry.add_callback(BeforeToolCallEvent, self.on_before_tool_call)
+        registry.add_callback(BeforeModelCallEvent, self.on_before_model_call)
+        registry.add_callback(AfterModelCallEvent, self.on_after_model_call)
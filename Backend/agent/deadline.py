@@ -0,0 +1,73 @@
+"""
+Request Deadlines
+The Flask edge stamps each request with an absolute deadline (epoch seconds). It travels in the
+AgentCore payload, is enforced across model calls through the agent's cancel signal, and is read
+from agent state by tools so long-running Athena queries can be stopped.
+"""
+import time
+import logging
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request runs past its deadline"""
+
+
+class Deadline:
+    def __init__(self, expires_at):
+        self.expires_at = float(expires_at)
+
+    @classmethod
+    def after(cls, seconds):
+        return cls(time.time() + seconds)
+
+    @classmethod
+    def from_value(cls, value):
+        """Build a deadline from a payload or agent state value; None or invalid values mean no deadline"""
+        if value in (None, ""):
+            return None
+        try:
+            return cls(value)
+        except (TypeError, ValueError):
+            logger.warning("⚠️ Ignoring invalid deadline value: %r", value)
+            return None
+
+    @classmethod
+    def from_agent(cls, agent):
+        if agent is None:
+            return None
+        return cls.from_value(agent.state.get("deadline"))
+
+    def remaining(self):
+        return max(0.0, self.expires_at - time.time())
+
+    def expired(self):
+        return time.time() >= self.expires_at
+
+
+@contextmanager
+def deadline_signal(deadline):
+    """
+    Yield a threading.Event that is set when the deadline passes, for use as the agent's
+    cancel_signal. Yields None when there is no deadline.
+    """
+    if deadline is None:
+        yield None
+        return
+
+    signal = threading.Event()
+    if deadline.expired():
+        signal.set()
+        yield signal
+        return
+
+    timer = threading.Timer(deadline.remaining(), signal.set)
+    timer.daemon = True
+    timer.start()
+    try:
+        yield signal
+    finally:
+        timer.cancel()
@@ -0,0 +1,132 @@
+"""
+Executor Cache
+Live SQLQueryExecutors per (actor, session), so a follow-up question reuses the session's Agent and its
+conversation instead of building a new one and loading history from memory. An executor is checked out
+for the length of one request, so concurrent requests of a session never share an Agent. Entries are
+evicted when idle, beyond EXECUTOR_CACHE_SESSIONS, or while the process is over EXECUTOR_CACHE_MAX_RSS_MB.
+"""
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from Backend.memory.conversation_context import build_history, turns_from_messages
+from Backend.memory.turn_cache import TURNS_KEPT
+
+logger = logging.getLogger(__name__)
+
+EXECUTOR_CACHE_SESSIONS = int(os.getenv("EXECUTOR_CACHE_SESSIONS", "50"))
+EXECUTOR_CACHE_IDLE_SECONDS = int(os.getenv("EXECUTOR_CACHE_IDLE_SECONDS", "900"))
+# Resident memory above which cached agents are dropped; 0 turns the check off
+EXECUTOR_CACHE_MAX_RSS_MB = int(os.getenv("EXECUTOR_CACHE_MAX_RSS_MB", "1024"))
+
+
+def resident_mb():
+    """This process's resident memory in MB, or None where /proc is not available"""
+    try:
+        with open("/proc/self/statm") as statm:
+            pages = int(statm.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+class ExecutorCache:
+    """
+    checkout() hands the session's executor to one request and checkin() returns it afterwards. An
+    executor whose request failed is discard()ed, since its conversation may end mid tool call; the next
+    request builds a new one, which loads its history from memory as before.
+    """
+
+    def __init__(self, max_sessions=EXECUTOR_CACHE_SESSIONS, idle_seconds=EXECUTOR_CACHE_IDLE_SECONDS,
+                 max_rss_mb=EXECUTOR_CACHE_MAX_RSS_MB, memory_probe=resident_mb):
+        self.max_sessions = max_sessions
+        self.idle_seconds = idle_seconds
+        self.max_rss_mb = max_rss_mb
+        self.memory_probe = memory_probe
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "evicted": 0, "evicted_memory": 0, "checkins": 0,
+                      "discarded": 0}
+        self._executors = OrderedDict()  # (actor_id, session_id) -> (last_used, executor)
+        self._lock = threading.Lock()
+
+    def checkout(self, actor_id, session_id):
+        """The session's cached executor, removed from the cache until checked in, or None on a miss"""
+        key = (actor_id, session_id)
+        with self._lock:
+            entry = self._executors.pop(key, None)
+            if entry is not None and time.time() - entry[0] > self.idle_seconds:
+                self.stats["expired"] += 1
+                entry = None
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            self.stats["hits"] += 1
+        logger.info("♻️ Reusing the agent of session %s", session_id)
+        return entry[1]
+
+    def checkin(self, executor):
+        """Keep an executor after a successful request, its conversation trimmed to the memory history budget"""
+        if self.max_sessions <= 0:
+            return
+        agent = executor.agent
+        # The same budgeted history a new agent would load, so tool results and row data don't pile up
+        agent.messages[:] = build_history(turns_from_messages(agent.messages)[:TURNS_KEPT])
+        key = (executor.actor_id, executor.session_id)
+        with self._lock:
+            self._executors[key] = (time.time(), executor)
+            self._executors.move_to_end(key)
+            self.stats["checkins"] += 1
+            self._evict()
+
+    def discard(self, executor):
+        """Drop an executor whose request failed instead of checking it in"""
+        key = (executor.actor_id, executor.session_id)
+        with self._lock:
+            entry = self._executors.get(key)
+            if entry is not None and entry[1] is executor:
+                del self._executors[key]
+            self.stats["discarded"] += 1
+        logger.info("🗑️ Discarding the agent of session %s after a failed request", executor.session_id)
+
+    def _evict(self):
+        now = time.time()
+        while self._executors:
+            last_used, _ = next(iter(self._executors.values()))
+            if now - last_used <= self.idle_seconds:
+                break
+            self._executors.popitem(last=False)
+            self.stats["expired"] += 1
+        while len(self._executors) > self.max_sessions:
+            self._executors.popitem(last=False)
+            self.stats["evicted"] += 1
+
+        rss = self.memory_probe() if self.max_rss_mb > 0 else None
+        if rss is not None and rss > self.max_rss_mb:
+            # Freed memory shows up in RSS late, so drop the older half now rather than one per check.
+            # The newest entry is the executor being checked in; dropping it would only make its next turn cold
+            dropped = min(len(self._executors) - 1, max(1, len(self._executors) // 2))
+            for _ in range(dropped):
+                self._executors.popitem(last=False)
+            self.stats["evicted_memory"] += dropped
+            logger.warning("⚠️ Resident memory %.0f MB over %d MB; dropped %d cached agents", rss,
+                           self.max_rss_mb, dropped)
+
+    def invalidate(self, actor_id, session_id):
+        with self._lock:
+            self._executors.pop((actor_id, session_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._executors.clear()
+
+    def snapshot(self):
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "sessions": len(self._executors),
+                "hit_ratio": round(self.stats["hits"] / lookups, 4) if lookups else 0.0,
+            }
+
+
+executor_cache = ExecutorCache()
@@ -0,0 +1,170 @@
+"""
+Model Router for SQL Query Executor
+Sends simple single-query questions to a fast model and keeps the standard model for
+multi-step insurance analysis (nudge/CTA), escalating when the fast model's answer fails validation.
+"""
+import os
+import re
+import time
+import logging
+import threading
+from collections import OrderedDict
+
+from Backend.agent.response_parser import extract_response
+from Backend.agent.deadline import DeadlineExceeded
+
+logger = logging.getLogger(__name__)
+
+FAST = "fast"
+STANDARD = "standard"
+
+FAST_MODEL_ID = os.getenv("FAST_MODEL_ID", "apac.anthropic.claude-3-haiku-20240307-v1:0")
+STANDARD_MODEL_ID = os.getenv("STANDARD_MODEL_ID", "apac.anthropic.claude-sonnet-4-20250514-v1:0")
+
+# Insurance answers need nudge/CTA analysis, which the prompt reserves for the standard model
+INSURANCE_PATTERN = re.compile(r"\b(insurance|polic(y|ies)|premiums?|coverage|claims?|gwp|agents?|zones?|regions?|branch(es)?)\b", re.I)
+UNDERPERFORMANCE_PATTERN = re.compile(r"\b(least|worst|bottom|lowest|underperform\w*|minimum|smallest|minimal)\b", re.I)
+MULTI_STEP_PATTERN = re.compile(r"\b(compare|comparison|versus|vs\.?|trend\w*|why|analy[sz]\w*|breakdown|correlat\w*|growth|forecast|insight\w*)\b", re.I)
+MAX_SIMPLE_WORDS = 25
+
+
+def usage_since(usage_before, agent):
+    """Token usage of the agent's calls since usage_before (the agent's totals accumulate across invocations)"""
+    usage_now = agent.event_loop_metrics.accumulated_usage
+    return {key: usage_now.get(key, 0) - usage_before.get(key, 0) for key in ("inputTokens", "outputTokens")}
+
+
+class TierMetrics:
+    """Running latency and token totals for one model tier"""
+
+    def __init__(self):
+        self.calls = 0
+        self.escalations = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.input_tokens = 0
+        self.output_tokens = 0
+
+    def snapshot(self):
+        return {
+            "calls": self.calls,
+            "escalations": self.escalations,
+            "avg_latency_s": round(self.total_latency / self.calls, 3) if self.calls else 0.0,
+            "max_latency_s": round(self.max_latency, 3),
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+        }
+
+
+class ModelRouter:
+    """
+    Picks a model tier per question from keyword heuristics and the session's escalation history.
+    Models are built lazily through model_factory(model_id), so tests can pass stubbed models.
+    """
+
+    def __init__(self, fast_model_id=FAST_MODEL_ID, standard_model_id=STANDARD_MODEL_ID,
+                 region='ap-south-1', model_factory=None, max_sessions=1000):
+        self.model_ids = {FAST: fast_model_id, STANDARD: standard_model_id}
+        self.region = region
+        self.model_factory = model_factory or self._bedrock_model
+        self.max_sessions = max_sessions
+        self.metrics = {FAST: TierMetrics(), STANDARD: TierMetrics()}
+        self._models = {}
+        self._escalated_sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _bedrock_model(self, model_id):
+        from strands.models import BedrockModel
+        return BedrockModel(model_id=model_id, region_name=self.region)
+
+    def get_model(self, tier):
+        with self._lock:
+            if tier not in self._models:
+                logger.info("🔧 Initializing %s model: %s", tier, self.model_ids[tier])
+                self._models[tier] = self.model_factory(self.model_ids[tier])
+            return self._models[tier]
+
+    def classify(self, question, session_id=None):
+        """Return FAST for simple single-query questions, STANDARD otherwise"""
+        question = question or ""
+        with self._lock:
+            if session_id and session_id in self._escalated_sessions:
+                # The fast model already failed in this conversation; don't keep paying for retries
+                self._escalated_sessions.move_to_end(session_id)
+                return STANDARD
+
+        if (INSURANCE_PATTERN.search(question)
+                or UNDERPERFORMANCE_PATTERN.search(question)
+                or MULTI_STEP_PATTERN.search(question)
+                or len(question.split()) > MAX_SIMPLE_WORDS):
+            return STANDARD
+        return FAST
+
+    def record(self, tier, latency, usage=None):
+        usage = usage or {}
+        with self._lock:
+            metrics = self.metrics[tier]
+            metrics.calls += 1
+            metrics.total_latency += latency
+            metrics.max_latency = max(metrics.max_latency, latency)
+            metrics.input_tokens += usage.get("inputTokens", 0)
+            metrics.output_tokens += usage.get("outputTokens", 0)
+        # Per-call detail is in the metrics; the line itself is only worth building when debugging
+        logger.debug("⏱️ %s model call took %.2fs (in=%d, out=%d tokens)", tier, latency,
+                     usage.get("inputTokens", 0), usage.get("outputTokens", 0))
+
+    def record_escalation(self, session_id=None):
+        with self._lock:
+            self.metrics[FAST].escalations += 1
+            if session_id:
+                self._escalated_sessions[session_id] = time.time()
+                self._escalated_sessions.move_to_end(session_id)
+                while len(self._escalated_sessions) > self.max_sessions:
+                    self._escalated_sessions.popitem(last=False)
+
+    def snapshot(self):
+        with self._lock:
+            return {tier: metrics.snapshot() for tier, metrics in self.metrics.items()}
+
+    def invoke(self, agent, prompt, question, session_id=None, tier=None, cancel_signal=None, memory=None):
+        """
+        Run the agent on the routed tier and return (response_dict, tier_used).
+        A fast-tier answer that fails validation is discarded and the question is re-run on the standard tier.
+        memory (a MemoryHookProvider) holds the fast attempt's messages back until its answer is accepted, so
+        a rejected attempt never reaches memory. Raises DeadlineExceeded if cancel_signal fires first.
+        """
+        tier = tier or self.classify(question, session_id)
+        checkpoint = list(agent.messages)
+        if memory is not None and tier == FAST:
+            memory.hold()
+
+        try:
+            sql_dict, problems = self._run(agent, prompt, tier, cancel_signal)
+            if problems and tier == FAST:
+                logger.warning("⚠️ Fast model output failed validation %s - escalating to standard model", problems)
+                self.record_escalation(session_id)
+                if memory is not None:
+                    memory.discard()
+                agent.messages = checkpoint
+                tier = STANDARD
+                sql_dict, problems = self._run(agent, prompt, tier, cancel_signal)
+        finally:
+            if memory is not None:
+                memory.commit()
+
+        if problems:
+            logger.warning("⚠️ Response failed validation: %s", problems)
+        return sql_dict, tier
+
+    def _run(self, agent, prompt, tier, cancel_signal=None):
+        agent.model = self.get_model(tier)
+        usage_before = dict(agent.event_loop_metrics.accumulated_usage)
+        start = time.perf_counter()
+        result = agent(prompt, cancel_signal=cancel_signal)
+        self.record(tier, time.perf_counter() - start, usage_since(usage_before, agent))
+        if result.stop_reason == "cancelled":
+            raise DeadlineExceeded(f"{tier} model call cancelled after {time.perf_counter() - start:.1f}s")
+        return extract_response(str(result))
+
+
+default_router = ModelRouter()
@@ -0,0 +1,38 @@
+"""
+Model Call Tracing
+Hook provider that wraps every model call of the agent loop in a span carrying token usage.
+"""
+from strands.hooks import AfterModelCallEvent, BeforeModelCallEvent, HookProvider, HookRegistry
+
+from Backend.config.tracing import mark_error, set_attributes, start_span
+
+
+class ModelCallTracer(HookProvider):
+    """One span per model call with the tier's model id and the call's token usage"""
+
+    def __init__(self):
+        self._span = None
+
+    def on_before_model_call(self, event: BeforeModelCallEvent):
+        model_id = event.agent.model.get_config().get("model_id")
+        self._span = start_span("model.call", **{"gen_ai.request.model": model_id})
+
+    def on_after_model_call(self, event: AfterModelCallEvent):
+        if self._span is None:
+            return
+        current, self._span = self._span, None
+        if event.exception is not None:
+            current.record_exception(event.exception)
+            mark_error(current, type(event.exception).__name__)
+        elif event.stop_response is not None:
+            usage = event.stop_response.message.get("metadata", {}).get("usage", {})
+            set_attributes(current, **{
+                "gen_ai.response.finish_reason": event.stop_response.stop_reason,
+                "gen_ai.usage.input_tokens": usage.get("inputTokens"),
+                "gen_ai.usage.output_tokens": usage.get("outputTokens"),
+            })
+        current.end()
+
+    def register_hooks(self, registry: HookRegistry):
+        registry.add_callback(BeforeModelCallEvent, self.on_before_model_call)
+        registry.add_callback(AfterModelCallEvent, self.on_after_model_call)
@@ -2,6 +2,7 @@
 Agent Prompts for SQL Query Executor
 This module contains all prompts used by the SQL agent for querying banking and insurance databases.
 """
+from functools import lru_cache
 
 
 # =============================================================================
@@ -66,7 +67,7 @@ User: "get all policies" → athena_query(sql="SELECT * FROM insurance_data", da
 💡 NUDGE RULES (INSURANCE QUERIES ONLY):
 • Include "nudge" field ONLY for insurance_db queries
 • Nudge should identify 1-4 LEAST performing entities (not just one)
-• MUST run additional queries to gather FACTS about underperforming entities
+• The athena_query tool returns precomputed "nudge_facts" for insurance results - build the nudge from them
 • Provide DATA-DRIVEN analysis, not generic suggestions
 • ⚠️ CRITICAL: When user asks about "least", "minimum", "smallest", "lowest", "minimal" or any synonym → ALWAYS include nudge AND CTA
 
@@ -118,12 +119,13 @@ User: "get all policies" → athena_query(sql="SELECT * FROM insurance_data", da
 Example: If query returns 20 agents, nudge should cover the 3 lowest performing agents
 
 🔍 HOW TO CREATE FACT-BASED NUDGE:
-1. Identify the 1-4 lowest performing entities (based on total count)
-2. Run additional queries to gather facts about those entities:
-   - Count of agents/policies/transactions for each entity
-   - Average values compared to other entities
-   - Time-based trends if date fields available
-   - Related metrics (policy types, premium amounts, etc.)
+1. Read "nudge_facts" from the athena_query result: it already lists the lowest performing
+   entities with their gap vs mean/median/top, share of total and month-over-month change
+   ⚠️ DO NOT run extra queries or recompute these numbers yourself
+2. For related metrics (count of agents/policies, policy types, product mix), pass those queries
+   in "supporting_sql" of the SAME athena_query call - they run in parallel and come back in
+   "supporting_results", filtered to the lowest performers
+   - Include a month column in the main query when date fields are available to get month-over-month change
 3. Compare these facts to top performers or averages
 4. Report ONLY what the data shows, avoid speculation
 5. Format as a cohesive paragraph covering all underperforming entities
@@ -186,7 +188,7 @@ RESPONSE FORMAT (STRICTLY FOLLOW)
 • Add "nudge" field for insurance_db queries to highlight underperformance
 • Add "cta" field for insurance_db queries with SPECIFIC ACTIONS
 • Nudge should cover 1-4 LEAST performing entities (based on result count)
-• MUST query database for ACTUAL FACTS about underperforming entities
+• Use the precomputed "nudge_facts" (and "supporting_results") as the ACTUAL FACTS about underperforming entities
 • Report SPECIFIC NUMBERS and CONCRETE DATA POINTS in nudge
 • Nudge = FACTS ONLY (what the data shows)
 • CTA = ACTIONS ONLY (specific steps based on data analysis)
@@ -370,13 +372,16 @@ RESPONSE FORMAT (STRICTLY FOLLOW)
         {"label": "Label1", "value": "25"},
         {"label": "Label2", "value": "30"}
     ],
-    "explanation": "explain the trend in the data",
+    "explanation": "explain the trend in the data (quote trend_facts from the tool result when present)",
     "customer_specific": "False",
     "query_executed": "the sql query executed",
     "nudge": "FACTS ONLY - detailed analysis of underperforming entities (insurance queries only)",
     "cta": "CRISP FORMAT - Action Name, Priority, Target only (insurance queries only, must exist if nudge exists)"
 }
 
+⚠️ Do NOT add trend statistics fields yourself - highest/lowest/average/trend are attached to chart
+responses automatically. Keep the explanation short and use the numbers in "trend_facts".
+
 Chart Type Selection:
 • "bar" → Categorical comparisons (policy types, agents, zones, products)
 • "pie" → Percentage distributions (market share, category breakdown)
@@ -957,3 +962,14 @@ athena_query(sql="SELECT * FROM insurance_data LIMIT 10", database="insurance_db
 # ⚠️⚠️⚠️ CRITICAL: Insurance database exists and has data! ⚠️⚠️⚠️
 # When user asks about insurance, ALWAYS use database="insurance_db"
 # DO NOT say insurance data is unavailable
+
+
+@lru_cache(maxsize=None)
+def system_prompt():
+    """The agent's full system prompt, assembled on first use and shared by every executor"""
+    # Put insurance instructions FIRST so agent sees them immediately
+    return f"""
+                {base_prompt}
+                {insurance_schema_prompt}
+                {customer_schema_prompt}
+            """
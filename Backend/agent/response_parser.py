@@ -0,0 +1,329 @@
+"""
+Response Parser for SQL Query Executor
+Incrementally extracts, repairs and validates the JSON response object produced by the model.
+"""
+import json
+import logging
+
+from Backend.config.tracing import set_attributes, span
+
+logger = logging.getLogger(__name__)
+
+CHART_TYPES = ("bar", "line", "pie", "scatter")
+RESPONSE_TYPES = ("text",) + CHART_TYPES
+
+# Fields every response carries, with the value used when the model leaves one out
+RESPONSE_DEFAULTS = {
+    "type": "text",
+    "data": "",
+    "explanation": "",
+    "customer_specific": "False",
+    "query_executed": "",
+}
+OPTIONAL_FIELDS = ("nudge", "cta")
+
+_CLOSERS = {"{": "}", "[": "]"}
+_UNREADABLE_KEY = object()  # stands in for a key that isn't valid JSON, so its value is skipped too
+
+
+def text_response(explanation):
+    """Wrap plain text (e.g. a clarification question) in the standard response format"""
+    return {
+        "type": "text",
+        "data": "",
+        "explanation": explanation,
+        "customer_specific": "False",
+        "query_executed": ""
+    }
+
+
+def repair_json(content):
+    """
+    Fix the defects the model commonly produces: trailing commas and output cut off
+    mid-object. Truncated values are dropped back to the last complete one and any
+    open strings, arrays and objects are closed.
+    """
+    out = []
+    stack = []          # open brackets, each entry [bracket, expecting_key]
+    in_string = False
+    escape = False
+    string_is_key = False
+    last_safe = None    # (output length, stack snapshot) after the last complete value
+    literal_start = None  # output position of the bare literal being read
+
+    def mark_safe():
+        nonlocal last_safe
+        last_safe = (len(out), [b for b, _ in stack])
+
+    def end_literal():
+        # A literal is only complete once something ends it, and only if it parses: "2." or "fal" don't
+        nonlocal literal_start
+        if literal_start is None:
+            return
+        token = "".join(out[literal_start:])
+        literal_start = None
+        try:
+            json.loads(token)
+        except ValueError:
+            return
+        mark_safe()
+
+    for ch in content:
+        if in_string:
+            out.append(ch)
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+                if not string_is_key:
+                    mark_safe()
+            continue
+
+        if ch.isspace() or ch in '"{}[],:':
+            end_literal()
+        if ch == '"':
+            in_string = True
+            string_is_key = bool(stack) and stack[-1][0] == "{" and stack[-1][1]
+            out.append(ch)
+        elif ch in "{[":
+            stack.append([ch, ch == "{"])
+            out.append(ch)
+            # An empty object or array is the fallback when nothing inside it completes
+            mark_safe()
+        elif ch in "}]":
+            # Drop a trailing comma before the closing bracket
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+            if stack:
+                stack.pop()
+            out.append(ch)
+            mark_safe()
+        elif ch == ",":
+            if stack and stack[-1][0] == "{":
+                stack[-1][1] = True
+            out.append(ch)
+        elif ch == ":":
+            if stack and stack[-1][0] == "{":
+                stack[-1][1] = False
+            out.append(ch)
+        else:
+            # Bare literals: numbers, true, false and null
+            if literal_start is None and not ch.isspace() and stack and not (stack[-1][0] == "{" and stack[-1][1]):
+                literal_start = len(out)
+            out.append(ch)
+    end_literal()
+
+    if not stack and not in_string:
+        return "".join(out)
+
+    if in_string and not string_is_key and len(stack) == 1:
+        # Keep a cut-off top-level string (e.g. a long explanation) rather than losing it
+        out.append('"')
+        open_brackets = [b for b, _ in stack]
+    elif last_safe is not None:
+        del out[last_safe[0]:]
+        open_brackets = last_safe[1]
+    else:
+        return "".join(out)
+
+    repaired = "".join(out).rstrip()
+    while repaired.endswith((",", ":")):
+        repaired = repaired[:-1].rstrip()
+    return repaired + "".join(_CLOSERS[b] for b in reversed(open_brackets))
+
+
+def _loads_with_repair(content):
+    """(value, repaired): repaired is True when content only parsed after repair_json"""
+    try:
+        return json.loads(content), False
+    except json.JSONDecodeError:
+        return json.loads(repair_json(content)), True
+
+
+class StreamingJSONExtractor:
+    """
+    Consumes model output chunk by chunk and finds the top-level response object.
+    Each top-level field is returned from feed() as soon as its value is complete,
+    so callers can forward the explanation before the model finishes writing data.
+    """
+
+    def __init__(self):
+        self.fields = {}
+        self.repaired = False  # set by finish() when the object only parsed after repair
+        self._chunks = []
+        self._length = 0
+        self._pos = 0
+        self._start = -1
+        self._end = -1
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._key_start = -1
+        self._key = None
+        self._value_start = -1
+
+    @property
+    def text(self):
+        """All output fed so far; chunks are joined only when a slice of them is needed"""
+        if len(self._chunks) > 1:
+            self._chunks = ["".join(self._chunks)]
+        return self._chunks[0] if self._chunks else ""
+
+    @property
+    def started(self):
+        return self._start != -1
+
+    @property
+    def complete(self):
+        return self._end != -1
+
+    def feed(self, chunk):
+        """Add a chunk of model output; returns the list of (field, value) pairs completed by it"""
+        # Appending to a list keeps a long stream linear; only the new chunk is scanned
+        offset = self._length
+        self._chunks.append(chunk)
+        self._length += len(chunk)
+        completed = []
+
+        while self._pos < self._length and not self.complete:
+            i = self._pos
+            ch = chunk[i - offset]
+            self._pos += 1
+
+            if not self.started:
+                if ch == "{":
+                    self._start = i
+                    self._depth = 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._key is None and self._key_start != -1:
+                        raw_key = self.text[self._key_start:i + 1]
+                        try:
+                            self._key = json.loads(raw_key)
+                        except json.JSONDecodeError:
+                            logger.warning("⚠️ Skipping unreadable field name %r", raw_key)
+                            self._key = _UNREADABLE_KEY
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                if self._depth == 1 and self._key is None:
+                    self._key_start = i
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._end = i
+                    self._complete_field(self.text[self._value_start:i] if self._value_start != -1 else "", completed)
+            elif self._depth == 1:
+                if ch == ":" and self._key is not None:
+                    self._value_start = i + 1
+                elif ch == ",":
+                    self._complete_field(self.text[self._value_start:i], completed)
+
+        return completed
+
+    def _complete_field(self, raw_value, completed):
+        key = self._key
+        self._key = None
+        self._key_start = -1
+        self._value_start = -1
+        if key is None or key is _UNREADABLE_KEY or not raw_value.strip():
+            return
+        try:
+            value, _ = _loads_with_repair(raw_value.strip())
+        except json.JSONDecodeError:
+            logger.warning("⚠️ Could not parse value of field '%s'", key)
+            return
+        self.fields[key] = value
+        completed.append((key, value))
+
+    def finish(self):
+        """
+        Return the full response object, repairing it if the model output was malformed
+        or cut off. Returns None when the output contains no JSON object at all.
+        """
+        if not self.started:
+            return None
+
+        content = self.text[self._start:self._end + 1] if self.complete else self.text[self._start:]
+        try:
+            response, self.repaired = _loads_with_repair(content)
+            return response
+        except json.JSONDecodeError:
+            logger.warning("⚠️ Full JSON repair failed - using fields extracted while streaming")
+            return dict(self.fields) if self.fields else None
+
+
+def validate_response(response, repaired=False):
+    """
+    Check a parsed response against the response schema and normalize it. repaired says the response
+    was cut off or malformed and only parsed after repair_json.
+    Returns (normalized_response, problems); an empty problems list means the response is valid.
+    """
+    problems = []
+    if not isinstance(response, dict):
+        return text_response(str(response)), ["response is not a JSON object"]
+
+    normalized = dict(response)
+    for field, default in RESPONSE_DEFAULTS.items():
+        if field not in normalized or normalized[field] is None:
+            if field in ("type", "explanation"):
+                problems.append(f"missing field '{field}'")
+            normalized[field] = default
+
+    if normalized["type"] not in RESPONSE_TYPES:
+        problems.append(f"unknown response type '{normalized['type']}'")
+
+    if normalized["type"] in CHART_TYPES:
+        data = normalized["data"]
+        if not isinstance(data, list):
+            problems.append(f"'{normalized['type']}' response needs a list in 'data'")
+        elif not all(isinstance(point, dict) for point in data):
+            problems.append("chart data points must be objects")
+        elif repaired and len(data) > 1 and len(data[-1]) < len(data[0]):
+            # A repaired, cut-off array can end with a partial point; sparse points of complete output are kept
+            normalized["data"] = data[:-1]
+
+    if not isinstance(normalized["explanation"], str):
+        normalized["explanation"] = str(normalized["explanation"])
+
+    # The frontend compares against the strings "True"/"False"
+    if isinstance(normalized["customer_specific"], bool):
+        normalized["customer_specific"] = str(normalized["customer_specific"])
+
+    for field in OPTIONAL_FIELDS:
+        if normalized.get(field) is None:
+            normalized.pop(field, None)
+    if bool(normalized.get("nudge")) != bool(normalized.get("cta")):
+        problems.append("'nudge' and 'cta' must be provided together")
+
+    return normalized, problems
+
+
+def extract_response(result_str):
+    """Parse complete model output in one go; falls back to a text response when no JSON is found"""
+    with span("response.extract", **{"response.chars": len(result_str)}) as current:
+        extractor = StreamingJSONExtractor()
+        extractor.feed(result_str)
+        response = extractor.finish()
+        if response is None:
+            # Plain text (e.g. a clarification question) is a valid answer
+            logger.info("ℹ️ No JSON object in model output - wrapping plain text response")
+            set_attributes(current, **{"response.type": "text", "response.plain_text": True})
+            return text_response(result_str.strip()), []
+        response, problems = validate_response(response, repaired=extractor.repaired)
+        set_attributes(current, **{"response.type": response.get("type"), "response.problems": len(problems)})
+        return response, problems
@@ -0,0 +1,71 @@
+"""
+Result Store
+Keeps the full data of downsampled chart responses so clients can page through it. AgentCore routes
+every request of a runtime session to the same instance, so an in-process store is enough; results are
+scoped to the session that produced them and expire after a TTL or when the store is full.
+"""
+import os
+import time
+import uuid
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+MAX_STORED_RESULTS = int(os.getenv("RESULT_STORE_MAX_RESULTS", "200"))
+RESULT_TTL_SECONDS = int(os.getenv("RESULT_STORE_TTL_SECONDS", "3600"))
+DEFAULT_PAGE_SIZE = 500
+MAX_PAGE_SIZE = 5000
+
+
+class ResultStore:
+    def __init__(self, max_results=MAX_STORED_RESULTS, ttl_seconds=RESULT_TTL_SECONDS):
+        self.max_results = max_results
+        self.ttl_seconds = ttl_seconds
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, session_id, data, result_id=None):
+        """Store a result for the session and return its id (a new one unless result_id is given)"""
+        result_id = result_id or uuid.uuid4().hex
+        with self._lock:
+            self._results[result_id] = (session_id, time.time(), data)
+            self._results.move_to_end(result_id)
+            while len(self._results) > self.max_results:
+                self._results.popitem(last=False)
+        return result_id
+
+    def get(self, session_id, result_id):
+        """The stored data, or None if it is unknown, expired or belongs to another session"""
+        with self._lock:
+            entry = self._results.get(result_id)
+            if entry is None:
+                return None
+            owner, created, data = entry
+            if time.time() - created > self.ttl_seconds:
+                del self._results[result_id]
+                return None
+            if owner != session_id:
+                logger.warning("⚠️ Session %s asked for result %s of another session", session_id, result_id)
+                return None
+            self._results.move_to_end(result_id)
+            return data
+
+    def page(self, session_id, result_id, offset=0, limit=DEFAULT_PAGE_SIZE):
+        """One page of a stored result, or None if the result is not available"""
+        data = self.get(session_id, result_id)
+        if data is None:
+            return None
+        offset = max(0, int(offset or 0))
+        limit = min(MAX_PAGE_SIZE, max(1, int(limit or DEFAULT_PAGE_SIZE)))
+        return {
+            "result_id": result_id,
+            "offset": offset,
+            "limit": limit,
+            "total": len(data),
+            "data": data[offset:offset + limit],
+        }
+
+
+result_store = ResultStore()
@@ -1,46 +1,55 @@
 import re
+import time
 import logging
 from strands import Agent
-from strands.models import BedrockModel
 from Backend.tools.athena_query import athena_query
-from Backend.memory.memory_setup import client, memory_id
+from Backend.memory import memory_setup
 from Backend.memory.memory_hook import MemoryHookProvider
-from Backend.agent.prompt import base_prompt, customer_schema_prompt, insurance_schema_prompt
-import json
+from Backend.agent.prompt import system_prompt
+from Backend.agent.response_parser import StreamingJSONExtractor, extract_response, text_response
+from Backend.agent.deadline import Deadline, DeadlineExceeded, deadline_signal
+from Backend.agent.model_router import FAST, STANDARD, ModelRouter, default_router, usage_since
+from Backend.agent.budget import RequestBudget
+from Backend.agent.model_tracing import ModelCallTracer
+from Backend.agent.result_store import result_store
+from Backend.analytics.trend import attach_trend
+from Backend.analytics.downsample import downsample
 
 logger = logging.getLogger(__name__)
 
+TIMEOUT_MESSAGE = "This request took too long to complete and was stopped. Please try a more specific question."
+
 class SQLQueryExecutor:
-    def __init__(self, actor_id='actor_123', session_id='session_123', region='ap-south-1', model_id='apac.anthropic.claude-sonnet-4-20250514-v1:0'):
+    def __init__(self, actor_id='actor_123', session_id='session_123', region='ap-south-1', router=None):
         logger.info("🚀 Initializing SQLQueryExecutor...")
-        logger.info(f"📍 Region: {region}, Model ID: {model_id}")
+
+        if router is None:
+            router = default_router if region == default_router.region else ModelRouter(region=region)
+        self.router = router
+        self.actor_id = actor_id
+        self.session_id = session_id
+        self.budget = RequestBudget()
+        logger.info("📍 Region: %s, Model IDs: %s", region, self.router.model_ids)
 
         try:
-            self.model = BedrockModel(
-                model_id=model_id,
-                region_name=region
-            )
+            # The agent starts on the standard model; each request switches to its routed tier
+            self.model = self.router.get_model(STANDARD)
             logger.info("✅ BedrockModel initialized successfully.")
         except Exception as e:
             logger.error("❌ Failed to initialize BedrockModel.", exc_info=True)
             raise e
 
         try:
-            logger.info(f"🔑 Creating agent with actor_id={actor_id} and session_id={session_id}")
-            # Put insurance instructions FIRST so agent sees them immediately
-            system_prompt = f"""
-                {base_prompt}
-                {insurance_schema_prompt}
-                {customer_schema_prompt}
-            """
+            logger.info("🔑 Creating agent with actor_id=%s and session_id=%s", actor_id, session_id)
             agent_state = {"actor_id": actor_id, "session_id": session_id}
-            logger.info(f"🔑 Agent state: {agent_state}")
+            self.memory = MemoryHookProvider(memory_setup.get_backend(), memory_setup.get_memory_id())
             self.agent = Agent(
                 model=self.model,
-                system_prompt=system_prompt,
+                system_prompt=system_prompt(),
                 tools=[athena_query],
-                hooks=[MemoryHookProvider(client, memory_id)],
-                state=agent_state
+                hooks=[self.memory, self.budget, ModelCallTracer()],
+                state=agent_state,
+                callback_handler=None
             )
             logger.info("✅ Agent created successfully with memory hooks and state.")
         except Exception as e:
@@ -49,77 +58,143 @@ class SQLQueryExecutor:
 
 
 
-    def execute_sql(self, user_query, user_id):
-        logger.info(f"📝 User Query: {user_query}")
+    def execute_sql(self, user_query, user_id, deadline=None, budget_limits=None):
+        logger.info("📝 User Query", extra={"category": "query", "user_query": user_query})
         
         user_prompt = f"User Request: {user_query}, user_id: {user_id}"
+        deadline = self._set_deadline(deadline)
+        self.budget.start(self.agent, budget_limits)
+        self.memory.result_id = None
 
         try:
             logger.info("🔹 Invoking agent with prompt...")
-            result = self.agent(user_prompt)
-            logger.info(f"LLM RESULT : {result}")
-            logger.info("✅ Agent invocation successful.")
+            with deadline_signal(deadline) as cancel_signal:
+                sql_dict, tier = self.router.invoke(self.agent, user_prompt, user_query, self.session_id,
+                                                    cancel_signal=cancel_signal, memory=self.memory)
+            logger.info("✅ Agent invocation successful (%s model).", tier)
+        except DeadlineExceeded as e:
+            logger.warning("⏰ Request deadline exceeded: %s", e)
+            return self._with_metadata(text_response(TIMEOUT_MESSAGE), None)
         except Exception as e:
             logger.error("❌ Agent invocation failed!", exc_info=True)
             raise e
 
-        logger.info("🔹 Extracting JSON from response...")
-        result_str = str(result).strip()
-        logger.info(f"Raw result length: {len(result_str)}")
-        logger.info(f"Raw result (first 300 chars): {result_str[:300]}")
-        
-        # Find the first { and last } to extract JSON
-        # This handles cases where there's text before or after the JSON
-        first_brace = result_str.find('{')
-        last_brace = result_str.rfind('}')
-        
-        # If no JSON found, agent returned plain text (e.g., asking for clarification)
-        # Wrap it in proper JSON format
-        if first_brace == -1 or last_brace == -1 or last_brace <= first_brace:
-            logger.warning("⚠️ No JSON braces found in result - agent returned plain text")
-            logger.info(f"Plain text response: {result_str}")
-            
-            # Wrap plain text in proper JSON format
-            sql_dict = {
-                "type": "text",
-                "data": "",
-                "explanation": result_str,
-                "customer_specific": "False",
-                "query_executed": ""
-            }
-            logger.info("✅ Wrapped plain text response in JSON format")
-            logger.info(f"📊 Final SQL Dictionary: {sql_dict}")
-            return sql_dict
-        
-        # Extract JSON content between braces
-        content = result_str[first_brace:last_brace + 1]
-        logger.info(f"Extracted JSON length: {len(content)}")
-        logger.info(f"Extracted JSON (first 200 chars): {content[:200]}")
-        logger.info("✅ JSON extraction successful.")
+        return self._finalize(sql_dict, tier)
+
+    def _finalize(self, sql_dict, tier):
+        """Attach the trend (computed on the full data), downsample large charts and add metadata"""
+        sql_dict = attach_trend(sql_dict)
+        data = sql_dict.get("data")
+        points, method = downsample(sql_dict.get("type"), data)
+        if method:
+            # Keep the full series so the client can page through it, under the id of the answer's memory
+            # record so fetch_data can still rehydrate it once the store has dropped it
+            result_id = result_store.put(self.session_id, data, result_id=self.memory.result_id)
+            sql_dict["data"] = points
+            sql_dict["downsampled"] = {"method": method, "original_points": len(data),
+                                       "returned_points": len(points), "result_id": result_id}
+            logger.info("📉 Downsampled %s data from %d to %d points (%s)", sql_dict["type"], len(data), len(points), method)
+        return self._with_metadata(sql_dict, tier)
+
+    def _with_metadata(self, sql_dict, tier):
+        """Attach the model tier and the request's actual budget usage to the response"""
+        sql_dict["metadata"] = {"model_tier": tier, **self.budget.report(self.agent)}
+        logger.info("📈 Request usage", extra={"usage": dict(sql_dict["metadata"]["usage"])})
+        return sql_dict
 
+    def _set_deadline(self, deadline):
+        """Store the request deadline in agent state so tools can stop work when it passes"""
+        deadline = deadline if isinstance(deadline, Deadline) or deadline is None else Deadline.from_value(deadline)
+        self.agent.state.set("deadline", deadline.expires_at if deadline else None)
+        if deadline:
+            logger.info("⏰ Request deadline in %.1fs", deadline.remaining())
+        return deadline
+
+    async def stream_sql(self, user_query, user_id, deadline=None, budget_limits=None):
+        """Stream progress events, then the explanation, then the full response payload"""
+        logger.info("📝 User Query (streaming)", extra={"category": "query", "user_query": user_query})
+
+        user_prompt = f"User Request: {user_query}, user_id: {user_id}"
+
+        yield {"event": "progress", "stage": "started"}
+
+        deadline = self._set_deadline(deadline)
+        self.budget.start(self.agent, budget_limits)
+        self.memory.result_id = None
+        tier = self.router.classify(user_query, self.session_id)
+        checkpoint = list(self.agent.messages)
+        if tier == FAST:
+            # Kept out of memory until the answer passes validation (see ModelRouter.invoke)
+            self.memory.hold()
         try:
-            logger.info("🔹 Parsing extracted JSON...")
-            logger.info(f"Content to parse: {repr(content[:500])}")
-            sql_dict = json.loads(content)
-            logger.info("✅ JSON parsed successfully.")
-            logger.info(f"📊 Final SQL Dictionary: {sql_dict}")
-            return sql_dict
-        except json.JSONDecodeError as e:
-            logger.error("❌ JSON parsing failed!", exc_info=True)
-            logger.error(f"Content that failed: {content}")
-            logger.error(f"Content length: {len(content)}")
-            
-            # Fallback: wrap the content in proper JSON format
-            logger.warning("⚠️ Falling back to wrapping content as plain text")
-            sql_dict = {
-                "type": "text",
-                "data": "",
-                "explanation": result_str,
-                "customer_specific": "False",
-                "query_executed": ""
-            }
-            logger.info(f"📊 Fallback SQL Dictionary: {sql_dict}")
-            return sql_dict
+            while True:
+                logger.info("🔹 Streaming agent response (%s model)...", tier)
+                self.agent.model = self.router.get_model(tier)
+                usage_before = dict(self.agent.event_loop_metrics.accumulated_usage)
+                start = time.perf_counter()
+                result = None
+                explanation_sent = False
+                with deadline_signal(deadline) as cancel_signal:
+                    async for event in self._stream_agent(user_prompt, cancel_signal):
+                        if "result" in event:
+                            result = event["result"]
+                            continue
+                        if event["event"] == "explanation":
+                            explanation_sent = True
+                        yield event
+                self.router.record(tier, time.perf_counter() - start, usage_since(usage_before, self.agent))
+                if result.stop_reason == "cancelled":
+                    logger.warning("⏰ Request deadline exceeded while streaming")
+                    yield {"event": "data", "response": self._with_metadata(text_response(TIMEOUT_MESSAGE), tier)}
+                    return
+
+                sql_dict, problems = extract_response(str(result))
+                if problems and tier == FAST:
+                    logger.warning("⚠️ Fast model output failed validation %s - escalating to standard model", problems)
+                    self.router.record_escalation(self.session_id)
+                    self.memory.discard()
+                    self.agent.messages = checkpoint
+                    tier = STANDARD
+                    # Tells the client to discard fields streamed by the failed attempt
+                    yield {"event": "progress", "stage": "escalated"}
+                    continue
+                if problems:
+                    logger.warning("⚠️ Response failed validation: %s", problems)
+                break
+            logger.info("✅ Agent streaming completed.")
         except Exception as e:
-            logger.error("❌ Unexpected error while parsing JSON.", exc_info=True)
+            logger.error("❌ Agent streaming failed!", exc_info=True)
             raise e
+        finally:
+            self.memory.commit()
+
+        if not explanation_sent:
+            yield {"event": "explanation", "text": sql_dict.get("explanation", "")}
+        yield {"event": "data", "response": self._finalize(sql_dict, tier)}
+
+    async def _stream_agent(self, user_prompt, cancel_signal=None):
+        """Translate agent stream events into progress and completed-field events"""
+        current_tool_id = None
+        generating = False
+        extractor = StreamingJSONExtractor()
+        async for event in self.agent.stream_async(user_prompt, cancel_signal=cancel_signal):
+            if "result" in event:
+                yield {"result": event["result"]}
+            elif "current_tool_use" in event:
+                # Tool input arrives in deltas; announce each tool call once
+                tool_use = event["current_tool_use"]
+                if tool_use.get("toolUseId") != current_tool_id:
+                    current_tool_id = tool_use.get("toolUseId")
+                    generating = False
+                    # Text before a tool call is not the final answer
+                    extractor = StreamingJSONExtractor()
+                    yield {"event": "progress", "stage": "tool_call", "tool": tool_use.get("name")}
+            elif "data" in event:
+                if not generating:
+                    generating = True
+                    yield {"event": "progress", "stage": "generating"}
+                for field, value in extractor.feed(event["data"]):
+                    if field == "explanation":
+                        yield {"event": "explanation", "text": value}
+                    elif field != "data":
+                        yield {"event": "field", "name": field, "value": value}
@@ -0,0 +1,112 @@
+"""
+Warm-up
+Builds everything the first request would otherwise pay for: the strands/boto3 import graph, the system
+prompt, both Bedrock models, the Athena and memory clients and the query history store. WARM_UP_QUERIES
+optionally names questions to run once per process so Bedrock, Athena and memory connections are open.
+"""
+import os
+import json
+import time
+import uuid
+import logging
+import threading
+from Backend.memory import memory_setup
+from Backend.metrics.query_history import query_history
+
+logger = logging.getLogger(__name__)
+
+# JSON list of questions, e.g. '["How many customers do we have?"]'
+WARM_UP_QUERIES_ENV = "WARM_UP_QUERIES"
+# Hot queries are saved to memory like any request, under an actor of their own
+WARM_UP_ACTOR = "warm_up"
+
+_hot_queries_started = False
+_hot_queries_lock = threading.Lock()
+
+
+def warm_up(queries=None):
+    """Initialize the request path; returns {step: milliseconds}. Hot queries run at most once per process."""
+    timings = {}
+
+    def timed(name, fn, *args):
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            timings[name] = round((time.perf_counter() - start) * 1000, 1)
+
+    started = time.perf_counter()
+    # The memory lookup waits on AWS while the imports below use the CPU
+    lookup = memory_setup.resolve_in_background()
+    sql_agent = timed("imports", _import_request_path)
+    timed("system_prompt", sql_agent.system_prompt)
+    timed("models", _build_models, sql_agent.default_router)
+    timed("athena_client", _connect_athena)
+    timed("query_history", query_history.top, "count", 1)
+    lookup.join()
+    timed("memory", _connect_memory)
+
+    queries = _configured_queries() if queries is None else queries
+    if queries and _claim_hot_queries():
+        timed("hot_queries", _run_hot_queries, sql_agent, queries)
+
+    timings["total"] = round((time.perf_counter() - started) * 1000, 1)
+    logger.info("🔥 Warm-up finished in %.0f ms", timings["total"], extra={"category": "warm_up", "timings": timings})
+    return timings
+
+
+def _configured_queries():
+    # Read here rather than at import, so a bad value costs the hot queries and not the whole process
+    value = os.getenv(WARM_UP_QUERIES_ENV, "[]")
+    try:
+        queries = json.loads(value)
+    except ValueError:
+        queries = None
+    if not isinstance(queries, list) or not all(isinstance(question, str) for question in queries):
+        logger.warning("⚠️ Ignoring %s, which is not a JSON list of questions: %r", WARM_UP_QUERIES_ENV, value)
+        return []
+    return queries
+
+
+def _import_request_path():
+    from Backend.agent import sql_agent  # strands, boto3, numpy and the tools
+    return sql_agent
+
+
+def _build_models(router):
+    from Backend.agent.model_router import FAST, STANDARD
+    for tier in (FAST, STANDARD):
+        router.get_model(tier)
+
+
+def _connect_athena():
+    from Backend.tools.athena_query import get_athena_client
+    client = get_athena_client()
+    try:
+        # Any cheap call opens the TLS connection the first query would otherwise wait on
+        client.get_work_group(WorkGroup="primary")
+    except Exception as e:
+        logger.warning("⚠️ Athena warm-up call failed: %s", e)
+
+
+def _connect_memory():
+    # Raises if the memory resource can't be resolved; the first request would fail the same way
+    memory_setup.get_memory_id()
+    memory_setup.get_backend()
+
+
+def _claim_hot_queries():
+    global _hot_queries_started
+    with _hot_queries_lock:
+        claimed, _hot_queries_started = not _hot_queries_started, True
+    return claimed
+
+
+def _run_hot_queries(sql_agent, queries):
+    session_id = f"warm-up-{uuid.uuid4().hex}"
+    executor = sql_agent.SQLQueryExecutor(actor_id=WARM_UP_ACTOR, session_id=session_id)
+    for question in queries:
+        try:
+            executor.execute_sql(question, WARM_UP_ACTOR)
+        except Exception:
+            logger.warning("⚠️ Hot query failed: %s", question, exc_info=True)
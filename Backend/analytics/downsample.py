@@ -0,0 +1,122 @@
+"""
+Chart Downsampling
+Caps the points sent per chart while keeping its visual shape: Largest-Triangle-Three-Buckets for
+line series, binning for scatter plots, and top-N plus "Other" for pie and bar charts. The full
+series is kept in the result store so clients can page through it.
+"""
+import os
+import logging
+import numpy as np
+
+from Backend.analytics.nudge_engine import to_numeric
+
+logger = logging.getLogger(__name__)
+
+MAX_POINTS = {
+    "line": int(os.getenv("MAX_LINE_POINTS", "500")),
+    "scatter": int(os.getenv("MAX_SCATTER_POINTS", "500")),
+    "bar": int(os.getenv("MAX_BAR_POINTS", "30")),
+    "pie": int(os.getenv("MAX_PIE_SLICES", "10")),
+}
+OTHER_LABEL = "Other"
+
+
+def _fmt(value):
+    """Chart values travel as strings; keep integers free of a trailing .0"""
+    value = float(value)
+    return str(int(value)) if value.is_integer() else f"{value:.4f}".rstrip("0").rstrip(".")
+
+
+def lttb_indices(values, threshold):
+    """
+    Indices of the points Largest-Triangle-Three-Buckets keeps from an evenly spaced series.
+    The first and last points are always kept; each bucket in between keeps the point forming the
+    largest triangle with the previously kept point and the average of the next bucket.
+    """
+    count = len(values)
+    if threshold >= count or threshold < 3:
+        return np.arange(count)
+
+    x = np.arange(count, dtype=np.float64)
+    y = np.asarray(values, dtype=np.float64)
+    # The points between the first and the last are split into threshold - 2 buckets
+    every = (count - 2) / (threshold - 2)
+    kept = np.empty(threshold, dtype=int)
+    kept[0], kept[-1] = 0, count - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = int(bucket * every) + 1, int((bucket + 1) * every) + 1
+        next_end = min(int((bucket + 2) * every) + 1, count)
+        avg_x, avg_y = x[end:next_end].mean(), y[end:next_end].mean()
+        # Twice the triangle area for every candidate in the bucket at once
+        areas = np.abs((x[previous] - avg_x) * (y[start:end] - y[previous])
+                       - (x[previous] - x[start:end]) * (avg_y - y[previous]))
+        previous = start + int(np.argmax(areas))
+        kept[bucket + 1] = previous
+    return kept
+
+
+def downsample_line(data, max_points):
+    values = np.nan_to_num(to_numeric([point.get("value") for point in data]))
+    return [data[i] for i in lttb_indices(values, max_points)], "lttb"
+
+
+def downsample_scatter(data, max_points):
+    """Average the points falling in each of max_points equal-width bins along the x axis"""
+    y = to_numeric([point.get("value") for point in data])
+    x = to_numeric([point.get("label") for point in data])
+    numeric_x = not np.isnan(x).any()
+    if not numeric_x:
+        # Categorical x: bin by position instead
+        x = np.arange(len(data), dtype=np.float64)
+    keep = ~np.isnan(y)
+    if not keep.any():
+        return data[:max_points], "truncated"
+    x, y = x[keep], y[keep]
+    labels = np.array([str(point.get("label", "")) for point in data], dtype=object)[keep]
+
+    edges = np.linspace(x.min(), x.max(), max_points + 1)
+    bins = np.clip(np.searchsorted(edges, x, side="right") - 1, 0, max_points - 1)
+    counts = np.bincount(bins, minlength=max_points)
+    sum_x = np.bincount(bins, weights=x, minlength=max_points)
+    sum_y = np.bincount(bins, weights=y, minlength=max_points)
+
+    # First label of each bin stands for the whole bin when x is categorical
+    filled, first_in_bin = np.unique(bins, return_index=True)
+    sampled = []
+    for index, first in zip(filled, first_in_bin):
+        label = _fmt(sum_x[index] / counts[index]) if numeric_x else labels[first]
+        sampled.append({"label": label, "value": _fmt(sum_y[index] / counts[index]), "count": int(counts[index])})
+    return sampled, "binned_mean"
+
+
+def downsample_categories(data, max_points):
+    """Keep the max_points - 1 largest categories in their original order and fold the rest into "Other" """
+    values = np.nan_to_num(to_numeric([point.get("value") for point in data]))
+    order = np.argsort(-values, kind="stable")
+    top = np.sort(order[:max_points - 1])
+    rest = order[max_points - 1:]
+    sampled = [data[i] for i in top]
+    sampled.append({"label": f"{OTHER_LABEL} ({len(rest)})", "value": _fmt(values[rest].sum())})
+    return sampled, "top_n_other"
+
+
+DOWNSAMPLERS = {
+    "line": downsample_line,
+    "scatter": downsample_scatter,
+    "bar": downsample_categories,
+    "pie": downsample_categories,
+}
+
+
+def downsample(chart_type, data, max_points=None):
+    """
+    Return (points, method) for a chart's data, or (data, None) when it is already small enough.
+    """
+    max_points = max_points or MAX_POINTS.get(chart_type)
+    if chart_type not in DOWNSAMPLERS or not isinstance(data, list) or not max_points or len(data) <= max_points:
+        return data, None
+    points = [point for point in data if isinstance(point, dict)]
+    if len(points) <= max_points:
+        return data, None
+    return DOWNSAMPLERS[chart_type](points, max_points)
@@ -0,0 +1,224 @@
+"""
+Nudge Engine
+Computes the facts behind insurance nudges (lowest performers, gaps to mean and median,
+share of total, month-over-month change) from a typed query result, so the model only
+has to phrase the nudge and CTA instead of running extra queries and doing the math itself.
+"""
+import re
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+NUMERIC_TYPES = ("tinyint", "smallint", "integer", "int", "bigint", "double", "float", "real", "decimal")
+TIME_TYPES = ("date", "timestamp")
+TIME_COLUMN_PATTERN = re.compile(r"(month|date|period|year|quarter|week|day|time)", re.I)
+MEASURE_COLUMN_PATTERN = re.compile(r"(gwp|premium|amount|sum|total|sales|revenue|count|value|policies)", re.I)
+PERIOD_VALUE_PATTERN = re.compile(r"^\d{4}(-\d{1,2}(-\d{1,2})?)?")
+
+
+def bottom_k_size(entity_count):
+    """Number of underperformers to cover, per the nudge rules in the prompt"""
+    if entity_count <= 5:
+        return 1
+    if entity_count <= 15:
+        return 2
+    if entity_count <= 30:
+        return 3
+    return 4
+
+
+def to_numeric(values):
+    """Vector of floats from Athena string values; blanks and non-numbers become NaN"""
+    array = np.array([v if v not in (None, "") else "nan" for v in values], dtype=object)
+    try:
+        return array.astype(np.float64)
+    except ValueError:
+        out = np.full(len(array), np.nan)
+        for i, value in enumerate(array):
+            try:
+                out[i] = float(value)
+            except (TypeError, ValueError):
+                pass
+        return out
+
+
+def typed_columns(rows, column_types=None):
+    """
+    Split a result into numeric columns (float arrays) and dimension columns (string arrays).
+    Athena column types are used when available; otherwise a column is numeric if all its values parse.
+    """
+    if not rows:
+        return {}, {}
+    column_types = column_types or {}
+    numeric, dimensions = {}, {}
+    for column in rows[0].keys():
+        values = [row.get(column) for row in rows]
+        column_type = (column_types.get(column) or "").lower()
+        if column_type.startswith(NUMERIC_TYPES):
+            numeric[column] = to_numeric(values)
+            continue
+        if not column_type:
+            parsed = to_numeric(values)
+            present = np.array([v not in (None, "") for v in values])
+            if present.any() and not np.isnan(parsed[present]).any():
+                numeric[column] = parsed
+                continue
+        dimensions[column] = np.array(["" if v is None else str(v) for v in values], dtype=object)
+    return numeric, dimensions
+
+
+def pick_measure(numeric):
+    for column in reversed(list(numeric)):
+        if MEASURE_COLUMN_PATTERN.search(column):
+            return column
+    return list(numeric)[-1]
+
+
+def _pick_time_column(dimensions, column_types):
+    for column, values in dimensions.items():
+        column_type = (column_types.get(column) or "").lower()
+        if column_type.startswith(TIME_TYPES) or TIME_COLUMN_PATTERN.search(column):
+            if all(PERIOD_VALUE_PATTERN.match(v) or not v for v in values[:20]):
+                return column
+    return None
+
+
+def period_key(label):
+    """
+    Chronological sort key of a period label: (year, month, day, rest), so 2024-9 sorts before 2024-10
+    and equals 2024-09. Labels that aren't periods sort first.
+    """
+    match = PERIOD_VALUE_PATTERN.match(label)
+    if not match:
+        return (-1, 0, 0, label)
+    parts = [int(part) for part in match.group(0).split("-")] + [0, 0]
+    return (parts[0], parts[1], parts[2], label[match.end():])
+
+
+def _pct(part, whole):
+    return float(part / whole * 100) if whole else None
+
+
+def compute_nudge_facts(rows, column_types=None):
+    """
+    Compute nudge facts from a grouped result. Returns None when the result has no
+    entity/measure shape (e.g. a single aggregate value or raw records without numbers).
+    """
+    column_types = column_types or {}
+    numeric, dimensions = typed_columns(rows, column_types)
+    if not numeric or len(rows) < 2:
+        return None
+
+    measure = pick_measure(numeric)
+    values = numeric[measure]
+    time_column = _pick_time_column(dimensions, column_types)
+    entity_columns = [c for c in dimensions if c != time_column]
+
+    if entity_columns:
+        entity_column = entity_columns[0]
+        labels = dimensions[entity_column]
+    elif time_column:
+        # A plain time series: the periods are the entities
+        entity_column, labels, time_column = time_column, dimensions[time_column], None
+    else:
+        return None
+
+    # Rows without a value say nothing about performance
+    present = ~np.isnan(values)
+    values, labels = values[present], labels[present]
+    if time_column:
+        period_labels = dimensions[time_column][present]
+
+    # Aggregate per entity (rows may be split by period)
+    entities, inverse = np.unique(labels, return_inverse=True)
+    totals = np.bincount(inverse, weights=values, minlength=len(entities))
+    if len(entities) < 2:
+        return None
+
+    grand_total = totals.sum()
+    mean = totals.mean()
+    median = float(np.median(totals))
+    k = bottom_k_size(len(entities))
+    order = np.argsort(totals, kind="stable")
+    bottom, top = order[:k], order[-1]
+
+    mom = None
+    if time_column:
+        keys = [period_key(label) for label in period_labels]
+        periods = sorted(set(keys))
+        position = {key: i for i, key in enumerate(periods)}
+        period_index = np.array([position[key] for key in keys], dtype=np.intp)
+        # Shown as the model will recognize them: the first label seen for each period
+        period_names = {}
+        for key, label in zip(keys, period_labels):
+            period_names.setdefault(key, str(label))
+        if len(periods) >= 2:
+            # Entity x period matrix of the measure, then change over the last two periods
+            matrix = np.zeros((len(entities), len(periods)))
+            np.add.at(matrix, (inverse, period_index), values)
+            previous, latest = matrix[:, -2], matrix[:, -1]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                mom = np.where(previous != 0, (latest - previous) / previous * 100, np.nan)
+            mom_periods = (period_names[periods[-2]], period_names[periods[-1]])
+
+    facts = {
+        "entity_column": entity_column,
+        "measure": measure,
+        "entity_count": int(len(entities)),
+        "total": float(grand_total),
+        "mean": float(mean),
+        "median": median,
+        "top": {"entity": str(entities[top]), "value": float(totals[top])},
+        "bottom": [],
+    }
+    if mom is not None:
+        facts["mom_periods"] = mom_periods
+    for rank, index in enumerate(bottom, start=1):
+        entry = {
+            "rank": rank,
+            "entity": str(entities[index]),
+            "value": float(totals[index]),
+            "gap_vs_mean_pct": _pct(totals[index] - mean, mean),
+            "gap_vs_median_pct": _pct(totals[index] - median, median),
+            "gap_vs_top_pct": _pct(totals[index] - totals[top], totals[top]),
+            "share_of_total_pct": _pct(totals[index], grand_total),
+        }
+        if mom is not None and not np.isnan(mom[index]):
+            entry["mom_change_pct"] = float(mom[index])
+        facts["bottom"].append(entry)
+    return facts
+
+
+def _fmt(value):
+    return f"{value:,.2f}".rstrip("0").rstrip(".")
+
+
+def _fmt_pct(value):
+    return "n/a" if value is None else f"{value:+.1f}%"
+
+
+def format_facts(facts):
+    """Render facts as the compact block handed to the model"""
+    lines = [
+        f"NUDGE FACTS for {facts['measure']} by {facts['entity_column']} "
+        f"(precomputed - use these numbers, do not re-query or recompute):",
+        f"Entities: {facts['entity_count']} | Total: {_fmt(facts['total'])} | Mean: {_fmt(facts['mean'])} | "
+        f"Median: {_fmt(facts['median'])} | Top: {facts['top']['entity']} ({_fmt(facts['top']['value'])})",
+        f"Lowest {len(facts['bottom'])}:",
+    ]
+    for entry in facts["bottom"]:
+        line = (f"{entry['rank']}. {entry['entity']}: {_fmt(entry['value'])} "
+                f"({_fmt_pct(entry['gap_vs_mean_pct'])} vs mean, {_fmt_pct(entry['gap_vs_median_pct'])} vs median, "
+                f"{_fmt_pct(entry['gap_vs_top_pct'])} vs top, {entry['share_of_total_pct'] or 0:.1f}% of total")
+        if "mom_change_pct" in entry:
+            line += f", {_fmt_pct(entry['mom_change_pct'])} {facts['mom_periods'][0]}→{facts['mom_periods'][1]}"
+        lines.append(line + ")")
+    return "\n".join(lines)
+
+
+def rows_for_entities(rows, entities, limit=50):
+    """Rows of a supporting result that mention any of the given entities (all rows if none match)"""
+    wanted = set(entities)
+    matching = [row for row in rows if wanted.intersection(str(v) for v in row.values())]
+    return (matching or rows)[:limit]
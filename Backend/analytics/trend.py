@@ -0,0 +1,142 @@
+"""
+Trend Analysis
+Computes the trend summary for chart responses (highest, lowest, average, first-half vs
+second-half change, slope, growth rate, volatility and outliers) on typed values, so clients
+render it instead of recomputing it from strings and the model can quote it instead of doing the math.
+"""
+import logging
+import numpy as np
+
+from Backend.analytics.nudge_engine import pick_measure, to_numeric, typed_columns
+from Backend.agent.response_parser import CHART_TYPES
+
+logger = logging.getLogger(__name__)
+
+# Points further than this many IQRs outside the quartiles are flagged as outliers
+OUTLIER_IQR_FACTOR = 1.5
+# Half-over-half changes smaller than this (in %) count as flat
+FLAT_CHANGE_PCT = 1.0
+MAX_OUTLIERS = 10
+# Wider results are record listings, not series
+MAX_SERIES_COLUMNS = 4
+
+
+def _round(value, digits=2):
+    return None if value is None or not np.isfinite(value) else round(float(value), digits)
+
+
+def _pct_change(old, new):
+    return (new - old) / abs(old) * 100 if old else None
+
+
+def compute_trend(labels, values):
+    """
+    Trend summary of an ordered series. labels and values are parallel sequences; values may be
+    strings (as in chart data) and points that don't parse are ignored. Returns None for fewer than two points.
+    """
+    values = to_numeric(values)
+    labels = np.array([str(label) for label in labels], dtype=object)
+    present = ~np.isnan(values)
+    values, labels = values[present], labels[present]
+    count = len(values)
+    if count < 2:
+        return None
+
+    high, low = int(np.argmax(values)), int(np.argmin(values))
+    mean = values.mean()
+
+    middle = count // 2
+    first_half, second_half = values[:middle].mean(), values[middle:].mean()
+    half_change = _pct_change(first_half, second_half)
+    if half_change is None or abs(half_change) < FLAT_CHANGE_PCT:
+        direction = "flat"
+    else:
+        direction = "up" if half_change > 0 else "down"
+
+    # Least-squares slope per point, also expressed relative to the mean
+    slope = np.polyfit(np.arange(count, dtype=np.float64), values, 1)[0]
+
+    # Compound growth per step between the first and last points (only meaningful for positive values)
+    growth_rate = None
+    if values[0] > 0 and values[-1] > 0:
+        growth_rate = ((values[-1] / values[0]) ** (1 / (count - 1)) - 1) * 100
+
+    # Volatility: coefficient of variation of the values
+    volatility = values.std() / abs(mean) * 100 if mean else None
+
+    q1, q3 = np.percentile(values, [25, 75])
+    spread = (q3 - q1) * OUTLIER_IQR_FACTOR
+    outlier_index = np.flatnonzero((values < q1 - spread) | (values > q3 + spread)) if spread > 0 else []
+
+    return {
+        "count": count,
+        "highest": {"label": labels[high], "value": _round(values[high])},
+        "lowest": {"label": labels[low], "value": _round(values[low])},
+        "total": _round(values.sum()),
+        "average": _round(mean),
+        "first_half_average": _round(first_half),
+        "second_half_average": _round(second_half),
+        "change_pct": _round(half_change, 1),
+        "direction": direction,
+        "slope": _round(slope),
+        "slope_pct_of_average": _round(slope / abs(mean) * 100 if mean else None, 1),
+        "growth_rate_pct": _round(growth_rate, 1),
+        "volatility_pct": _round(volatility, 1),
+        "outliers": [
+            {"label": labels[i], "value": _round(values[i]),
+             "position": "high" if values[i] > q3 else "low"}
+            for i in outlier_index[:MAX_OUTLIERS]
+        ],
+    }
+
+
+def attach_trend(sql_dict):
+    """Add a "trend" field to chart responses with label/value data; other responses are returned unchanged"""
+    data = sql_dict.get("data")
+    if sql_dict.get("type") not in CHART_TYPES or not isinstance(data, list) or "trend" in sql_dict:
+        return sql_dict
+    points = [point for point in data if isinstance(point, dict)]
+    try:
+        trend = compute_trend([p.get("label", "") for p in points], [p.get("value") for p in points])
+    except Exception:
+        logger.warning("⚠️ Trend analysis failed - sending response without it", exc_info=True)
+        trend = None
+    if trend:
+        sql_dict["trend"] = trend
+    return sql_dict
+
+
+def trend_from_rows(rows, column_types=None):
+    """Trend of a query result shaped like a series: one label column and at least one numeric column"""
+    if not rows or len(rows[0]) > MAX_SERIES_COLUMNS:
+        return None
+    numeric, dimensions = typed_columns(rows, column_types)
+    if len(dimensions) != 1 or not numeric:
+        return None
+    (label_column, labels), = dimensions.items()
+    measure = pick_measure(numeric)
+    trend = compute_trend(labels, numeric[measure])
+    if trend:
+        trend["label_column"], trend["measure"] = label_column, measure
+    return trend
+
+
+def _fmt(value):
+    return "n/a" if value is None else f"{value:,.2f}".rstrip("0").rstrip(".")
+
+
+def format_trend(trend):
+    """Render a trend as the compact block handed to the model"""
+    lines = [
+        f"TREND FACTS for {trend['measure']} by {trend['label_column']} "
+        f"(precomputed in result order - quote these, do not recompute):",
+        f"Points: {trend['count']} | Highest: {trend['highest']['label']} ({_fmt(trend['highest']['value'])}) | "
+        f"Lowest: {trend['lowest']['label']} ({_fmt(trend['lowest']['value'])}) | Average: {_fmt(trend['average'])}",
+        f"Second half vs first half: {_fmt(trend['change_pct'])}% ({trend['direction']}) | "
+        f"Slope: {_fmt(trend['slope'])} per point | Growth rate: {_fmt(trend['growth_rate_pct'])}% per point | "
+        f"Volatility: {_fmt(trend['volatility_pct'])}%",
+    ]
+    if trend["outliers"]:
+        outliers = ", ".join(f"{o['label']} ({_fmt(o['value'])}, {o['position']})" for o in trend["outliers"])
+        lines.append(f"Outliers: {outliers}")
+    return "\n".join(lines)
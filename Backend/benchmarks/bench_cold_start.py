@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Cold start of the AgentCore entrypoint: how long a fresh interpreter takes to import Backend.main.
+AgentCore Memory is simulated by a client stand-in that sleeps --aws-latency per call, so anything
+that talks to AgentCore Memory during import shows up in the number, as does the warm-up the server
+runs beside its first requests. The run fails when the median import exceeds --budget-ms
+(COLD_START_BUDGET_MS unless given; 0 turns the check off).
+Run with: python -m Backend.benchmarks.bench_cold_start --runs 5 --aws-latency 0.3 --profile 10
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+from Backend.benchmarks import import_profile
+
+# The server must be able to bind before strands, boto3 and numpy are loaded
+COLD_START_BUDGET_MS = 350
+
+# Runs in the child before Backend.main is imported
+CHILD = """
+import os, sys, time, json
+from Backend.memory import memory_setup
+
+LATENCY = float(os.environ["BENCH_AWS_LATENCY"])
+calls = []
+
+class SlowMemoryClient:
+    def list_memories(self, *args, **kwargs):
+        calls.append("list_memories")
+        time.sleep(LATENCY)
+        return [{"id": "Test_Agent_Memory_V1-bench"}]
+
+memory_setup.configure(client=SlowMemoryClient())
+
+start = time.perf_counter()
+import Backend.main
+imported = time.perf_counter() - start
+during_import = len(calls)
+
+# What `python -m main` runs beside the server; the first request is as fast as a warm one after this
+Backend.main.warm_up()
+ready = time.perf_counter() - start
+print(json.dumps({"import_seconds": imported, "ready_seconds": ready, "aws_calls_during_import": during_import}))
+"""
+
+
+def cold_start(aws_latency, cache_path, profile=False):
+    env = {"AWS_DEFAULT_REGION": "ap-south-1", **os.environ, "BENCH_AWS_LATENCY": str(aws_latency),
+           "LOG_LEVEL": "WARNING", "AGENT_MEMORY_ID_CACHE": cache_path,
+           "QUERY_HISTORY_DB": os.path.join(os.path.dirname(cache_path), "query_history.sqlite3"),
+           # Offline the warm-up's Athena call fails fast instead of probing instance metadata
+           "AWS_EC2_METADATA_DISABLED": "true"}
+    env.pop("AGENT_MEMORY_ID", None)
+    start = time.perf_counter()
+    flags = ["-X", "importtime"] if profile else []
+    completed = subprocess.run([sys.executable, *flags, "-c", CHILD], env=env, capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    if completed.returncode != 0:
+        raise RuntimeError(f"Cold start failed:\n{completed.stderr[-2000:]}")
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    return {"wall_seconds": wall, **result, "stderr": completed.stderr}
+
+
+def median_ms(results, key):
+    return statistics.median(result[key] for result in results) * 1000
+
+
+def run(runs, aws_latency, warm_cache, budget_ms=COLD_START_BUDGET_MS, profile_top=0):
+    cache_dir = tempfile.mkdtemp()
+    results = []
+    for i in range(runs):
+        # A new container starts without the memory ID cache unless --warm-cache keeps one across runs
+        cache_path = os.path.join(cache_dir, "memory_id.json" if warm_cache else f"memory_id_{i}.json")
+        results.append(cold_start(aws_latency, cache_path))
+    print(f"{runs} cold starts, simulated AWS latency {aws_latency}s, {'warm' if warm_cache else 'cold'} ID cache")
+    print(f"import Backend.main (median):                 {median_ms(results, 'import_seconds'):.0f} ms")
+    print(f"import start to warm-up finished (median):    {median_ms(results, 'ready_seconds'):.0f} ms")
+    print(f"process start to warm-up finished (median):   {median_ms(results, 'wall_seconds'):.0f} ms")
+    print(f"AWS calls during import:                      {results[0]['aws_calls_during_import']}")
+
+    if profile_top:
+        # A separate run: -X importtime itself slows every import down
+        profiled = cold_start(aws_latency, os.path.join(cache_dir, "memory_id_profile.json"), profile=True)
+        entries = import_profile.parse(profiled["stderr"].splitlines())
+        import_profile.report(entries, profile_top, root="Backend.main")
+        import_profile.report(entries, profile_top, root="Backend.agent.sql_agent")
+
+    if not budget_ms:
+        return 0
+    imported_ms = median_ms(results, "import_seconds")
+    if imported_ms > budget_ms:
+        print(f"\n❌ import Backend.main took {imported_ms:.0f} ms, over the {budget_ms:.0f} ms budget")
+        return 1
+    print(f"\n✅ import Backend.main took {imported_ms:.0f} ms, within the {budget_ms:.0f} ms budget")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--aws-latency", type=float, default=0.3, help="seconds per simulated AgentCore Memory call")
+    parser.add_argument("--warm-cache", action="store_true", help="share the memory ID cache file between runs")
+    parser.add_argument("--budget-ms", type=float, default=COLD_START_BUDGET_MS,
+                        help="fail when the median import exceeds this; 0 disables the check (default: %(default).0f)")
+    parser.add_argument("--profile", type=int, default=0, metavar="TOP",
+                        help="also print the TOP slowest imports from an -X importtime run")
+    args = parser.parse_args()
+    sys.exit(run(args.runs, args.aws_latency, args.warm_cache, args.budget_ms, args.profile))
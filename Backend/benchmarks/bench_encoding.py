@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Encoding benchmark: stdlib json vs the shared encoder on a representative 10k-row result,
+with gzip/brotli sizes and MessagePack. Run with: python -m Backend.benchmarks.bench_encoding
+"""
+import gzip
+import json
+import time
+import random
+import argparse
+import datetime
+from decimal import Decimal
+
+from Backend.utils import encoding
+
+ZONES = ["North", "South", "East", "West", "Central"]
+PRODUCTS = ["Term Life", "Whole Life", "ULIP", "Endowment", "Health Shield"]
+
+
+def insurance_rows(count, seed=7):
+    """Rows shaped like an insurance_db policy listing, with Decimal premiums and dates"""
+    rng = random.Random(seed)
+    start = datetime.date(2024, 1, 1)
+    return [
+        {
+            "policy_no": f"POL{100000 + i}",
+            "agent_name": f"Agent {rng.randint(1, 400)}",
+            "zone": rng.choice(ZONES),
+            "product": rng.choice(PRODUCTS),
+            "gwp": Decimal(f"{rng.uniform(5000, 250000):.2f}"),
+            "sum_insured": rng.randint(100000, 5000000),
+            "issue_date": start + datetime.timedelta(days=rng.randint(0, 600)),
+        }
+        for i in range(count)
+    ]
+
+
+def chart_response(rows):
+    return {
+        "type": "line",
+        "data": [{"label": row["issue_date"], "value": row["gwp"]} for row in rows],
+        "explanation": "Daily premium over the period.",
+        "customer_specific": "False",
+        "query_executed": "SELECT issue_date, SUM(gwp) FROM insurance_data GROUP BY issue_date",
+    }
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def stdlib_dumps(payload):
+    # What the code did before: stdlib json, which needs default=str to get past Decimal/date at all
+    return json.dumps(payload, default=str).encode("utf-8")
+
+
+def run(count, repeat):
+    payload = {"status": "ok", "rows": insurance_rows(count)}
+    payloads = {"rows": payload, "chart": chart_response(payload["rows"])}
+
+    print(f"{'payload':<8}{'method':<26}{'ms':>10}{'MB/s':>10}{'bytes':>12}")
+    for name, data in payloads.items():
+        stdlib_time, stdlib_body = timed(lambda: stdlib_dumps(data), repeat)
+        fast_time, body = timed(lambda: encoding.dumps(data), repeat)
+        results = [("json.dumps (stdlib)", stdlib_time, stdlib_body),
+                   (f"encoding.dumps ({'orjson' if encoding.orjson else 'json'})", fast_time, body)]
+        results.append((f"+ gzip level {encoding.GZIP_LEVEL}",) + timed(lambda: gzip.compress(body, encoding.GZIP_LEVEL), repeat))
+        if encoding.brotli:
+            results.append((f"+ brotli quality {encoding.BROTLI_QUALITY}",)
+                           + timed(lambda: encoding.brotli.compress(body, quality=encoding.BROTLI_QUALITY), repeat))
+        if encoding.msgpack:
+            results.append(("msgpack",) + timed(lambda: encoding.packb(data), repeat))
+        for method, seconds, output in results:
+            print(f"{name:<8}{method:<26}{seconds * 1000:>10.2f}{len(body) / seconds / 1e6:>10.1f}{len(output):>12,}")
+        print()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    run(args.rows, args.repeat)
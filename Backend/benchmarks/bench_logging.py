@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Logging overhead per request, measured on the request thread: the previous pattern (synchronous
+StreamHandler, eager f-strings, whole payloads and LLM results at INFO) against the queued, lazy,
+capped and sampled setup in Backend.config.logger. Output goes to a temporary file in both cases.
+Run with: python -m Backend.benchmarks.bench_logging
+"""
+import time
+import logging
+import argparse
+import tempfile
+import statistics
+
+from Backend.config import logger as log_config
+
+SQL = "SELECT agent_name, SUM(gwp) AS total_gwp FROM insurance_data GROUP BY agent_name ORDER BY total_gwp"
+
+
+def sample_request(points):
+    rows = [{"agent_name": f"Agent {i}", "total_gwp": str(1000 + i * 37)} for i in range(points)]
+    response = {
+        "type": "bar",
+        "data": [{"label": row["agent_name"], "value": row["total_gwp"]} for row in rows],
+        "explanation": "Premium distribution across agents. " * 20,
+        "customer_specific": "False",
+        "query_executed": SQL,
+        "nudge": "Agent 0 trails the median by 42%. " * 10,
+        "cta": "Action 1: Agent 0 — Mentorship\nPriority: HIGH\n" * 3,
+    }
+    payload = {"user_query": "Show premium by agent", "user_id": "jane.doe", "session_id": "s" * 33}
+    return payload, rows, response
+
+
+def log_request_before(log, payload, rows, response):
+    """The INFO logging one request did before (baseline sql_agent, athena_query, main and Agent_Trigger)"""
+    result_str = str(response)
+    print(payload, file=log.handlers[0].stream)
+    log.info(f"📩 Incoming payload: {payload}")
+    log.info(f"✅ Validated identifiers - user_id: {payload['user_id']}, session_id: {payload['session_id']}")
+    log.info(f"🔑 Agent state: {({'actor_id': payload['user_id'], 'session_id': payload['session_id']})}")
+    log.info(f"📝 User Query: {payload['user_query']}")
+    log.info(f"🔍 ATHENA QUERY TOOL CALLED")
+    log.info(f"   Database: insurance_db")
+    log.info(f"   SQL: {SQL}")
+    log.info(f"   Columns: {list(rows[0])}")
+    log.info(f"   ✅ Query succeeded - returned {len(rows)} rows")
+    log.info(f"   Sample row: {rows[0]}")
+    log.info(f"LLM RESULT : {result_str}")
+    log.info(f"Raw result length: {len(result_str)}")
+    log.info(f"Raw result (first 300 chars): {result_str[:300]}")
+    log.info(f"Extracted JSON (first 200 chars): {result_str[:200]}")
+    log.info(f"Content to parse: {repr(result_str[:500])}")
+    log.info(f"📊 Final SQL Dictionary: {response}")
+    for _ in range(4):
+        log.info(f"💾 Saving message to memory for actor_id={payload['user_id']}, session_id={payload['session_id']}")
+        log.info(f"✅ Message saved successfully")
+    print("Agent Response:", response, file=log.handlers[0].stream)
+
+
+def log_request_after(log, payload, rows, response):
+    """The same request with the current calls"""
+    log.info("📩 Incoming payload", extra={"category": "payload", "payload": payload})
+    log.info("✅ Validated identifiers - user_id: %s, session_id: %s", payload["user_id"], payload["session_id"])
+    log.info("📝 User Query", extra={"category": "query", "user_query": payload["user_query"]})
+    log.info("🔍 Athena query on %s", "insurance_db", extra={"category": "sql", "sql": SQL})
+    log.info("   ✅ Query succeeded - returned %d rows", len(rows), extra={"query_id": "q-1"})
+    log.info("   Sample row", extra={"category": "sample_row", "columns": list(rows[0]), "row": rows[0]})
+    log.info("✅ Agent invocation successful (%s model).", "standard")
+    log.info("📈 Request usage", extra={"usage": {"tool_calls": 1, "model_turns": 2}})
+    for _ in range(4):
+        log.debug("💾 Saving message to memory for actor_id=%s, session_id=%s", payload["user_id"], payload["session_id"])
+    log.info("📩 /query payload", extra={"category": "payload", "payload": payload})
+    log.info("✅ Agent response: %d bytes", len(str(response)))
+
+
+def measure(log_request, log, requests, points):
+    payload, rows, response = sample_request(points)
+    timings = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        log_request(log, payload, rows, response)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def summarize(name, timings):
+    timings = sorted(timings)
+    p50 = statistics.median(timings) * 1e6
+    p99 = timings[int(len(timings) * 0.99) - 1] * 1e6
+    print(f"{name:<30}{p50:>10.1f}{p99:>10.1f}")
+    return p50
+
+
+def run(requests, points):
+    print(f"{requests} requests, {points}-point response")
+    print(f"{'setup':<30}{'p50 µs':>10}{'p99 µs':>10}")
+    with tempfile.TemporaryFile("w+") as before_file, tempfile.TemporaryFile("w+") as after_file:
+        before = logging.getLogger("bench.before")
+        before.propagate = False
+        before.setLevel(logging.INFO)
+        handler = logging.StreamHandler(before_file)
+        handler.setFormatter(logging.Formatter('%(asctime)s | %(levelname)s | %(name)s | %(message)s'))
+        before.addHandler(handler)
+        before_p50 = summarize("sync handler, eager f-strings", measure(log_request_before, before, requests, points))
+        before_bytes = before_file.tell()
+
+        log_config.configure_logging(stream=after_file)
+        after = logging.getLogger("Backend.bench")
+        after_p50 = summarize("queue handler, lazy + sampled", measure(log_request_after, after, requests, points))
+        log_config.stop_logging()
+        after_bytes = after_file.tell()
+
+    print(f"\nrequest-thread time per request: {before_p50:.0f} µs -> {after_p50:.0f} µs "
+          f"({before_p50 / after_p50:.1f}x less)")
+    print(f"log volume per request: {before_bytes / requests / 1024:.1f} KiB -> {after_bytes / requests / 1024:.1f} KiB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--points", type=int, default=200)
+    args = parser.parse_args()
+    run(args.requests, args.points)
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+End-to-end request latency, offline: main.main → SQLQueryExecutor → athena_query → MemoryHookProvider
+against the stand-ins in Backend.benchmarks.fakes. Stage timings come from the request's spans
+(agent.request, model.call, athena.query, memory.load, ...). With the default zero service latency
+the numbers are our own overhead. With --cassette the recorded session is replayed instead
+(Backend.benchmarks.cassette), so changes can be checked against real traffic shapes.
+Exits non-zero when a stage is slower than the saved baseline.
+Run with: python -m Backend.benchmarks.bench_request --save-baseline baseline.json
+          python -m Backend.benchmarks.bench_request --baseline baseline.json
+          python -m Backend.benchmarks.bench_request --cassette session.json --replay-speed 0
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+import contextlib
+
+# Set before the Backend modules read them at import
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("QUERY_HISTORY_DB", os.path.join(tempfile.mkdtemp(), "query_history.sqlite3"))
+
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from Backend.benchmarks.fakes import SCENARIOS, install_fakes
+from Backend.memory.memory_backends import SQLiteMemoryBackend
+from Backend.benchmarks.cassette import Cassette, install_replay
+from Backend.benchmarks.stats import (PERCENTILES, load_baseline, regressions, report_regressions, save_baseline,
+                                      summarize)
+
+REQUEST_STAGE = "request"
+
+
+def span_durations(exporter):
+    durations = {}
+    for finished in exporter.get_finished_spans():
+        durations.setdefault(finished.name, []).append((finished.end_time - finished.start_time) / 1e6)
+    return durations
+
+
+def call_entrypoint(entrypoint, payload):
+    result = entrypoint.main(payload)
+    if payload.get("stream"):
+        async def consume():
+            return [event async for event in result]
+        result = asyncio.run(consume())[-1]["response"]
+    return result
+
+
+def scenario_request(entrypoint, index, sessions, stream):
+    scenario = SCENARIOS[index % len(SCENARIOS)]
+    payload = {"user_query": scenario["question"], "user_id": f"bench.user{index % sessions}",
+               "session_id": f"bench-session-{index % sessions:020d}", "stream": stream}
+    result = call_entrypoint(entrypoint, payload)
+    if result.get("type") != scenario["type"]:
+        raise RuntimeError(f"Unexpected response for {scenario['question']!r}: {result}")
+
+
+def replay_request(entrypoint, cassette, index, stream):
+    """Requests replay the cassette's payloads in order, rewinding it at the start of each pass"""
+    if index % len(cassette.payloads) == 0:
+        cassette.rewind()
+    call_entrypoint(entrypoint, {**cassette.payloads[index % len(cassette.payloads)], "stream": stream})
+
+
+def run(requests, warmup, sessions, stream, model_latency, athena_latency, memory_latency,
+        cassette=None, replay_speed=0.0, memory_sqlite=None):
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+
+    if cassette is not None:
+        install_replay(cassette, replay_speed)
+        # Whole passes over the recorded session, so every pass starts from a rewound cassette
+        requests = max(1, requests // len(cassette.payloads)) * len(cassette.payloads)
+        warmup = -(-warmup // len(cassette.payloads)) * len(cassette.payloads)
+        run_request = lambda index: replay_request(entrypoint, cassette, index, stream)
+    else:
+        memory = SQLiteMemoryBackend(memory_sqlite) if memory_sqlite else None
+        install_fakes(model_latency, athena_latency, memory_latency, memory=memory)
+        run_request = lambda index: scenario_request(entrypoint, index, sessions, stream)
+    from Backend import main as entrypoint
+
+    request_ms = []
+    # The agent's default callback handler prints the streamed answer; keep it off the report
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for index in range(warmup):
+            run_request(index)
+        exporter.clear()
+
+        for index in range(requests):
+            start = time.perf_counter()
+            run_request(index)
+            request_ms.append((time.perf_counter() - start) * 1000)
+
+    durations = span_durations(exporter)
+    durations[REQUEST_STAGE] = request_ms
+    return summarize(durations)
+
+
+def report(summary):
+    print(f"{'stage':<40}{'count':>7}" + "".join(f"{'p' + str(pct) + ' ms':>11}" for pct in PERCENTILES))
+    for stage, stats in summary.items():
+        print(f"{stage:<40}{stats['count']:>7}" + "".join(f"{stats['p' + str(pct)]:>11.3f}" for pct in PERCENTILES))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--sessions", type=int, default=10, help="requests are spread over this many sessions")
+    parser.add_argument("--stream", action="store_true", help="use the streaming path")
+    parser.add_argument("--model-latency", type=float, default=0.0, help="seconds per scripted model call")
+    parser.add_argument("--athena-latency", type=float, default=0.0, help="seconds per Athena query")
+    parser.add_argument("--memory-latency", type=float, default=0.0, help="seconds per memory call")
+    parser.add_argument("--memory-sqlite", help="keep memory in this SQLite file instead of the in-process fake")
+    parser.add_argument("--cassette", help="replay this recorded session instead of the scripted scenarios")
+    parser.add_argument("--replay-speed", type=float, default=0.0,
+                        help="1.0 replays at recorded speed, 0 as fast as possible")
+    parser.add_argument("--baseline", help="fail if slower than this saved run")
+    parser.add_argument("--save-baseline", help="write this run's percentiles here")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown")
+    parser.add_argument("--slack-ms", type=float, default=1.0, help="allowed absolute slowdown, for tiny stages")
+    args = parser.parse_args()
+
+    config = {key: getattr(args, key) for key in ("requests", "sessions", "stream", "model_latency",
+                                                   "athena_latency", "memory_latency", "memory_sqlite", "cassette",
+                                                   "replay_speed")}
+    print(f"{args.requests} requests over {args.sessions} sessions "
+          f"(stream={args.stream}, model={args.model_latency}s, athena={args.athena_latency}s, "
+          f"memory={args.memory_latency}s)")
+    summary = run(args.requests, args.warmup, args.sessions, args.stream,
+                  args.model_latency, args.athena_latency, args.memory_latency,
+                  Cassette.load(args.cassette) if args.cassette else None, args.replay_speed, args.memory_sqlite)
+    report(summary)
+
+    if args.save_baseline:
+        save_baseline(args.save_baseline, config, {"stages": summary})
+
+    if args.baseline:
+        baseline = load_baseline(args.baseline, config)
+        sys.exit(report_regressions(regressions(summary, baseline["stages"], args.tolerance, args.slack_ms)))
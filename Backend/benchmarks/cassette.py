@@ -0,0 +1,289 @@
+"""
+Record and Replay
+Captures the model, Athena, Bedrock KB and MemoryClient calls of a real session into a cassette
+file (request, response and timing of every call, plus the entrypoint payloads), and replays them
+deterministically without AWS: at recorded speed (speed=1.0), scaled, or as fast as possible (speed=0).
+
+    python -m Backend.benchmarks.cassette record session.json -q "Show total premium by zone" -q "Now by agent"
+    python -m Backend.benchmarks.bench_request --cassette session.json --replay-speed 0
+"""
+import json
+import time
+import asyncio
+import logging
+import argparse
+import threading
+
+from botocore.exceptions import ClientError
+from strands.models import Model
+
+from Backend.utils.encoding import dumps, to_builtin
+from Backend.benchmarks.fakes import MEMORY_ID, wire
+
+logger = logging.getLogger(__name__)
+
+CASSETTE_VERSION = 1
+MODEL_SERVICE = "model"
+MEMORY_SERVICE = "memory"
+
+
+class CassetteMismatch(Exception):
+    """A replayed call has no matching recorded interaction"""
+
+
+def _plain(value):
+    """JSON-safe copy of a request or response (datetimes become ISO strings)"""
+    return json.loads(dumps(value))
+
+
+class Cassette:
+    """Recorded interactions and entrypoint payloads, with one replay cursor per interaction"""
+
+    def __init__(self, interactions=None, payloads=None, poll_interval=1.0):
+        self.interactions = interactions or []
+        self.payloads = payloads or []
+        # athena_query's wait between status polls while recording; the waits are not calls themselves
+        self.poll_interval = poll_interval
+        self._used = set()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            data = json.load(f)
+        if data.get("version") != CASSETTE_VERSION:
+            raise ValueError(f"Unsupported cassette version {data.get('version')}")
+        return cls(data["interactions"], data["payloads"], data["poll_interval"])
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump({"version": CASSETTE_VERSION, "poll_interval": self.poll_interval, "payloads": self.payloads,
+                       "interactions": self.interactions}, f, indent=1, default=to_builtin)
+
+    def add(self, service, operation, request, elapsed, response=None, error=None, events=None):
+        interaction = {"service": service, "operation": operation, "request": _plain(request), "elapsed": elapsed}
+        if error is not None:
+            interaction["error"] = error
+        elif events is not None:
+            interaction["events"] = events
+        else:
+            interaction["response"] = _plain(response)
+        with self._lock:
+            self.interactions.append(interaction)
+
+    def rewind(self):
+        with self._lock:
+            self._used.clear()
+
+    def take(self, service, operation, request, strict=False):
+        """
+        The first unused interaction for this call with an equal request; calls made in parallel
+        (e.g. supporting queries) can arrive in any order. Unless strict, fall back to the first
+        unused interaction of the same operation.
+        """
+        request = _plain(request)
+        with self._lock:
+            fallback = None
+            for index, interaction in enumerate(self.interactions):
+                if index in self._used or interaction["service"] != service or interaction["operation"] != operation:
+                    continue
+                if interaction["request"] == request:
+                    self._used.add(index)
+                    return interaction
+                if fallback is None:
+                    fallback = index
+            if fallback is None or strict:
+                raise CassetteMismatch(f"No recorded {service}.{operation} call for {str(request)[:300]}")
+            self._used.add(fallback)
+            return self.interactions[fallback]
+
+
+def _error_record(exc):
+    if isinstance(exc, ClientError):
+        return {"type": "ClientError", "operation": exc.operation_name, "response": _plain(exc.response)}
+    return {"type": type(exc).__name__, "message": str(exc)}
+
+
+def _raise_recorded(error):
+    if error["type"] == "ClientError":
+        raise ClientError(error["response"], error["operation"])
+    raise RuntimeError(f"{error['type']}: {error.get('message', '')}")
+
+
+def _client_request(args, kwargs):
+    return {"args": list(args), "kwargs": kwargs}
+
+
+class RecordingClient:
+    """Wraps a boto3 or MemoryClient client and records every method call"""
+
+    def __init__(self, client, service, cassette):
+        self._client = client
+        self._service = service
+        self._cassette = cassette
+
+    def __getattr__(self, name):
+        method = getattr(self._client, name)
+        if not callable(method):
+            return method
+
+        def record(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                response = method(*args, **kwargs)
+            except Exception as e:
+                self._cassette.add(self._service, name, _client_request(args, kwargs), time.perf_counter() - start,
+                                   error=_error_record(e))
+                raise
+            if isinstance(response, dict):
+                response = {key: value for key, value in response.items() if key != "ResponseMetadata"}
+            self._cassette.add(self._service, name, _client_request(args, kwargs), time.perf_counter() - start,
+                               response=response)
+            return response
+
+        return record
+
+
+class ReplayClient:
+    """Answers method calls from the cassette, sleeping the recorded time scaled by speed"""
+
+    def __init__(self, cassette, service, speed=0.0, strict=False):
+        self._cassette = cassette
+        self._service = service
+        self._speed = speed
+        self._strict = strict
+
+    def __getattr__(self, name):
+        def replay(*args, **kwargs):
+            interaction = self._cassette.take(self._service, name, _client_request(args, kwargs), self._strict)
+            if self._speed:
+                time.sleep(interaction["elapsed"] * self._speed)
+            if "error" in interaction:
+                _raise_recorded(interaction["error"])
+            return interaction["response"]
+
+        return replay
+
+
+def _model_request(messages):
+    # The last message identifies the step (question or tool result); the full history is not stored
+    return {"message_count": len(messages), "last_message": messages[-1] if messages else None}
+
+
+class RecordingModel(Model):
+    """Wraps a model and records the stream events of every call with their offsets"""
+
+    def __init__(self, model, cassette):
+        self.model = model
+        self.cassette = cassette
+
+    def update_config(self, **model_config):
+        self.model.update_config(**model_config)
+
+    def get_config(self):
+        return self.model.get_config()
+
+    def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        return self.model.structured_output(output_model, prompt, system_prompt=system_prompt, **kwargs)
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        start = time.perf_counter()
+        events = []
+        try:
+            async for event in self.model.stream(messages, tool_specs, system_prompt, **kwargs):
+                events.append([time.perf_counter() - start, _plain(event)])
+                yield event
+        except Exception as e:
+            self.cassette.add(MODEL_SERVICE, "stream", _model_request(messages), time.perf_counter() - start,
+                              error=_error_record(e))
+            raise
+        self.cassette.add(MODEL_SERVICE, "stream", _model_request(messages), time.perf_counter() - start,
+                          events=events)
+
+
+class ReplayModel(Model):
+    """Replays recorded stream events, keeping the recorded gaps between them scaled by speed"""
+
+    def __init__(self, cassette, model_id, speed=0.0, strict=False):
+        self.cassette = cassette
+        self.model_id = model_id
+        self.speed = speed
+        self.strict = strict
+
+    def update_config(self, **model_config):
+        pass
+
+    def get_config(self):
+        return {"model_id": self.model_id}
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        raise NotImplementedError
+        yield
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        interaction = self.cassette.take(MODEL_SERVICE, "stream", _model_request(messages), self.strict)
+        if "error" in interaction:
+            _raise_recorded(interaction["error"])
+        previous = 0.0
+        for offset, event in interaction["events"]:
+            if self.speed:
+                await asyncio.sleep((offset - previous) * self.speed)
+                previous = offset
+            yield event
+
+
+def install_recorder(cassette):
+    """Run the request path on the real services, recording every call into cassette"""
+    import boto3
+    from Backend.agent.model_router import ModelRouter
+    from Backend.memory import memory_setup
+    from Backend.tools import athena_query
+
+    cassette.poll_interval = athena_query.POLL_INTERVAL_SECONDS
+
+    live = ModelRouter()
+    return wire(lambda model_id: RecordingModel(live.model_factory(model_id), cassette),
+                lambda service_name: RecordingClient(boto3.client(service_name), service_name, cassette),
+                RecordingClient(memory_setup.get_backend(), MEMORY_SERVICE, cassette), memory_setup.get_memory_id(),
+                synchronous_memory=True)
+
+
+def install_replay(cassette, speed=0.0, strict=False):
+    """Run the request path on cassette; speed 1.0 keeps recorded timings, 0 replays as fast as possible"""
+    clients = {}
+
+    def client_factory(service_name):
+        return clients.setdefault(service_name, ReplayClient(cassette, service_name, speed, strict))
+
+    return wire(lambda model_id: ReplayModel(cassette, model_id, speed, strict), client_factory,
+                ReplayClient(cassette, MEMORY_SERVICE, speed, strict), MEMORY_ID,
+                poll_interval=cassette.poll_interval * speed, synchronous_memory=True)
+
+
+def record_session(path, questions, user_id, session_id):
+    """Ask questions through main.main against live services and save the cassette"""
+    cassette = Cassette()
+    install_recorder(cassette)
+    from Backend import main as entrypoint
+
+    for question in questions:
+        payload = {"user_query": question, "user_id": user_id, "session_id": session_id}
+        cassette.payloads.append(payload)
+        result = entrypoint.main(payload)
+        logger.info("🎞️ Recorded %r -> %s", question, result.get("type"))
+    cassette.save(path)
+    return cassette
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record a live session into a cassette")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    record = subcommands.add_parser("record")
+    record.add_argument("path")
+    record.add_argument("-q", "--question", action="append", required=True)
+    record.add_argument("--user-id", default="cassette.recorder")
+    record.add_argument("--session-id", default="cassette-recording-session-00000001")
+    args = parser.parse_args()
+
+    cassette = record_session(args.path, args.question, args.user_id, args.session_id)
+    print(f"Recorded {len(cassette.interactions)} calls for {len(cassette.payloads)} questions into {args.path}")
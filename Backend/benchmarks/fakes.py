@@ -0,0 +1,268 @@
+"""
+Local Stand-ins
+Offline replacements for Bedrock, Athena and AgentCore Memory so the request path (main.main →
+SQLQueryExecutor → athena_query → MemoryHookProvider) can run without AWS. Each fake takes a
+latency in seconds to mimic the real service. install_fakes() must run before Backend.main is imported;
+wire() is the shared plumbing, also used to record and replay cassettes (Backend.benchmarks.cassette).
+"""
+import os
+import json
+import time
+import types
+import random
+import sqlite3
+import asyncio
+import tempfile
+import threading
+from strands.models import Model
+from Backend.memory.memory_backends import MemoryBackend
+
+MEMORY_ID = "bench-memory"
+MODEL_CHUNK_CHARS = 64
+
+# Questions the scripted model knows: the SQL it sends to athena_query and the chart it answers with
+SCENARIOS = [
+    {"question": "How many customers do we have?", "database": "sentra_db", "type": "text",
+     "sql": "SELECT COUNT(*) AS customers FROM dm_customer_master"},
+    {"question": "Show total premium by zone", "database": "insurance_db", "type": "bar",
+     "sql": "SELECT zone, SUM(premium) AS total_premium FROM insurance_policies GROUP BY zone ORDER BY total_premium DESC"},
+    {"question": "Show the monthly premium trend", "database": "insurance_db", "type": "line",
+     "sql": "SELECT issue_month, SUM(premium) AS total_premium FROM insurance_policies GROUP BY issue_month ORDER BY issue_month"},
+    {"question": "Which agents have the least premium?", "database": "insurance_db", "type": "bar",
+     "sql": "SELECT agent_name, SUM(premium) AS total_premium FROM insurance_policies GROUP BY agent_name ORDER BY total_premium"},
+]
+
+ZONES = ["North", "South", "East", "West", "Central"]
+
+
+def seed_database(connection, customers=500, policies=5000, agents=60, months=36, seed=7):
+    """Small deterministic copies of the tables the scenarios query"""
+    rng = random.Random(seed)
+    connection.execute("CREATE TABLE dm_customer_master (CIF_NO TEXT, CUSTOMER_NAME TEXT, MOBILE_PHONE TEXT, EMAIL_ADDRESS TEXT)")
+    connection.executemany("INSERT INTO dm_customer_master VALUES (?, ?, ?, ?)", [
+        (f"CIF{100000 + i}", f"Customer {i}", f"98{i:08d}", f"customer{i}@example.com") for i in range(customers)])
+    connection.execute("CREATE TABLE insurance_policies (policy_id TEXT, zone TEXT, agent_name TEXT, issue_month TEXT, premium REAL)")
+    rows = []
+    for i in range(policies):
+        month = rng.randrange(months)
+        rows.append((f"P{i}", rng.choice(ZONES), f"Agent {rng.randrange(agents):02d}",
+                     f"{2022 + month // 12}-{month % 12 + 1:02d}", round(rng.uniform(5000, 90000), 2)))
+    connection.executemany("INSERT INTO insurance_policies VALUES (?, ?, ?, ?, ?)", rows)
+    connection.commit()
+
+
+def _athena_type(value):
+    if isinstance(value, int):
+        return "bigint"
+    if isinstance(value, float):
+        return "double"
+    return "varchar"
+
+
+class SQLiteAthena:
+    """Athena client whose queries run on an in-memory SQLite copy of the tables"""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.executions = {}
+        self.connection = sqlite3.connect(":memory:", check_same_thread=False)
+        seed_database(self.connection)
+        self._lock = threading.Lock()
+        self._ids = 0
+
+    def start_query_execution(self, QueryString, QueryExecutionContext=None, WorkGroup=None, ResultConfiguration=None):
+        time.sleep(self.latency)
+        started = time.perf_counter()
+        with self._lock:
+            self._ids += 1
+            query_id = f"bench-query-{self._ids}"
+            try:
+                cursor = self.connection.execute(QueryString)
+                columns = [column[0] for column in cursor.description]
+                rows = cursor.fetchall()
+                execution = {"State": "SUCCEEDED", "columns": columns, "rows": rows}
+            except sqlite3.Error as e:
+                execution = {"State": "FAILED", "StateChangeReason": str(e), "columns": [], "rows": []}
+        engine_ms = int((time.perf_counter() - started + self.latency) * 1000)
+        execution["Statistics"] = {
+            "EngineExecutionTimeInMillis": engine_ms, "QueryQueueTimeInMillis": 0,
+            "ServiceProcessingTimeInMillis": 1, "TotalExecutionTimeInMillis": engine_ms + 1,
+            "DataScannedInBytes": len(repr(execution["rows"])),
+        }
+        self.executions[query_id] = execution
+        return {"QueryExecutionId": query_id}
+
+    def get_query_execution(self, QueryExecutionId):
+        execution = self.executions[QueryExecutionId]
+        status = {"State": execution["State"]}
+        if "StateChangeReason" in execution:
+            status["StateChangeReason"] = execution["StateChangeReason"]
+        return {"QueryExecution": {"QueryExecutionId": QueryExecutionId, "Status": status,
+                                   "Statistics": execution["Statistics"]}}
+
+    def get_query_results(self, QueryExecutionId):
+        execution = self.executions[QueryExecutionId]
+        columns, rows = execution["columns"], execution["rows"]
+        first = rows[0] if rows else [None] * len(columns)
+        return {"ResultSet": {
+            "Rows": [{"Data": [{"VarCharValue": column} for column in columns]}] + [
+                {"Data": [{} if value is None else {"VarCharValue": str(value)} for value in row]} for row in rows],
+            "ResultSetMetadata": {"ColumnInfo": [{"Name": column, "Type": _athena_type(value)}
+                                                 for column, value in zip(columns, first)]},
+        }}
+
+    def stop_query_execution(self, QueryExecutionId):
+        return {}
+
+
+class InMemoryMemoryClient(MemoryBackend):
+    """The MemoryClient calls MemoryHookProvider makes, kept in a dict per (actor, session)"""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.events = {}
+        self.reads = 0
+        self._lock = threading.Lock()
+
+    def create_event(self, memory_id, actor_id, session_id, messages, event_timestamp=None, branch=None):
+        time.sleep(self.latency)
+        with self._lock:
+            self.events.setdefault((actor_id, session_id), []).append(
+                [{"role": role.upper(), "content": {"text": text}} for text, role in messages])
+        return {"eventId": f"event-{len(self.events[(actor_id, session_id)])}"}
+
+    def get_last_k_turns(self, memory_id, actor_id, session_id, k=5, branch_name=None, include_branches=False,
+                         max_results=100):
+        time.sleep(self.latency)
+        with self._lock:
+            self.reads += 1
+            events = list(self.events.get((actor_id, session_id), []))
+        # Newest first, one user message plus the replies that follow it per turn
+        turns, current = [], []
+        for messages in events:
+            for message in messages:
+                if message["role"] == "USER" and current:
+                    turns.append(current)
+                    current = []
+                current.append(message)
+        if current:
+            turns.append(current)
+        return list(reversed(turns))[:k]
+
+
+class ScriptedModel(Model):
+    """
+    Plays the agent's part for the known SCENARIOS: the first turn calls athena_query with the
+    scenario's SQL, the turn after the tool result answers with a chart built from the returned rows.
+    """
+
+    def __init__(self, latency=0.0, scenarios=SCENARIOS, model_id="scripted"):
+        self.latency = latency
+        self.scenarios = scenarios
+        self.model_id = model_id
+        self.calls = 0
+
+    def update_config(self, **model_config):
+        pass
+
+    def get_config(self):
+        return {"model_id": self.model_id}
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        raise NotImplementedError
+        yield
+
+    def _scenario(self, messages):
+        question = next(block["text"] for message in reversed(messages) if message["role"] == "user"
+                        for block in message["content"] if "text" in block)
+        return next((scenario for scenario in self.scenarios if scenario["question"] in question), self.scenarios[0])
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        scenario = self._scenario(messages)
+        tool_result = next((block["toolResult"] for block in messages[-1]["content"] if "toolResult" in block), None)
+
+        yield {"messageStart": {"role": "assistant"}}
+        if tool_result is None:
+            yield {"contentBlockStart": {"start": {"toolUse": {"toolUseId": f"tool-{self.calls}", "name": "athena_query"}}}}
+            yield {"contentBlockDelta": {"delta": {"toolUse": {"input": json.dumps(
+                {"sql": scenario["sql"], "database": scenario["database"]})}}}}
+            yield {"contentBlockStop": {}}
+            stop_reason = "tool_use"
+        else:
+            answer = self._answer(scenario, tool_result)
+            yield {"contentBlockStart": {"start": {}}}
+            # Streamed in pieces like a real model, so the streaming extractor does its usual work
+            for start in range(0, len(answer), MODEL_CHUNK_CHARS):
+                yield {"contentBlockDelta": {"delta": {"text": answer[start:start + MODEL_CHUNK_CHARS]}}}
+            yield {"contentBlockStop": {}}
+            stop_reason = "end_turn"
+        yield {"messageStop": {"stopReason": stop_reason}}
+        yield {"metadata": {"usage": {"inputTokens": 2000, "outputTokens": 150, "totalTokens": 2150},
+                            "metrics": {"latencyMs": int(self.latency * 1000)}}}
+
+    @staticmethod
+    def _answer(scenario, tool_result):
+        result = json.loads(tool_result["content"][0]["text"])
+        rows = result["rows"] if isinstance(result, dict) else result
+        if scenario["type"] == "text":
+            data = str(next(iter(rows[0].values())))
+        else:
+            data = []
+            for row in rows:
+                label, value = list(row.values())[:2]
+                data.append({"label": str(label), "value": str(value)})
+        return json.dumps({
+            "type": scenario["type"],
+            "data": data,
+            "explanation": f"Here is the answer to: {scenario['question']}",
+            "customer_specific": "False",
+            "query_executed": scenario["sql"],
+        })
+
+
+def wire(model_factory, client_factory, memory_client, memory_id=MEMORY_ID, poll_interval=None,
+         synchronous_memory=False):
+    """
+    Point the request path at the given model factory (model_id -> Model), boto3 client factory
+    (service_name -> client) and memory client, and return the new model router. Cassettes need
+    synchronous_memory: batched writes depend on timing, so replay could see different calls.
+    """
+    from Backend.agent import sql_agent
+    from Backend.memory import memory_setup
+    from Backend.memory.memory_writer import memory_writer
+    from Backend.memory.turn_cache import turn_cache
+    from Backend.agent.executor_cache import executor_cache
+    from Backend.agent.model_router import ModelRouter
+    from Backend.metrics.query_history import query_history
+    from Backend.tools import athena_query, knowledge_base_retrieve
+
+    router = ModelRouter(model_factory=model_factory)
+    sql_agent.default_router = router
+    memory_setup.configure(backend=memory_client, memory_id=memory_id)
+    memory_writer.flush()
+    memory_writer.synchronous = synchronous_memory
+    # Turns cached from an earlier memory client would hide this one
+    turn_cache.clear()
+    # As would agents holding the previous router and memory client
+    executor_cache.clear()
+    # Each wiring records its Athena statistics into a file of its own, not the host-wide default
+    query_history.reopen(os.path.join(tempfile.mkdtemp(), "query_history.sqlite3"))
+
+    boto3_stand_in = types.SimpleNamespace(client=lambda service_name, *args, **kwargs: client_factory(service_name))
+    athena_query.boto3 = knowledge_base_retrieve.boto3 = boto3_stand_in
+    athena_query._client = None
+    if poll_interval is not None:
+        athena_query.POLL_INTERVAL_SECONDS = poll_interval
+    return router
+
+
+def install_fakes(model_latency=0.0, athena_latency=0.0, memory_latency=0.0, poll_interval=0.01, memory=None):
+    """Run the request path on the stand-ins above and return them; memory replaces InMemoryMemoryClient"""
+    memory = InMemoryMemoryClient(memory_latency) if memory is None else memory
+    athena = SQLiteAthena(athena_latency)
+    models = {}
+    router = wire(lambda model_id: models.setdefault(model_id, ScriptedModel(model_latency, model_id=model_id)),
+                  lambda service_name: athena, memory, poll_interval=poll_interval)
+    return types.SimpleNamespace(memory=memory, athena=athena, router=router, models=models)
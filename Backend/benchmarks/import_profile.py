@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Import-time Profile
+Summarizes Python's `-X importtime` output: the slowest imports by cumulative and self time, and the
+module that pulls each one in. Profile a container start by setting PYTHONPROFILEIMPORTTIME=1 and passing
+its stderr, or let bench_cold_start --profile run a fresh interpreter.
+Run with: python -m Backend.benchmarks.import_profile startup.log --top 15
+"""
+import re
+import sys
+import argparse
+
+LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)\s*$")
+
+
+def parse(lines):
+    """[{"module", "self_us", "cumulative_us", "depth", "parent"}] in the order imports finished"""
+    entries = []
+    pending = []  # (depth, entry) still waiting for the import that contains them
+    for line in lines:
+        match = LINE.match(line.rstrip("\n"))
+        if not match:
+            continue
+        self_us, cumulative_us, indent, module = match.groups()
+        entry = {"module": module, "self_us": int(self_us), "cumulative_us": int(cumulative_us),
+                 "depth": (len(indent) - 1) // 2, "parent": None}
+        # Nested imports are printed before their parent, one indent level deeper
+        children = [child for depth, child in pending if depth > entry["depth"]]
+        pending = [(depth, child) for depth, child in pending if depth <= entry["depth"]]
+        for child in children:
+            child["parent"] = entry
+        pending.append((entry["depth"], entry))
+        entries.append(entry)
+    return entries
+
+
+def ancestors(entry):
+    while entry["parent"] is not None:
+        entry = entry["parent"]
+        yield entry["module"]
+
+
+def describe(entry):
+    parent = entry["parent"]
+    return f"{entry['module']}  (via {parent['module']})" if parent else entry["module"]
+
+
+def report(entries, top=15, root=None):
+    """Print the slowest imports; returns the cumulative microseconds of root (or of all top-level imports)"""
+    if root:
+        entries = [e for e in entries if e["module"] == root or root in ancestors(e)]
+    top_level = [e for e in entries if e["depth"] == 0 or (root and e["module"] == root)]
+    total_us = sum(e["cumulative_us"] for e in top_level)
+    print(f"\n{'import ' + root if root else 'all imports'}: {total_us / 1000:.1f} ms over {len(entries)} modules")
+
+    print(f"\nSlowest by cumulative time (top {top}):")
+    for e in sorted(entries, key=lambda e: e["cumulative_us"], reverse=True)[:top]:
+        print(f"  {e['cumulative_us'] / 1000:8.1f} ms  {describe(e)}")
+
+    print(f"\nSlowest by self time (top {top}):")
+    for e in sorted(entries, key=lambda e: e["self_us"], reverse=True)[:top]:
+        print(f"  {e['self_us'] / 1000:8.1f} ms  {describe(e)}")
+    return total_us
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("log", nargs="?", help="-X importtime output (default: stdin)")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--root", help="only count imports under this module, e.g. Backend.main")
+    args = parser.parse_args()
+    with (open(args.log) if args.log else sys.stdin) as f:
+        report(parse(f), args.top, args.root)
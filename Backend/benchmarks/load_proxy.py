@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Proxy Load Test
+Drives /query and /users on the Flask proxy (Agent_Trigger) at a fixed concurrency (closed loop) or
+a fixed arrival rate (open loop; latency then includes time spent waiting for a free client). The
+proxy runs in a child process on werkzeug's threaded server with local stand-ins for AgentCore and
+Athena, so the numbers cover our own connection handling, parsing and serialization. Reports
+throughput, latency percentiles, error rates and the server's CPU and memory; exits non-zero when
+slower than a saved baseline.
+Run with: python -m Backend.benchmarks.load_proxy --concurrency 16 --duration 20 --save-baseline load.json
+          python -m Backend.benchmarks.load_proxy --rate 40 --duration 20 --baseline load.json
+"""
+import io
+import os
+import sys
+import json
+import time
+import queue
+import random
+import socket
+import argparse
+import threading
+import subprocess
+import http.client
+from types import SimpleNamespace
+
+from Backend.benchmarks.stats import load_baseline, regressions, report_regressions, save_baseline, summarize
+
+ENDPOINTS = ("query", "users")
+SESSION_ID = "load-test-session-000000000000001"
+SERVER_START_TIMEOUT = 30
+
+
+class StubAgentCore:
+    """bedrock-agentcore client answering invoke_agent_runtime with a canned chart response"""
+
+    def __init__(self, latency=0.0, points=30):
+        self.latency = latency
+        response = {
+            "type": "bar",
+            "data": [{"label": f"Agent {i:03d}", "value": str(1000 + i * 37)} for i in range(points)],
+            "explanation": "Premium by agent for the current year. " * 5,
+            "customer_specific": "False",
+            "query_executed": "SELECT agent_name, SUM(premium) FROM insurance_policies GROUP BY agent_name",
+        }
+        self.body = json.dumps(response).encode("utf-8")
+        self.events = [json.dumps(event).encode("utf-8") for event in (
+            {"event": "progress", "stage": "started"},
+            {"event": "progress", "stage": "tool_call", "tool": "athena_query"},
+            {"event": "explanation", "text": response["explanation"]},
+            {"event": "data", "response": response},
+        )]
+
+    def invoke_agent_runtime(self, payload, **kwargs):
+        time.sleep(self.latency)
+        if json.loads(payload).get("stream"):
+            lines = [b"data: " + event for event in self.events]
+            return {"contentType": "text/event-stream",
+                    "response": SimpleNamespace(iter_lines=lambda chunk_size: iter(lines))}
+        return {"contentType": "application/json", "response": io.BytesIO(self.body)}
+
+
+def serve(port, agent_latency, athena_latency, points):
+    """Child process: the proxy app with stand-ins, on werkzeug's threaded HTTP/1.1 server"""
+    import logging
+    from werkzeug.serving import WSGIRequestHandler, make_server
+    from Backend import Agent_Trigger as trigger
+    from Backend.benchmarks.fakes import SQLiteAthena
+
+    clients = {"bedrock-agentcore": StubAgentCore(agent_latency, points), "athena": SQLiteAthena(athena_latency)}
+    trigger.boto3 = SimpleNamespace(client=lambda service_name, **kwargs: clients[service_name])
+    trigger._clients.clear()
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+
+    WSGIRequestHandler.protocol_version = "HTTP/1.1"
+    make_server("127.0.0.1", port, trigger.app, threaded=True).serve_forever()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port, args):
+    command = [sys.executable, "-m", "Backend.benchmarks.load_proxy", "serve", "--port", str(port),
+               "--agent-latency", str(args.agent_latency), "--athena-latency", str(args.athena_latency),
+               "--points", str(args.points)]
+    env = {**os.environ, "LOG_LEVEL": "WARNING"}
+    server = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL)
+    deadline = time.time() + SERVER_START_TIMEOUT
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return server
+        except OSError:
+            if server.poll() is not None:
+                raise RuntimeError("Proxy server exited during startup")
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("Proxy server did not start listening")
+
+
+def process_usage(pid):
+    """CPU seconds, current and peak RSS in MiB and thread count from /proc (Linux only)"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open(f"/proc/{pid}/status") as f:
+            status = dict(line.split(":", 1) for line in f if ":" in line)
+    except OSError:
+        return None
+    ticks = os.sysconf("SC_CLK_TCK")
+    return {
+        "cpu_seconds": (int(fields[11]) + int(fields[12])) / ticks,
+        "rss_mib": int(status["VmRSS"].split()[0]) / 1024,
+        "peak_rss_mib": int(status["VmHWM"].split()[0]) / 1024,
+        "threads": int(status["Threads"]),
+    }
+
+
+class LoadClient:
+    """One keep-alive connection issuing /query and /users requests in the configured mix"""
+
+    def __init__(self, port, mix, stream_fraction, seed):
+        self.port = port
+        self.mix = mix
+        self.stream_fraction = stream_fraction
+        self.rng = random.Random(seed)
+        self.connection = None
+
+    def request(self):
+        endpoint = self.rng.choices(ENDPOINTS, weights=[self.mix[name] for name in ENDPOINTS])[0]
+        if endpoint == "query":
+            body = {"user_id": "load.user", "session_id": SESSION_ID, "user_query": "Show premium by agent",
+                    "stream": self.rng.random() < self.stream_fraction}
+        else:
+            body = {"user_id": "kamaljeet.singh"}
+        headers = {"Content-Type": "application/json", "Accept-Encoding": "gzip, br"}
+        try:
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=60)
+            self.connection.request("POST", f"/{endpoint}", json.dumps(body), headers)
+            response = self.connection.getresponse()
+            size = len(response.read())
+            if response.getheader("Connection", "").lower() == "close":
+                self.close()
+            error = f"http_{response.status}" if response.status >= 400 else None
+        except (OSError, http.client.HTTPException) as e:
+            self.close()
+            size, error = 0, type(e).__name__
+        return endpoint, size, error
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+def run_load(port, args):
+    """Returns [(endpoint, latency_ms, bytes, error)] for requests finished within the measured window"""
+    results, lock = [], threading.Lock()
+    stop = time.perf_counter() + args.duration
+    jobs = queue.Queue()
+
+    def worker(index):
+        client = LoadClient(port, args.mix, args.stream_fraction, seed=index)
+        while True:
+            if args.rate:
+                scheduled = jobs.get()
+                if scheduled is None:
+                    break
+            else:
+                scheduled = time.perf_counter()
+                if scheduled >= stop:
+                    break
+            endpoint, size, error = client.request()
+            with lock:
+                results.append((endpoint, (time.perf_counter() - scheduled) * 1000, size, error))
+        client.close()
+
+    workers = [threading.Thread(target=worker, args=(index,), daemon=True) for index in range(args.concurrency)]
+    for thread in workers:
+        thread.start()
+
+    if args.rate:
+        # Open loop: arrivals follow the schedule whether or not earlier requests have finished
+        rng = random.Random(0)
+        next_arrival = time.perf_counter()
+        while next_arrival < stop:
+            time.sleep(max(0.0, next_arrival - time.perf_counter()))
+            jobs.put(next_arrival)
+            next_arrival += rng.expovariate(args.rate) if args.poisson else 1 / args.rate
+        for _ in workers:
+            jobs.put(None)
+    for thread in workers:
+        thread.join()
+    return results
+
+
+def report(results, elapsed, usage_before, usage_after):
+    latencies, errors, sizes = {}, {}, {}
+    for endpoint, latency, size, error in results:
+        latencies.setdefault(endpoint, []).append(latency)
+        sizes[endpoint] = sizes.get(endpoint, 0) + size
+        if error:
+            errors.setdefault(endpoint, {}).setdefault(error, 0)
+            errors[endpoint][error] += 1
+    summary = summarize(latencies)
+
+    print(f"{'endpoint':<10}{'requests':>10}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+          f"{'errors':>8}{'KiB/req':>9}")
+    for endpoint, stats in summary.items():
+        failed = sum(errors.get(endpoint, {}).values())
+        print(f"/{endpoint:<9}{stats['count']:>10}{stats['count'] / elapsed:>9.1f}{stats['p50']:>10.2f}"
+              f"{stats['p95']:>10.2f}{stats['p99']:>10.2f}{failed:>8}{sizes[endpoint] / stats['count'] / 1024:>9.1f}")
+    for endpoint, counts in errors.items():
+        print(f"   /{endpoint} errors: {counts}")
+
+    throughput = len(results) / elapsed
+    error_rate = sum(1 for result in results if result[3]) / max(1, len(results))
+    print(f"\nthroughput {throughput:.1f} req/s, error rate {error_rate:.2%}")
+    server = None
+    if usage_before and usage_after:
+        server = {
+            "cpu_percent": round((usage_after["cpu_seconds"] - usage_before["cpu_seconds"]) / elapsed * 100, 1),
+            "cpu_ms_per_request": round((usage_after["cpu_seconds"] - usage_before["cpu_seconds"])
+                                        / max(1, len(results)) * 1000, 3),
+            "peak_rss_mib": round(usage_after["peak_rss_mib"], 1),
+            "threads": usage_after["threads"],
+        }
+        print(f"server: {server['cpu_percent']}% CPU, {server['cpu_ms_per_request']} ms CPU/request, "
+              f"peak RSS {server['peak_rss_mib']} MiB, {server['threads']} threads")
+    return {"endpoints": summary, "throughput": round(throughput, 2), "error_rate": round(error_rate, 4),
+            "server": server}
+
+
+def load_regressions(current, baseline, tolerance, slack_ms):
+    found = regressions(current["endpoints"], baseline["endpoints"], tolerance, slack_ms)
+    if current["throughput"] < baseline["throughput"] / (1 + tolerance):
+        found.append(f"throughput: {baseline['throughput']} -> {current['throughput']} req/s")
+    if current["error_rate"] > baseline["error_rate"]:
+        found.append(f"error rate: {baseline['error_rate']:.2%} -> {current['error_rate']:.2%}")
+    before, after = baseline.get("server"), current.get("server")
+    if before and after and after["cpu_ms_per_request"] > before["cpu_ms_per_request"] * (1 + tolerance):
+        found.append(f"server CPU: {before['cpu_ms_per_request']} -> {after['cpu_ms_per_request']} ms/request")
+    return found
+
+
+def parse_mix(value):
+    mix = {name: 0.0 for name in ENDPOINTS}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        mix[name.strip()] = float(weight)
+    return mix
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", nargs="?", choices=["run", "serve"], default="run")
+    parser.add_argument("--port", type=int)
+    parser.add_argument("--concurrency", type=int, default=8, help="client connections (max requests in flight)")
+    parser.add_argument("--rate", type=float, help="open loop: requests per second (default: closed loop)")
+    parser.add_argument("--poisson", action="store_true", help="exponential inter-arrival times with --rate")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of measured load")
+    parser.add_argument("--warmup", type=float, default=2.0, help="seconds of unmeasured load first")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("query=0.8,users=0.2"))
+    parser.add_argument("--stream-fraction", type=float, default=0.5, help="share of /query requests that stream")
+    parser.add_argument("--agent-latency", type=float, default=0.0, help="seconds per AgentCore invocation")
+    parser.add_argument("--athena-latency", type=float, default=0.0, help="seconds per Athena query")
+    parser.add_argument("--points", type=int, default=30, help="data points in the agent response")
+    parser.add_argument("--baseline", help="fail if slower than this saved run")
+    parser.add_argument("--save-baseline", help="write this run's results here")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown")
+    parser.add_argument("--slack-ms", type=float, default=2.0, help="allowed absolute slowdown")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        serve(args.port, args.agent_latency, args.athena_latency, args.points)
+        sys.exit(0)
+
+    port = args.port or free_port()
+    server = start_server(port, args)
+    try:
+        mode = f"{args.rate:g} req/s open loop" if args.rate else "closed loop"
+        print(f"{args.concurrency} connections, {mode}, {args.duration:g}s, mix {args.mix}, "
+              f"stream {args.stream_fraction:.0%}, agent {args.agent_latency}s, athena {args.athena_latency}s")
+        run_load(port, SimpleNamespace(**{**vars(args), "duration": args.warmup}))
+        usage_before = process_usage(server.pid)
+        start = time.perf_counter()
+        results = run_load(port, args)
+        elapsed = time.perf_counter() - start
+        current = report(results, elapsed, usage_before, process_usage(server.pid))
+    finally:
+        server.terminate()
+        server.wait()
+
+    config = {key: getattr(args, key) for key in ("concurrency", "rate", "poisson", "duration", "mix",
+                                                   "stream_fraction", "agent_latency", "athena_latency", "points")}
+    if args.save_baseline:
+        save_baseline(args.save_baseline, config, current)
+    if args.baseline:
+        baseline = load_baseline(args.baseline, config)
+        sys.exit(report_regressions(load_regressions(current, baseline, args.tolerance, args.slack_ms)))
@@ -0,0 +1,60 @@
+"""
+Benchmark Statistics
+Percentile summaries and baseline files shared by the benchmarks that gate on regressions.
+"""
+import json
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(sorted_values, pct):
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(durations):
+    """{name: {"count", "p50", "p95", "p99"}} from {name: [milliseconds]}"""
+    summary = {}
+    for name, values in sorted(durations.items()):
+        values = sorted(values)
+        summary[name] = {"count": len(values), **{f"p{pct}": round(percentile(values, pct), 3) for pct in PERCENTILES}}
+    return summary
+
+
+def regressions(summary, baseline, tolerance, slack_ms):
+    """Entries whose p50 or p95 grew past baseline * (1 + tolerance) + slack_ms"""
+    found = []
+    for name, before in baseline.items():
+        after = summary.get(name)
+        if after is None:
+            continue
+        for key in ("p50", "p95"):
+            limit = before[key] * (1 + tolerance) + slack_ms
+            if after[key] > limit:
+                found.append(f"{name} {key}: {before[key]:.3f} ms -> {after[key]:.3f} ms (limit {limit:.3f} ms)")
+    return found
+
+
+def save_baseline(path, config, results):
+    with open(path, "w") as f:
+        json.dump({"config": config, **results}, f, indent=2)
+    print(f"\nBaseline saved to {path}")
+
+
+def load_baseline(path, config):
+    with open(path) as f:
+        baseline = json.load(f)
+    if baseline.get("config") != config:
+        print(f"\n⚠️ Baseline was recorded with {baseline.get('config')}; comparing anyway")
+    return baseline
+
+
+def report_regressions(found):
+    """Print the outcome; returns the process exit code"""
+    if found:
+        print("\n❌ Regressions against baseline:")
+        for line in found:
+            print(f"   {line}")
+        return 1
+    print("\n✅ No regressions against baseline")
+    return 0
@@ -1,8 +1,161 @@
+"""
+Logging Setup
+Request threads only enqueue log records; a QueueListener thread formats them as JSON lines and
+writes them out. Messages use %-style arguments so they are only rendered on the listener thread,
+payload fields passed through `extra` are size-capped, and chatty categories can be sampled.
+
+Usage:
+    logger.info("🔍 Athena query on %s", database, extra={"category": "sql", "sql": sql})
+
+Arguments and extra values are rendered after the call returns, so don't log objects that are
+mutated afterwards (log a copy or a summary instead).
+"""
+import os
+import sys
+import queue
+import atexit
+import random
 import logging
+import logging.handlers
+
+from Backend.utils.encoding import dumps_str
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Longest string kept for a message or an extra field; the rest is replaced by a marker
+MAX_FIELD_CHARS = int(os.getenv("LOG_MAX_FIELD_CHARS", "2000"))
+# Fraction of INFO/DEBUG records kept per category, e.g. "payload=0.1,sample_row=0.05"
+DEFAULT_SAMPLE_RATES = {"payload": 0.1, "sample_row": 0.1}
+
+# Attributes every LogRecord has; anything else came in through `extra`
+RESERVED_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+# Loggers raised to LOG_LEVEL; "__main__" covers entrypoints run with python -m
+APP_LOGGERS = ("Backend", "__main__")
+
+_listener = None
+_queue_handler = None
+
+
+def parse_sample_rates(value):
+    rates = dict(DEFAULT_SAMPLE_RATES)
+    for item in (value or "").split(","):
+        category, _, rate = item.partition("=")
+        try:
+            rates[category.strip()] = min(1.0, max(0.0, float(rate)))
+        except ValueError:
+            continue
+    return rates
+
+
+def cap(value, limit=MAX_FIELD_CHARS):
+    """Keep short scalars as they are; encode anything else and truncate it to limit characters"""
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if not isinstance(value, str):
+        try:
+            value = dumps_str(value)
+        except TypeError:
+            value = repr(value)
+    if len(value) > limit:
+        return f"{value[:limit]}…[+{len(value) - limit} chars]"
+    return value
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, category and capped extra fields"""
+
+    def format(self, record):
+        entry = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": cap(record.getMessage()),
+        }
+        for key, value in vars(record).items():
+            if key not in RESERVED_ATTRS:
+                entry[key] = cap(value)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = cap(record.exc_text, MAX_FIELD_CHARS * 4)
+        return dumps_str(entry)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a fraction of INFO/DEBUG records per category; warnings and errors always pass"""
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rates.get(getattr(record, "category", None), 1.0)
+        return rate >= 1.0 or random.random() < rate
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Enqueue records without rendering them. A full queue drops the record instead of blocking
+    the request thread.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Tracebacks must be captured now; the message itself is rendered by the listener
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _QueueListener(logging.handlers.QueueListener):
+    def enqueue_sentinel(self):
+        # Wait for room rather than failing to stop when the queue is full
+        self.queue.put(self._sentinel, timeout=5)
+
+
+def configure_logging(level=LOG_LEVEL, stream=None, sample_rates=None):
+    """
+    Route Backend logs through the background writer. Safe to call more than once; the first call wins.
+    Returns the queue handler (its `dropped` counter shows records lost to a full queue).
+    """
+    global _listener, _queue_handler
+    if _listener is not None:
+        return _queue_handler
+
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(sample_rates or parse_sample_rates(os.getenv("LOG_SAMPLE_RATES"))))
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter())
+    _listener = _QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+    logging.getLogger().addHandler(queue_handler)
+    for name in APP_LOGGERS:
+        logging.getLogger(name).setLevel(level)
+    _queue_handler = queue_handler
+    return queue_handler
+
 
-logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
-handler = logging.StreamHandler()
-formatter = logging.Formatter('%(asctime)s | %(levelname)s | %(name)s | %(message)s')
-handler.setFormatter(formatter)
-logger.addHandler(handler)
+def stop_logging():
+    """Flush queued records and stop the writer thread"""
+    global _listener, _queue_handler
+    if _listener is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _listener.stop()
+        _listener, _queue_handler = None, None
@@ -0,0 +1,93 @@
+"""
+Tracing
+Spans for each stage of a chat request. Spans go to whatever tracer provider `opentelemetry-instrument`
+configured; without OpenTelemetry installed every helper is a no-op. Trace context crosses from the
+Flask proxy to the AgentCore runtime in the payload under TRACE_CONTEXT_KEY.
+"""
+import logging
+from contextlib import contextmanager
+
+try:
+    from opentelemetry import context as otel_context, propagate, trace
+    from opentelemetry.trace import SpanKind, Status, StatusCode
+except ImportError:
+    trace = None
+
+logger = logging.getLogger(__name__)
+
+TRACER_NAME = "sentra"
+TRACE_CONTEXT_KEY = "trace_context"
+
+
+class _NoopSpan:
+    def set_attribute(self, key, value):
+        pass
+
+    def set_attributes(self, attributes):
+        pass
+
+    def record_exception(self, exception):
+        pass
+
+    def set_status(self, status):
+        pass
+
+    def end(self):
+        pass
+
+
+def _clean(attributes):
+    """OpenTelemetry attributes can't be None"""
+    return {key: value for key, value in attributes.items() if value is not None}
+
+
+@contextmanager
+def span(name, kind=None, **attributes):
+    """Start a span as the current span; exceptions are recorded on it and re-raised"""
+    if trace is None:
+        yield _NoopSpan()
+        return
+    tracer = trace.get_tracer(TRACER_NAME)
+    with tracer.start_as_current_span(name, kind=kind or SpanKind.INTERNAL, attributes=_clean(attributes)) as current:
+        yield current
+
+
+def start_span(name, **attributes):
+    """Start a span that is not made current, for stages that begin and end in different callbacks"""
+    if trace is None:
+        return _NoopSpan()
+    return trace.get_tracer(TRACER_NAME).start_span(name, attributes=_clean(attributes))
+
+
+def set_attributes(current, **attributes):
+    current.set_attributes(_clean(attributes))
+
+
+def mark_error(current, message):
+    """Flag a span as failed without an exception (e.g. a tool returning an error string)"""
+    if trace is not None:
+        current.set_status(Status(StatusCode.ERROR, message))
+
+
+def inject_context(payload):
+    """Add the current trace context to an outgoing AgentCore payload"""
+    if trace is not None:
+        carrier = {}
+        propagate.inject(carrier)
+        if carrier:
+            payload[TRACE_CONTEXT_KEY] = carrier
+    return payload
+
+
+@contextmanager
+def extracted_context(payload):
+    """Make the trace context carried in an incoming payload the parent of spans started inside"""
+    carrier = payload.get(TRACE_CONTEXT_KEY) if isinstance(payload, dict) else None
+    if trace is None or not carrier:
+        yield
+        return
+    token = otel_context.attach(propagate.extract(carrier))
+    try:
+        yield
+    finally:
+        otel_context.detach(token)
@@ -1,16 +1,56 @@
 from bedrock_agentcore.runtime import BedrockAgentCoreApp
-from Backend.agent.sql_agent import SQLQueryExecutor
+from Backend.agent.result_store import result_store
+from Backend.utils.encoding import dumps_str
+from Backend.config.logger import configure_logging
+from Backend.config.tracing import extracted_context, span
+from Backend.metrics.query_history import ORDER_COLUMNS, query_history
+from Backend.agent.warmup import warm_up
+from Backend.agent.executor_cache import executor_cache
+from Backend.memory.memory_writer import memory_writer
+from Backend.memory.turn_cache import TURNS_KEPT, turn_cache
+from Backend.memory import memory_records, memory_setup
 import logging
 import json
+import os
+import threading
 
+configure_logging()
 logger = logging.getLogger(__name__)
 
-app = BedrockAgentCoreApp()
+# Query shapes and costs across all users; only served when the deployment opts in
+QUERY_STATS_ENABLED = os.getenv("QUERY_STATS_ENABLED", "false").lower() == "true"
+
+
+class FastJSONApp(BedrockAgentCoreApp):
+    """AgentCore app that serializes responses and stream events with the shared fast encoder"""
+
+    def _safe_serialize_to_json_string(self, obj):
+        try:
+            return dumps_str(obj)
+        except TypeError:
+            # Unknown types: let AgentCore's progressive fallbacks handle them
+            return super()._safe_serialize_to_json_string(obj)
+
+
+app = FastJSONApp()
 
 @app.entrypoint
 def main(payload, context = None):
+    # Continue the trace started by the Flask proxy
+    with extracted_context(payload), span("agent.request", **{
+        "session.id": payload.get("session_id"),
+        "agent.stream": bool(payload.get("stream")),
+        "agent.action": payload.get("action"),
+    }):
+        return handle(payload)
+
+def handle(payload):
     logger.info("🚀 Entrypoint triggered for Bedrock Agent Core App.")
-    logger.info(f"📩 Incoming payload: {payload}")
+    logger.info("📩 Incoming payload", extra={"category": "payload", "payload": dict(payload)})
+
+    # Sent by deploy scripts before traffic arrives; not tied to a user or session
+    if payload.get("action") == "warm_up":
+        return run_warm_up(payload)
     
     # Extract and validate user_id
     user_id = payload.get("user_id")
@@ -41,24 +81,151 @@ def main(payload, context = None):
     # Replace periods and other invalid characters with underscores
     actor_id = user_id.replace('.', '_').replace('@', '_at_').replace(' ', '_')
     
-    logger.info(f"✅ Validated identifiers - user_id: {user_id}, actor_id: {actor_id}, session_id: {session_id}")
+    logger.info("✅ Validated identifiers - user_id: %s, actor_id: %s, session_id: %s", user_id, actor_id, session_id)
     
-    # Initialize SQLQueryExecutor with dynamic identifiers
-    generator = SQLQueryExecutor(actor_id=actor_id, session_id=session_id)
+    # Paged fetch of the full data behind a downsampled chart; no agent needed
+    if payload.get("action") == "fetch_data":
+        return fetch_data_page(actor_id, session_id, payload)
+
+    if payload.get("action") == "query_stats":
+        return query_stats(payload)
+
+    if payload.get("action") == "memory_stats":
+        return memory_stats()
+
+    # Deferred so the server can start before strands and boto3 load (see warm_up)
+    from Backend.agent.sql_agent import SQLQueryExecutor
+
+    # A follow-up question reuses the session's agent; otherwise a new one loads the history from memory
+    generator = executor_cache.checkout(actor_id, session_id)
+    if generator is None:
+        generator = SQLQueryExecutor(actor_id=actor_id, session_id=session_id)
+
+    # Streaming mode: returning an async generator makes AgentCore respond with server-sent events
+    if payload.get("stream"):
+        logger.info("📡 Streaming mode requested.")
+        return stream_events(generator, payload.get("user_query", ""), user_id,
+                             payload.get("deadline"), payload.get("budget"), trace_payload=payload)
+
     try:
         
-        result = generator.execute_sql(payload.get("user_query", ""), user_id)
+        result = generator.execute_sql(payload.get("user_query", ""), user_id,
+                                       deadline=payload.get("deadline"), budget_limits=payload.get("budget"))
         logger.info("✅ SQL execution completed successfully.")
+        executor_cache.checkin(generator)
         return result
     except Exception as e:
         logger.error("❌ Entrypoint execution failed!", exc_info=True)
+        executor_cache.discard(generator)
+        return {
+                    "type": "text",
+                    "data": "",
+                    "explanation": f"Something went wrong while executing the query. Check the logs for more details. Error: {str(e)}",
+                    "customer_specific": "False",
+                    "query_executed": ""
+                }
+
+def fetch_data_page(actor_id, session_id, payload):
+    try:
+        page = result_store.page(session_id, payload.get("result_id"), payload.get("offset"), payload.get("limit"))
+        if page is None and rehydrate_result(actor_id, session_id, payload.get("result_id")) is not None:
+            page = result_store.page(session_id, payload.get("result_id"), payload.get("offset"), payload.get("limit"))
+    except (TypeError, ValueError):
+        return {"error": "invalid_page", "message": "offset and limit must be integers"}
+    if page is None:
+        logger.warning("⚠️ Result %s not available for session %s", payload.get("result_id"), session_id)
         return {
+            "error": "result_not_found",
+            "message": "This result is no longer available. Please run the query again."
+        }
+    logger.info("📄 Returning %d of %d rows from result %s", len(page["data"]), page["total"], page["result_id"])
+    return page
+
+def rehydrate_result(actor_id, session_id, result_id):
+    """Rows of a result this instance no longer holds, re-run from the memory record that points to it"""
+    from Backend.tools.athena_query import execute_query, get_athena_client
+
+    def run_query(sql, database):
+        result = execute_query(get_athena_client(), sql, database)
+        return None if isinstance(result, str) else result[0]
+
+    try:
+        turns = turn_cache.get(actor_id, session_id)
+        if turns is None:
+            turns = memory_setup.get_backend().get_last_k_turns(memory_id=memory_setup.get_memory_id(),
+                                                                actor_id=actor_id, session_id=session_id,
+                                                                k=TURNS_KEPT)
+        record = memory_records.find(turns, result_id)
+        return memory_records.rehydrate(session_id, record, run_query) if record else None
+    except Exception:
+        logger.warning("⚠️ Could not rehydrate result %s", result_id, exc_info=True)
+        return None
+
+def query_stats(payload):
+    if not QUERY_STATS_ENABLED:
+        return {"error": "not_enabled", "message": "Query statistics are disabled on this runtime."}
+    order_by = payload.get("order_by", "cost")
+    if order_by not in ORDER_COLUMNS:
+        return {"error": "invalid_order", "message": f"order_by must be one of {sorted(ORDER_COLUMNS)}"}
+    try:
+        limit = min(100, max(1, int(payload.get("limit") or 10)))
+        since = float(payload.get("since") or 0)
+    except (TypeError, ValueError):
+        return {"error": "invalid_limit", "message": "limit and since must be numbers"}
+    return {"fingerprints": query_history.snapshot(), "top": query_history.top(order_by, limit, since),
+            "writer": query_history.writer_snapshot()}
+
+def memory_stats():
+    # Aggregates only, so any caller may see them
+    return {"turn_cache": turn_cache.snapshot(), "writer": memory_writer.snapshot(),
+            "executor_cache": executor_cache.snapshot()}
+
+def run_warm_up(payload):
+    queries = payload.get("queries")
+    if queries is not None and not (isinstance(queries, list) and all(isinstance(q, str) for q in queries)):
+        return {"error": "invalid_queries", "message": "queries must be a list of questions"}
+    try:
+        return {"warmed": True, "timings_ms": warm_up(queries)}
+    except Exception as e:
+        logger.error("❌ Warm-up failed", exc_info=True)
+        return {"warmed": False, "error": "warm_up_failed", "message": str(e)}
+
+def start_warm_up():
+    """Run warm_up() on a daemon thread while the server starts accepting connections"""
+    def run():
+        try:
+            warm_up()
+        except Exception:
+            # Whatever failed is retried, and reported, by the first request
+            logger.warning("⚠️ Warm-up failed", exc_info=True)
+
+    thread = threading.Thread(target=run, name="warm-up", daemon=True)
+    thread.start()
+    return thread
+
+async def stream_events(generator, user_query, user_id, deadline=None, budget_limits=None, trace_payload=None):
+    try:
+        # The stream outlives main(), so it gets its own span under the proxy's trace
+        with extracted_context(trace_payload), span("agent.stream", **{"session.id": generator.session_id}):
+            async for event in generator.stream_sql(user_query, user_id, deadline=deadline, budget_limits=budget_limits):
+                yield event
+        logger.info("✅ SQL streaming completed successfully.")
+        executor_cache.checkin(generator)
+    except Exception as e:
+        logger.error("❌ Streaming entrypoint execution failed!", exc_info=True)
+        executor_cache.discard(generator)
+        yield {
+                "event": "error",
+                "response": {
                     "type": "text",
                     "data": "",
                     "explanation": f"Something went wrong while executing the query. Check the logs for more details. Error: {str(e)}",
                     "customer_specific": "False",
                     "query_executed": ""
                 }
+            }
 
 if __name__ == "__main__":
+    # Load the agent and look up the memory resource while the server starts, not on the first request
+    start_warm_up()
     app.run()
\ No newline at end of file
@@ -0,0 +1,129 @@
+"""
+Conversation Context
+Turns loaded from memory become conversation messages under a token budget, leaving the system prompt
+static so its prefix stays cacheable. The newest turns are kept verbatim, older ones are replaced by
+one-line summaries, and `data` arrays are removed from assistant answers since the model never needs
+the rows again, only what they were. Compact memory records are expanded back into answer JSON first.
+"""
+import os
+import json
+import logging
+from functools import lru_cache
+from Backend.memory.memory_records import expand
+
+logger = logging.getLogger(__name__)
+
+# Rough budget for the history added to every model call; ~4 characters per token
+CONTEXT_TOKEN_BUDGET = int(os.getenv("MEMORY_CONTEXT_TOKENS", "1500"))
+VERBATIM_TURNS = int(os.getenv("MEMORY_VERBATIM_TURNS", "2"))
+CHARS_PER_TOKEN = 4
+SUMMARY_CHARS = 200
+SUMMARY_SQL_CHARS = 300
+
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _split_json(text):
+    """(prefix, dict, suffix) around the JSON object in an assistant reply, or None"""
+    start, end = text.find("{"), text.rfind("}")
+    if start < 0 or end < start:
+        return None
+    try:
+        response = json.loads(text[start:end + 1])
+    except ValueError:
+        return None
+    return (text[:start], response, text[end + 1:]) if isinstance(response, dict) else None
+
+
+@lru_cache(maxsize=4096)
+def strip_data(text):
+    """An assistant reply without its `data` array; the row count stays so the model knows what was shown"""
+    parts = _split_json(text)
+    if parts is None or not isinstance(parts[1].get("data"), list):
+        return text
+    prefix, response, suffix = parts
+    response = {**response, "data": f"[{len(response['data'])} rows omitted]"}
+    return f"{prefix}{json.dumps(response, ensure_ascii=False, default=str)}{suffix}"
+
+
+@lru_cache(maxsize=4096)
+def summarize(role, text):
+    """A one-line stand-in for an older message: the question, or the answer's type, size, explanation and SQL"""
+    if role.upper() != "ASSISTANT":
+        return _clip(text, SUMMARY_CHARS)
+    parts = _split_json(text)
+    if parts is None:
+        return _clip(text, SUMMARY_CHARS)
+    response = parts[1]
+    data = response.get("data")
+    size = f", {len(data)} rows" if isinstance(data, list) else ""
+    summary = f"[{response.get('type', 'text')} answer{size}] {_clip(str(response.get('explanation', '')), SUMMARY_CHARS)}"
+    if response.get("query_executed"):
+        summary += f" SQL: {_clip(str(response['query_executed']), SUMMARY_SQL_CHARS)}"
+    return summary
+
+
+def _clip(text, limit):
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
+
+def build_history(recent_turns, budget_tokens=CONTEXT_TOKEN_BUDGET, verbatim_turns=VERBATIM_TURNS):
+    """
+    Strands messages for get_last_k_turns output (newest turn first), oldest first. Turns are taken
+    newest to oldest until the budget runs out; a verbatim turn that doesn't fit falls back to its summary.
+    """
+    kept = []  # newest first
+    remaining = budget_tokens
+    for index, turn in enumerate(recent_turns or []):
+        messages = [(m["role"].upper(), expand(m["content"]["text"])) for m in turn if m.get("content", {}).get("text")]
+        if index < verbatim_turns:
+            verbatim = [(role, strip_data(text) if role == "ASSISTANT" else text) for role, text in messages]
+            cost = sum(estimate_tokens(text) for _, text in verbatim)
+            if cost <= remaining:
+                kept.append(verbatim)
+                remaining -= cost
+                continue
+        summary = [(role, summarize(role, text)) for role, text in messages]
+        cost = sum(estimate_tokens(text) for _, text in summary)
+        if cost > remaining:
+            break
+        kept.append(summary)
+        remaining -= cost
+
+    history = []
+    for turn in reversed(kept):
+        for role, text in turn:
+            role = "user" if role == "USER" else "assistant"
+            if history and history[-1]["role"] == role:
+                # Converse needs alternating roles, e.g. after a question that was never answered
+                history[-1]["content"][0]["text"] += f"\n{text}"
+            else:
+                history.append({"role": role, "content": [{"text": text}]})
+    # Must start with the user and end with the assistant, before the new question is added
+    while history and history[0]["role"] != "user":
+        history.pop(0)
+    while history and history[-1]["role"] != "assistant":
+        history.pop()
+    logger.debug("🧾 History: %d turns in %d messages, ~%d tokens", len(kept), len(history),
+                 budget_tokens - remaining)
+    return history
+
+
+def turns_from_messages(messages):
+    """An agent's own messages as get_last_k_turns-shaped turns (newest first), without tool calls and results"""
+    turns = []
+    for message in messages:
+        if any("toolUse" in block or "toolResult" in block for block in message["content"]):
+            continue
+        text = "\n".join(block["text"] for block in message["content"] if block.get("text"))
+        if not text:
+            continue
+        entry = {"role": message["role"].upper(), "content": {"text": text}}
+        if entry["role"] == "USER" or not turns:
+            turns.append([entry])
+        else:
+            turns[-1].append(entry)
+    return list(reversed(turns))
@@ -0,0 +1,141 @@
+"""
+Memory Backends
+The short-term memory calls the agent makes — create_event and get_last_k_turns — behind one interface.
+AgentCoreMemoryBackend is AgentCore Memory; SQLiteMemoryBackend keeps events in a local SQLite file in WAL
+mode, for offline tests and benchmarks, and for deployments that want short-term memory next to the agent.
+"""
+import os
+import time
+import logging
+import sqlite3
+import tempfile
+import threading
+from contextlib import nullcontext
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+SQLITE_PATH = os.getenv("MEMORY_SQLITE_PATH", os.path.join(tempfile.gettempdir(), "sentra_memory.db"))
+# Matches event_expiry_days of the AgentCore memory resource (see memory_setup)
+SQLITE_RETENTION_DAYS = float(os.getenv("MEMORY_SQLITE_RETENTION_DAYS", "7"))
+SQLITE_BUSY_TIMEOUT_MS = 5000
+
+
+class MemoryBackend:
+    """
+    Events are lists of (text, role) messages. Turns come back as get_last_k_turns returns them: newest
+    turn first, each a user message and the replies after it as {"role": "USER", "content": {"text"}}.
+    """
+
+    def create_event(self, memory_id, actor_id, session_id, messages, event_timestamp=None):
+        raise NotImplementedError
+
+    def get_last_k_turns(self, memory_id, actor_id, session_id, k=5):
+        raise NotImplementedError
+
+
+class AgentCoreMemoryBackend(MemoryBackend):
+    """AgentCore Memory through bedrock_agentcore's MemoryClient"""
+
+    def __init__(self, region_name, client=None):
+        if client is None:
+            from bedrock_agentcore.memory import MemoryClient
+            client = MemoryClient(region_name=region_name)
+        self.client = client
+
+    def create_event(self, memory_id, actor_id, session_id, messages, event_timestamp=None):
+        return self.client.create_event(memory_id=memory_id, actor_id=actor_id, session_id=session_id,
+                                        messages=messages, event_timestamp=event_timestamp)
+
+    def get_last_k_turns(self, memory_id, actor_id, session_id, k=5):
+        return self.client.get_last_k_turns(memory_id=memory_id, actor_id=actor_id, session_id=session_id, k=k)
+
+
+class SQLiteMemoryBackend(MemoryBackend):
+    """
+    One row per message, indexed on (memory, actor, session, timestamp) so a session's newest turns are
+    an index range scan that stops after k turns. Each thread gets its own connection; WAL lets readers
+    run alongside the writer, also across processes sharing the file. ":memory:" is one shared connection.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS memory_messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            memory_id TEXT NOT NULL,
+            actor_id TEXT NOT NULL,
+            session_id TEXT NOT NULL,
+            event_timestamp REAL NOT NULL,
+            role TEXT NOT NULL,
+            text TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS memory_messages_session
+            ON memory_messages (memory_id, actor_id, session_id, event_timestamp);
+    """
+
+    def __init__(self, path=SQLITE_PATH, retention_days=SQLITE_RETENTION_DAYS):
+        self.path = path
+        self._local = threading.local()
+        self._shared = None
+        self._lock = threading.Lock()  # serializes writers within the process; busy_timeout covers the rest
+        if path == ":memory:":
+            self._shared = sqlite3.connect(path, check_same_thread=False)
+        connection = self._connection()
+        with self._lock, connection:
+            connection.executescript(self.SCHEMA)
+            if retention_days:
+                expired = connection.execute("DELETE FROM memory_messages WHERE event_timestamp < ?",
+                                             (time.time() - retention_days * 86400,)).rowcount
+                if expired:
+                    logger.info("🧹 Removed %d expired memory messages from %s", expired, path)
+
+    def create_event(self, memory_id, actor_id, session_id, messages, event_timestamp=None):
+        if isinstance(event_timestamp, datetime):
+            event_timestamp = event_timestamp.timestamp()
+        timestamp = event_timestamp or time.time()
+        rows = [(memory_id, actor_id, session_id, timestamp, role.upper(), text) for text, role in messages]
+        connection = self._connection()
+        with self._lock, connection:
+            connection.executemany(
+                "INSERT INTO memory_messages (memory_id, actor_id, session_id, event_timestamp, role, text) "
+                "VALUES (?, ?, ?, ?, ?, ?)", rows)
+            last_id = connection.execute("SELECT last_insert_rowid()").fetchone()[0]
+        return {"eventId": f"local-{last_id}", "memoryId": memory_id, "actorId": actor_id,
+                "sessionId": session_id, "eventTimestamp": timestamp}
+
+    def get_last_k_turns(self, memory_id, actor_id, session_id, k=5):
+        connection = self._connection()
+        with self._lock if self._shared is not None else nullcontext():
+            cursor = connection.execute(
+                "SELECT role, text FROM memory_messages WHERE memory_id = ? AND actor_id = ? AND session_id = ? "
+                "ORDER BY event_timestamp DESC, id DESC", (memory_id, actor_id, session_id))
+            # Newest first: a user message closes the turn made of it and the replies read before it
+            turns, current = [], []
+            for role, text in cursor:
+                current.insert(0, {"role": role, "content": {"text": text}})
+                if role == "USER":
+                    turns.append(current)
+                    current = []
+                    if len(turns) == k:
+                        break
+            cursor.close()
+        if current and len(turns) < k:
+            turns.append(current)
+        return turns
+
+    def close(self):
+        connection = getattr(self._local, "connection", None) or self._shared
+        if connection is not None:
+            connection.close()
+
+    def _connection(self):
+        if self._shared is not None:
+            return self._shared
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=SQLITE_BUSY_TIMEOUT_MS / 1000)
+            connection.execute("PRAGMA journal_mode=WAL")
+            # WAL makes NORMAL safe against corruption; a crash can lose only the last commits
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
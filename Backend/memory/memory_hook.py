@@ -1,14 +1,41 @@
+import time
 import logging
+from Backend.config.tracing import set_attributes, span
 from strands.hooks import AgentInitializedEvent, HookProvider, HookRegistry, MessageAddedEvent
-from bedrock_agentcore.memory import MemoryClient
+from Backend.memory.memory_backends import MemoryBackend
+from Backend.memory.memory_writer import memory_writer
+from Backend.memory.turn_cache import TURNS_KEPT, turn_cache
+from Backend.memory.conversation_context import build_history
+from Backend.memory.memory_records import answer_id, compact
 
 logger = logging.getLogger(__name__)
 
+# Longest a request waits for its session's queued writes before reading the history back
+READ_AFTER_WRITE_TIMEOUT_SECONDS = 2.0
+
 
 class MemoryHookProvider(HookProvider):
-    def __init__(self, memory_client: MemoryClient, memory_id: str):
+    def __init__(self, memory_client: MemoryBackend, memory_id: str):
         self.memory_client = memory_client
         self.memory_id = memory_id
+        self._held = None  # messages buffered while an attempt may still be rejected
+        self.result_id = None  # where the last answer's rows were stored; reset per request by the executor
+
+    def hold(self):
+        """Buffer saved messages until commit() or discard(), e.g. while the fast tier's answer is validated"""
+        self._held = []
+
+    def commit(self):
+        """Save the buffered messages; does nothing when none are held"""
+        held, self._held = self._held, None
+        for message in held or []:
+            self._save(*message)
+
+    def discard(self):
+        """Drop the buffered messages of a rejected attempt; later messages are saved right away"""
+        if self._held:
+            logger.info("🗑️ Discarding %d memory messages of a rejected attempt", len(self._held))
+        self._held = None
     
     def on_agent_initialized(self, event: AgentInitializedEvent):
         """Load recent conversation history when agent starts"""
@@ -17,64 +44,88 @@ class MemoryHookProvider(HookProvider):
             actor_id = event.agent.state.get("actor_id")
             session_id = event.agent.state.get("session_id")
             
-            logger.info(f"🔍 Loading memory for actor_id={actor_id}, session_id={session_id}")
+            logger.info("🔍 Loading memory for actor_id=%s, session_id=%s", actor_id, session_id)
             
             if not actor_id or not session_id:
                 logger.warning("Missing actor_id or session_id in agent state")
                 return
             
-            # Load the last 5 conversation turns from memory
-            recent_turns = self.memory_client.get_last_k_turns(
-                memory_id=self.memory_id,
-                actor_id=actor_id,
-                session_id=session_id,
-                k=5
-            )
+            # Load the last few conversation turns, from this process's cache when it has the session
+            with span("memory.load", **{"memory.id": self.memory_id, "session.id": session_id}) as current:
+                recent_turns = turn_cache.get(actor_id, session_id)
+                cache_hit = recent_turns is not None
+                if not cache_hit:
+                    recent_turns = self._load_remote(actor_id, session_id)
+                set_attributes(current, **{"memory.turns": len(recent_turns) if recent_turns else 0,
+                                           "memory.cache_hit": cache_hit})
             
-            logger.info(f"📚 Retrieved {len(recent_turns) if recent_turns else 0} turns from memory")
+            logger.info("📚 Retrieved %d turns from %s", len(recent_turns) if recent_turns else 0,
+                        "the turn cache" if cache_hit else "memory")
             
             if recent_turns:
-                # Format conversation history for context
-                context_messages = []
-                
-                # CRITICAL FIX: get_last_k_turns returns newest first, we need oldest first
-                # Reverse to get chronological order (oldest to newest)
-                for turn in reversed(recent_turns):
-                    for message in turn:
-                        role = message['role']
-                        content = message['content']['text']
-                        context_messages.append(f"{role}: {content}")
-                
-                context = "\n".join(context_messages)
-                # Add context to agent's system prompt.
-                event.agent.system_prompt += f"\n\nRecent conversation:\n{context}"
-                logger.info(f"✅ Loaded {len(recent_turns)} conversation turns (chronological order)")
-                logger.info(f"🎯 Most recent message: {context_messages[-1][:100] if context_messages else 'None'}")
+                # History goes in as messages so the system prompt stays the same on every call
+                history = build_history(recent_turns)
+                event.agent.messages[:0] = history
+                logger.info("✅ Loaded %d conversation turns as %d messages", len(recent_turns), len(history))
                 
         except Exception as e:
-            logger.error(f"Memory load error: {e}")
+            logger.error("Memory load error: %s", e)
     
+    def _load_remote(self, actor_id, session_id):
+        # The previous request's writes may still be queued
+        if not memory_writer.flush(self.memory_client, self.memory_id, actor_id, session_id,
+                                   timeout=READ_AFTER_WRITE_TIMEOUT_SECONDS):
+            logger.warning("⚠️ Reading memory before the session's pending writes finished")
+        start = time.perf_counter()
+        recent_turns = self.memory_client.get_last_k_turns(
+            memory_id=self.memory_id,
+            actor_id=actor_id,
+            session_id=session_id,
+            k=TURNS_KEPT
+        )
+        turn_cache.put(actor_id, session_id, recent_turns, time.perf_counter() - start)
+        return recent_turns
+
     def on_message_added(self, event: MessageAddedEvent):
-        """Store messages in memory"""
-        messages = event.agent.messages
+        """Queue the message for memory; tool calls and tool results are not kept"""
+        message = event.agent.messages[-1]
         try:
             # Get session info from agent state
             actor_id = event.agent.state.get("actor_id")
             session_id = event.agent.state.get("session_id")
-            
-            logger.info(f"💾 Saving message to memory for actor_id={actor_id}, session_id={session_id}")
 
-            if messages[-1]["content"][0].get("text"):
-                self.memory_client.create_event(
-                    memory_id=self.memory_id,
-                    actor_id=actor_id,
-                    session_id=session_id,
-                    messages=[(messages[-1]["content"][0]["text"], messages[-1]["role"])]
-                )
-                logger.info(f"✅ Message saved successfully")
+            if any("toolUse" in block or "toolResult" in block for block in message["content"]):
+                return
+            text = message["content"][0].get("text")
+            if text and message["role"] == "assistant":
+                # Answers are saved as compact records; their rows stay in result_store
+                self.result_id = answer_id(session_id, text)
+                text = compact(session_id, text, *self._request_context(event.agent.messages),
+                               result_id=self.result_id)
+            if text and self._held is not None:
+                self._held.append((actor_id, session_id, text, message["role"]))
+            elif text:
+                self._save(actor_id, session_id, text, message["role"])
         except Exception as e:
-            logger.error(f"Memory save error: {e}")
+            logger.error("Memory save error: %s", e)
+
+    def _save(self, actor_id, session_id, text, role):
+        logger.debug("💾 Queueing message for memory, actor_id=%s, session_id=%s", actor_id, session_id)
+        memory_writer.submit(self.memory_client, self.memory_id, actor_id, session_id, text, role)
+        turn_cache.append(actor_id, session_id, text, role)
     
+    @staticmethod
+    def _request_context(messages):
+        """(question, database) of the request the last message answers"""
+        question = database = None
+        for message in reversed(messages[:-1]):
+            for block in message["content"]:
+                if database is None and block.get("toolUse", {}).get("name") == "athena_query":
+                    database = block["toolUse"].get("input", {}).get("database")
+                if message["role"] == "user" and "text" in block:
+                    return block["text"], database
+        return question, database
+
     def register_hooks(self, registry: HookRegistry):
         # Register memory hooks
         registry.add_callback(MessageAddedEvent, self.on_message_added)
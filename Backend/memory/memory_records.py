@@ -0,0 +1,124 @@
+"""
+Memory Records
+Assistant answers are saved to memory as compact records instead of their full text: the question, the
+SQL and its fingerprint, a short summary, the row count and a result_store handle for the rows. Records
+over MEMORY_RECORD_COMPRESS_BYTES are zlib-compressed when MEMORY_RECORD_COMPRESSION is on. The rows
+are rehydrated only when asked for, from result_store or by re-running the SQL.
+"""
+import os
+import json
+import zlib
+import base64
+import hashlib
+import logging
+from Backend.agent.result_store import result_store
+from Backend.metrics.query_history import fingerprint
+
+logger = logging.getLogger(__name__)
+
+RECORD_PREFIX = "sentra-record:v1:"
+COMPRESSED_PREFIX = "sentra-record:v1z:"
+RECORD_COMPRESSION = os.getenv("MEMORY_RECORD_COMPRESSION", "false").lower() == "true"
+RECORD_COMPRESS_BYTES = int(os.getenv("MEMORY_RECORD_COMPRESS_BYTES", "512"))
+SUMMARY_CHARS = 300
+QUESTION_CHARS = 500
+
+
+def compact(session_id, text, question=None, database=None, result_id=None):
+    """
+    The memory text for an assistant reply: a record when it is a JSON answer, otherwise the text itself.
+    The answer's rows are stored under result_id, a new id when not given.
+    """
+    start, end = text.find("{"), text.rfind("}")
+    try:
+        response = json.loads(text[start:end + 1]) if 0 <= start < end else None
+    except ValueError:
+        response = None
+    if not isinstance(response, dict) or "type" not in response:
+        return text
+
+    sql = response.get("query_executed") or ""
+    record = {
+        "question": (question or "")[:QUESTION_CHARS],
+        "type": response.get("type"),
+        "summary": str(response.get("explanation", ""))[:SUMMARY_CHARS],
+        "customer_specific": response.get("customer_specific"),
+        "sql": sql,
+        "database": database,
+        "fingerprint": fingerprint(sql) if sql else None,
+    }
+    data = response.get("data")
+    if isinstance(data, list) and data:
+        record["rows"] = len(data)
+        record["result_id"] = result_store.put(session_id, data, result_id=result_id)
+    else:
+        # Scalars and short text answers are cheaper inline than behind a handle
+        record["data"] = data
+    return encode(record)
+
+
+def answer_id(session_id, text):
+    """
+    Result id for the rows of an assistant reply. Derived from the reply text as the model sent it, which
+    is cheap to hash, and stable, so a replayed session stores its rows under the same ids.
+    """
+    return hashlib.sha1(f"{session_id}\n{text}".encode("utf-8")).hexdigest()
+
+
+def encode(record):
+    body = json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=str)
+    if RECORD_COMPRESSION and len(body) > RECORD_COMPRESS_BYTES:
+        return COMPRESSED_PREFIX + base64.b64encode(zlib.compress(body.encode("utf-8"))).decode("ascii")
+    return RECORD_PREFIX + body
+
+
+def decode(text):
+    """The record stored in text, or None for ordinary message text"""
+    try:
+        if text.startswith(RECORD_PREFIX):
+            return json.loads(text[len(RECORD_PREFIX):])
+        if text.startswith(COMPRESSED_PREFIX):
+            return json.loads(zlib.decompress(base64.b64decode(text[len(COMPRESSED_PREFIX):])))
+    except (ValueError, zlib.error):
+        logger.warning("⚠️ Unreadable memory record", exc_info=True)
+    return None
+
+
+def expand(text):
+    """Message text as the model should see it: records become the answer JSON without its rows"""
+    record = decode(text)
+    if record is None:
+        return text
+    data = record.get("data")
+    if "result_id" in record:
+        data = f"[{record['rows']} rows omitted]"
+    return json.dumps({"type": record.get("type"), "data": data, "explanation": record.get("summary", ""),
+                       "customer_specific": record.get("customer_specific"),
+                       "query_executed": record.get("sql", "")}, ensure_ascii=False, default=str)
+
+
+def find(turns, result_id):
+    """The record holding result_id among get_last_k_turns-shaped turns"""
+    for turn in turns or []:
+        for message in turn:
+            record = decode(message.get("content", {}).get("text", ""))
+            if record and record.get("result_id") == result_id:
+                return record
+    return None
+
+
+def rehydrate(session_id, record, run_query):
+    """
+    The record's rows, from result_store or by calling run_query(sql, database) and storing the rows
+    under the record's result_id again; None when neither works.
+    """
+    rows = result_store.get(session_id, record.get("result_id"))
+    if rows is not None:
+        return rows
+    if not record.get("sql") or not record.get("database"):
+        return None
+    logger.info("♻️ Rehydrating result %s by re-running its SQL", record.get("result_id"))
+    rows = run_query(record["sql"], record["database"])
+    if rows is not None:
+        result_store.put(session_id, rows, result_id=record.get("result_id"))
+    return rows
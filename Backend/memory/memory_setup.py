@@ -1,22 +1,175 @@
+"""
+AgentCore Memory Setup
+Resolves the memory resource lazily so importing the agent never talks to AWS. The ID comes from
+AGENT_MEMORY_ID, then a local cache file, then a one-time list_memories / create_memory_and_wait lookup.
+The agent reads and writes through get_backend(); MEMORY_BACKEND=sqlite keeps memory in a local SQLite file
+instead of AgentCore (see memory_backends), and no lookup is needed.
+"""
 import os
-from bedrock_agentcore.memory import MemoryClient
+import json
+import logging
+import tempfile
+import threading
+
+logger = logging.getLogger(__name__)
 
 REGION = os.getenv("AWS_REGION", "ap-south-1")
+memory_name = os.getenv("AGENT_MEMORY_NAME", "Test_Agent_Memory_V1")  # Match the name from Agent_CICD.py
+MEMORY_BACKEND = os.getenv("MEMORY_BACKEND", "agentcore").lower()
+MEMORY_BACKENDS = ("agentcore", "sqlite")
+# Skips the lookup entirely when the deployment already knows its memory resource
+MEMORY_ID_ENV = "AGENT_MEMORY_ID"
+MEMORY_ID_CACHE = os.getenv("AGENT_MEMORY_ID_CACHE", os.path.join(tempfile.gettempdir(), "sentra_memory_id.json"))
+
+_client = None
+_backend = None
+_memory_id = None
+_lock = threading.Lock()
+_client_lock = threading.Lock()
+_backend_lock = threading.Lock()
+
+
+def get_client():
+    """The shared MemoryClient, created on first use"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from bedrock_agentcore.memory import MemoryClient
+                _client = MemoryClient(region_name=REGION)
+    return _client
+
+
+def get_backend():
+    """The shared MemoryBackend for MEMORY_BACKEND, created on first use"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = _create_backend()
+    return _backend
+
+
+def get_memory_id():
+    """The memory resource ID; resolved once per process and cached on disk for the next one"""
+    global _memory_id
+    if _memory_id is None:
+        with _lock:
+            if _memory_id is None:
+                _memory_id = _resolve()
+    return _memory_id
+
+
+def resolve_in_background():
+    """Start resolving the memory ID on a daemon thread so the first request doesn't wait on AWS"""
+    def resolve():
+        try:
+            get_memory_id()
+        except Exception:
+            # The first request retries the lookup and surfaces the error
+            logger.warning("⚠️ Background memory lookup failed", exc_info=True)
+
+    thread = threading.Thread(target=resolve, name="memory-setup", daemon=True)
+    thread.start()
+    return thread
+
+
+def configure(client=None, memory_id=None, backend=None):
+    """Use the given client, backend and/or memory ID instead of resolving them (stand-ins, tests, tooling)"""
+    global _client, _backend, _memory_id
+    if client is not None:
+        with _client_lock:
+            _client = client
+    if client is not None or backend is not None:
+        with _backend_lock:
+            # Without a backend of its own, a new client gets a backend wrapping it on next use
+            _backend = backend
+    if memory_id is not None:
+        with _lock:
+            _memory_id = memory_id
+
 
-client = MemoryClient(region_name=REGION)
-memory_name = "Test_Agent_Memory_V1"  # Match the name from Agent_CICD.py
-memory_id = None
+def invalidate():
+    """Forget the resolved ID and its cache entry, e.g. after the resource was deleted"""
+    global _memory_id
+    with _lock:
+        _memory_id = None
+        cache = _read_cache()
+        if cache.pop(_cache_key(), None) is not None:
+            _write_cache(cache)
 
-memories = client.list_memories()
-existing = next((m for m in memories if m["id"].startswith(memory_name)), None)
 
-if existing:
-    memory_id = existing["id"]
-else:
+def _create_backend():
+    from Backend.memory import memory_backends
+    if MEMORY_BACKEND not in MEMORY_BACKENDS:
+        raise ValueError(f"MEMORY_BACKEND must be one of {MEMORY_BACKENDS}, not {MEMORY_BACKEND!r}")
+    if MEMORY_BACKEND == "sqlite":
+        backend = memory_backends.SQLiteMemoryBackend(memory_backends.SQLITE_PATH)
+        logger.info("🧠 Using local SQLite memory at %s", backend.path)
+        return backend
+    return memory_backends.AgentCoreMemoryBackend(region_name=REGION, client=get_client())
+
+
+def _resolve():
+    memory_id = os.getenv(MEMORY_ID_ENV)
+    if memory_id:
+        logger.info("🧠 Memory ID from %s: %s", MEMORY_ID_ENV, memory_id)
+        return memory_id
+
+    if MEMORY_BACKEND == "sqlite":
+        # Nothing to look up; the name keeps deployments sharing one file apart
+        return memory_name
+
+    cache = _read_cache()
+    memory_id = cache.get(_cache_key())
+    if memory_id:
+        logger.info("🧠 Memory ID from cache %s: %s", MEMORY_ID_CACHE, memory_id)
+        return memory_id
+
+    memory_id = _lookup()
+    cache[_cache_key()] = memory_id
+    _write_cache(cache)
+    return memory_id
+
+
+def _lookup():
+    client = get_client()
+    memories = client.list_memories()
+    existing = next((m for m in memories if m["id"].startswith(memory_name)), None)
+    if existing:
+        logger.info("🧠 Found memory %s", existing["id"])
+        return existing["id"]
+
     memory = client.create_memory_and_wait(
         name=memory_name,
         strategies=[],
         description="Short-term memory for Sentra agent",
         event_expiry_days=7,
     )
-    memory_id = memory["id"]
+    logger.info("🧠 Created memory %s", memory["id"])
+    return memory["id"]
+
+
+def _cache_key():
+    return f"{REGION}/{memory_name}"
+
+
+def _read_cache():
+    try:
+        with open(MEMORY_ID_CACHE) as f:
+            cache = json.load(f)
+        return cache if isinstance(cache, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_cache(cache):
+    # Written atomically so concurrent cold starts never read a half-written file
+    try:
+        directory = os.path.dirname(MEMORY_ID_CACHE) or "."
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".memory_id.")
+        with os.fdopen(fd, "w") as f:
+            json.dump(cache, f)
+        os.replace(tmp_path, MEMORY_ID_CACHE)
+    except OSError:
+        logger.warning("⚠️ Could not write memory ID cache %s", MEMORY_ID_CACHE, exc_info=True)
@@ -0,0 +1,163 @@
+"""
+Memory Writer
+Moves AgentCore Memory writes off the request path. MemoryHookProvider queues each message and a worker
+thread turns whatever is queued for one (actor, session) into a single create_event call, retrying with
+backoff. A full queue makes the caller wait for room, then write inline after its session's queued
+messages, instead of dropping; pending writes are flushed at exit.
+"""
+import os
+import time
+import queue
+import atexit
+import logging
+import threading
+from collections import OrderedDict
+from Backend.config.tracing import set_attributes, span
+
+logger = logging.getLogger(__name__)
+
+MEMORY_WRITE_ASYNC = os.getenv("MEMORY_WRITE_ASYNC", "true").lower() == "true"
+MEMORY_WRITE_QUEUE_SIZE = int(os.getenv("MEMORY_WRITE_QUEUE_SIZE", "1000"))
+# Messages per create_event call
+MEMORY_WRITE_MAX_BATCH = int(os.getenv("MEMORY_WRITE_MAX_BATCH", "10"))
+MEMORY_WRITE_RETRIES = int(os.getenv("MEMORY_WRITE_RETRIES", "3"))
+MEMORY_WRITE_BACKOFF_SECONDS = float(os.getenv("MEMORY_WRITE_BACKOFF_SECONDS", "0.2"))
+# How long a caller facing a full queue waits for room, and then for its session's queued writes
+MEMORY_WRITE_FULL_WAIT_SECONDS = float(os.getenv("MEMORY_WRITE_FULL_WAIT_SECONDS", "1"))
+# How long exit waits for queued writes
+MEMORY_WRITE_FLUSH_SECONDS = float(os.getenv("MEMORY_WRITE_FLUSH_SECONDS", "5"))
+
+
+class MemoryWriter:
+    """
+    Batched, retried create_event calls. Writes for one (client, memory, actor, session) are made in the
+    order they were submitted; flush() waits for them, e.g. before reading the session back.
+    """
+
+    def __init__(self, max_queue=MEMORY_WRITE_QUEUE_SIZE, max_batch=MEMORY_WRITE_MAX_BATCH,
+                 retries=MEMORY_WRITE_RETRIES, backoff_seconds=MEMORY_WRITE_BACKOFF_SECONDS,
+                 synchronous=not MEMORY_WRITE_ASYNC, full_wait_seconds=MEMORY_WRITE_FULL_WAIT_SECONDS):
+        self.max_batch = max_batch
+        self.full_wait_seconds = full_wait_seconds
+        self.retries = retries
+        self.backoff_seconds = backoff_seconds
+        self.synchronous = synchronous
+        self.stats = {"queued": 0, "inline": 0, "written": 0, "events": 0, "retries": 0, "failed": 0}
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._pending = {}  # key -> messages queued or being written
+        self._condition = threading.Condition()
+        self._worker = None
+        self._closed = False
+
+    def submit(self, client, memory_id, actor_id, session_id, text, role):
+        """Queue one message; writes it on the calling thread when synchronous, closed or the queue stays full"""
+        key = (client, memory_id, actor_id, session_id)
+        if self.synchronous or self._closed:
+            self._write_inline(key, text, role)
+            return
+
+        self._track(key, 1)
+        self._ensure_worker()
+        try:
+            # Backpressure rather than loss: a full queue makes the caller wait for room
+            self._queue.put((key, text, role), timeout=self.full_wait_seconds)
+        except queue.Full:
+            # Still full: this caller writes its own message, but only after the session's queued ones
+            self._track(key, -1)
+            logger.warning("⚠️ Memory write queue full; writing inline")
+            if not self.flush(*key, timeout=self.full_wait_seconds):
+                logger.warning("⚠️ Session %s still has queued memory writes; this message may be saved out of order",
+                               session_id)
+            self._write_inline(key, text, role)
+            return
+        self._count("queued")
+
+    def flush(self, client=None, memory_id=None, actor_id=None, session_id=None, timeout=None):
+        """Wait until the given session's writes (or all writes) are done; False on timeout"""
+        key = (client, memory_id, actor_id, session_id)
+        with self._condition:
+            if client is None:
+                return self._condition.wait_for(lambda: not self._pending, timeout)
+            return self._condition.wait_for(lambda: key not in self._pending, timeout)
+
+    def close(self, timeout=MEMORY_WRITE_FLUSH_SECONDS):
+        """Flush queued writes; later submissions are written inline"""
+        self._closed = True
+        if not self.flush(timeout=timeout):
+            logger.error("❌ %d memory writes still pending at shutdown", sum(self._pending.values()))
+
+    def snapshot(self):
+        with self._condition:
+            return {**self.stats, "pending": sum(self._pending.values())}
+
+    def _ensure_worker(self):
+        # is_alive() also covers a worker lost to a fork
+        if self._worker is None or not self._worker.is_alive():
+            with self._condition:
+                if self._worker is None or not self._worker.is_alive():
+                    self._worker = threading.Thread(target=self._run, name="memory-writer", daemon=True)
+                    self._worker.start()
+
+    def _run(self):
+        while True:
+            items = [self._queue.get()]
+            while len(items) < self.max_batch:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            batches = OrderedDict()
+            for key, text, role in items:
+                batches.setdefault(key, []).append((text, role))
+            for key, messages in batches.items():
+                try:
+                    self._write(key, messages)
+                except Exception:
+                    self._count("failed", len(messages))
+                    logger.error("❌ Dropped %d memory messages for session %s after %d retries", len(messages),
+                                 key[3], self.retries, exc_info=True)
+                finally:
+                    self._track(key, -len(messages))
+            for _ in items:
+                self._queue.task_done()
+
+    def _write_inline(self, key, text, role):
+        self._count("inline")
+        self._write(key, [(text, role)])
+
+    def _write(self, key, messages):
+        client, memory_id, actor_id, session_id = key
+        with span("memory.write", **{"memory.id": memory_id, "session.id": session_id}) as current:
+            set_attributes(current, **{"memory.messages": len(messages)})
+            for attempt in range(self.retries + 1):
+                try:
+                    client.create_event(memory_id=memory_id, actor_id=actor_id, session_id=session_id,
+                                        messages=messages)
+                    break
+                except Exception as e:
+                    if attempt == self.retries:
+                        raise
+                    self._count("retries")
+                    delay = self.backoff_seconds * 2 ** attempt
+                    logger.warning("⚠️ Memory write failed (%s); retrying in %.1fs", e, delay)
+                    time.sleep(delay)
+        self._count("events")
+        self._count("written", len(messages))
+
+    def _track(self, key, delta):
+        with self._condition:
+            remaining = self._pending.get(key, 0) + delta
+            if remaining > 0:
+                self._pending[key] = remaining
+            else:
+                self._pending.pop(key, None)
+                self._condition.notify_all()
+
+    def _count(self, name, amount=1):
+        with self._condition:
+            self.stats[name] += amount
+
+
+memory_writer = MemoryWriter()
+atexit.register(memory_writer.close)
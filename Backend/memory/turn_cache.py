@@ -0,0 +1,102 @@
+"""
+Turn Cache
+Recent conversation turns per (actor, session), kept in process in front of get_last_k_turns. AgentCore
+routes every request of a runtime session to the same instance, which also wrote those turns, so remote
+memory is only read on a miss (a new instance, an evicted or expired session).
+"""
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+TURN_CACHE_SESSIONS = int(os.getenv("MEMORY_TURN_CACHE_SESSIONS", "1000"))
+# Bounds staleness if a session's writes ever land on another instance
+TURN_CACHE_TTL_SECONDS = int(os.getenv("MEMORY_TURN_CACHE_TTL_SECONDS", "900"))
+TURNS_KEPT = 5
+
+
+class TurnCache:
+    """
+    Turns in get_last_k_turns' shape: newest first, each a list of {"role", "content": {"text"}}.
+    Entries are only created from a full remote read, so appends never build a partial history.
+    """
+
+    def __init__(self, max_sessions=TURN_CACHE_SESSIONS, ttl_seconds=TURN_CACHE_TTL_SECONDS, k=TURNS_KEPT):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.k = k
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "evicted": 0, "appends": 0}
+        self._remote_seconds = 0.0  # total time of the remote reads behind the misses
+        self._sessions = OrderedDict()  # (actor_id, session_id) -> (last_used, turns)
+        self._lock = threading.Lock()
+
+    def get(self, actor_id, session_id):
+        """A copy of the cached turns, or None on a miss"""
+        key = (actor_id, session_id)
+        with self._lock:
+            entry = self._sessions.get(key)
+            if entry is not None and time.time() - entry[0] > self.ttl_seconds:
+                del self._sessions[key]
+                self.stats["expired"] += 1
+                entry = None
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            self.stats["hits"] += 1
+            self._sessions[key] = (time.time(), entry[1])
+            self._sessions.move_to_end(key)
+            return [list(turn) for turn in entry[1]]
+
+    def put(self, actor_id, session_id, turns, remote_seconds=0.0):
+        """Cache turns read from remote memory; remote_seconds is what the read cost"""
+        with self._lock:
+            self._remote_seconds += remote_seconds
+            self._sessions[(actor_id, session_id)] = (time.time(), [list(turn) for turn in (turns or [])[:self.k]])
+            self._sessions.move_to_end((actor_id, session_id))
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.stats["evicted"] += 1
+
+    def append(self, actor_id, session_id, text, role):
+        """Write-through for a message saved to memory; a user message starts a new turn"""
+        message = {"role": role.upper(), "content": {"text": text}}
+        key = (actor_id, session_id)
+        with self._lock:
+            entry = self._sessions.get(key)
+            if entry is None:
+                return
+            turns = entry[1]
+            if message["role"] == "USER" or not turns:
+                turns.insert(0, [message])
+                del turns[self.k:]
+            else:
+                turns[0].append(message)
+            self._sessions[key] = (time.time(), turns)
+            self.stats["appends"] += 1
+
+    def invalidate(self, actor_id, session_id):
+        with self._lock:
+            self._sessions.pop((actor_id, session_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._sessions.clear()
+
+    def snapshot(self):
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            remote_ms = self._remote_seconds * 1000 / self.stats["misses"] if self.stats["misses"] else 0.0
+            return {
+                **self.stats,
+                "sessions": len(self._sessions),
+                "hit_ratio": round(self.stats["hits"] / lookups, 4) if lookups else 0.0,
+                "avg_remote_read_ms": round(remote_ms, 1),
+                # Each hit skipped one remote read of about the average cost
+                "latency_saved_ms": round(self.stats["hits"] * remote_ms, 1),
+            }
+
+
+turn_cache = TurnCache()
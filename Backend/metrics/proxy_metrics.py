@@ -0,0 +1,144 @@
+"""
+Proxy Metrics
+Prometheus metrics for the Flask proxy, served on /metrics: request latency per route, stage latency
+(agent invoke, Athena poll, result parse), in-flight requests, errors by type, response sizes and
+cache hits. prometheus_client is in requirements.txt; where it is missing, a warning is logged once and
+every metric is a no-op.
+
+Under gunicorn set PROMETHEUS_MULTIPROC_DIR to an empty directory so each worker writes its samples
+there and /metrics aggregates them, and call mark_process_dead(worker.pid) from the child_exit hook.
+"""
+import os
+import time
+import logging
+from contextlib import contextmanager
+
+try:
+    from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram,
+                                   generate_latest, multiprocess)
+except ImportError:
+    Counter = None
+
+from botocore.exceptions import ClientError
+from flask import g, request
+
+logger = logging.getLogger(__name__)
+
+if Counter is None:
+    logger.warning("⚠️ prometheus_client is not installed; proxy metrics are disabled and /metrics returns 503")
+
+MULTIPROCESS_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 180)
+SIZE_BUCKETS = tuple(256 * 4 ** power for power in range(10))  # 256 B .. 64 MB
+UNMATCHED_ROUTE = "unmatched"
+
+
+class _NoopMetric:
+    def labels(self, *args, **kwargs):
+        return self
+
+    def inc(self, amount=1):
+        pass
+
+    def dec(self, amount=1):
+        pass
+
+    def observe(self, value):
+        pass
+
+
+if Counter is not None:
+    REQUEST_LATENCY = Histogram("proxy_request_duration_seconds", "Request latency, including streamed bodies",
+                                ["route", "status"], buckets=LATENCY_BUCKETS)
+    STAGE_LATENCY = Histogram("proxy_stage_duration_seconds", "Latency of one stage of a request",
+                              ["stage"], buckets=LATENCY_BUCKETS)
+    IN_FLIGHT = Gauge("proxy_requests_in_flight", "Requests being served", ["route"], multiprocess_mode="livesum")
+    ERRORS = Counter("proxy_errors", "Failed requests by error type", ["route", "type"])
+    RESPONSE_SIZE = Histogram("proxy_response_size_bytes", "Encoded response body size (streams excluded)",
+                              ["route"], buckets=SIZE_BUCKETS)
+    CACHE_REQUESTS = Counter("proxy_cache_requests", "Cache lookups by result (hit or miss)", ["cache", "result"])
+else:
+    REQUEST_LATENCY = STAGE_LATENCY = IN_FLIGHT = ERRORS = RESPONSE_SIZE = CACHE_REQUESTS = _NoopMetric()
+
+
+@contextmanager
+def stage(name):
+    """Time one stage of a request, whether or not it raises"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_LATENCY.labels(name).observe(time.perf_counter() - started)
+
+
+def record_cache(cache, hit):
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def record_error(route, error_type):
+    ERRORS.labels(route, error_type).inc()
+
+
+def error_type(exc):
+    """AWS error code for botocore client errors, the exception class name otherwise"""
+    if isinstance(exc, ClientError):
+        return exc.response.get("Error", {}).get("Code") or "ClientError"
+    return type(exc).__name__
+
+
+def instrument(app):
+    """Register request hooks on a Flask app. Requests are timed until the response is closed, so
+    streamed bodies count until their last event is sent."""
+
+    def route():
+        rule = request.url_rule
+        return rule.rule if rule is not None else UNMATCHED_ROUTE
+
+    def finish(name, started, status):
+        IN_FLIGHT.labels(name).dec()
+        REQUEST_LATENCY.labels(name, str(status)).observe(time.perf_counter() - started)
+
+    @app.before_request
+    def _start():
+        if request.path == "/metrics":
+            return
+        g.metrics_started = time.perf_counter()
+        IN_FLIGHT.labels(route()).inc()
+
+    @app.after_request
+    def _response(response):
+        started = g.pop("metrics_started", None)
+        if started is not None:
+            name = route()
+            if not response.is_streamed:
+                RESPONSE_SIZE.labels(name).observe(response.calculate_content_length() or 0)
+            response.call_on_close(lambda: finish(name, started, response.status_code))
+        return response
+
+    @app.teardown_request
+    def _teardown(exc):
+        if exc is not None:
+            record_error(route(), error_type(exc))
+        # after_request never ran (e.g. the error handler itself failed)
+        started = g.pop("metrics_started", None)
+        if started is not None:
+            finish(route(), started, 500)
+
+
+def render():
+    """(body, content_type, status) for the /metrics endpoint"""
+    if Counter is None:
+        return b"# prometheus_client is not installed\n", "text/plain; charset=utf-8", 503
+    if MULTIPROCESS_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST, 200
+
+
+def mark_process_dead(pid):
+    """gunicorn child_exit hook: drop the live gauges of a worker that exited"""
+    if Counter is not None and MULTIPROCESS_DIR:
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,353 @@
+"""
+Athena Query History
+Records the Statistics block of every Athena execution with its SQL fingerprint, user and session.
+Executions are aggregated in memory into per-fingerprint histograms (the metrics surface) and
+appended to a local SQLite history so the hottest and most expensive query shapes can be found
+for caching or materialization. History rows are written by a background thread and pruned by
+age and count; the in-memory aggregates keep the most recently seen fingerprints only.
+
+    python -m Backend.metrics.query_history --order-by bytes --top 10
+"""
+import os
+import re
+import time
+import queue
+import atexit
+import bisect
+import hashlib
+import sqlite3
+import tempfile
+import logging
+import argparse
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+HISTORY_DB_PATH = os.getenv("QUERY_HISTORY_DB", os.path.join(tempfile.gettempdir(), "sentra_query_history.sqlite3"))
+# Athena bills per TB scanned with a 10 MB minimum per query
+PRICE_PER_TB_USD = float(os.getenv("ATHENA_PRICE_PER_TB_USD", "5.0"))
+MIN_BILLED_BYTES = 10 * 1024 ** 2
+# Rows waiting for the writer thread; beyond this, rows are dropped rather than slowing queries down
+HISTORY_QUEUE_SIZE = int(os.getenv("QUERY_HISTORY_QUEUE_SIZE", "1000"))
+HISTORY_MAX_BATCH = int(os.getenv("QUERY_HISTORY_MAX_BATCH", "100"))
+HISTORY_MAX_ROWS = int(os.getenv("QUERY_HISTORY_MAX_ROWS", "100000"))
+HISTORY_RETENTION_DAYS = float(os.getenv("QUERY_HISTORY_RETENTION_DAYS", "30"))
+# Retention runs after this many written rows
+HISTORY_PRUNE_EVERY = int(os.getenv("QUERY_HISTORY_PRUNE_EVERY", "1000"))
+# Fingerprints aggregated in memory; the least recently seen is evicted beyond this
+HISTORY_MAX_FINGERPRINTS = int(os.getenv("QUERY_HISTORY_MAX_FINGERPRINTS", "1000"))
+HISTORY_FLUSH_SECONDS = float(os.getenv("QUERY_HISTORY_FLUSH_SECONDS", "5"))
+
+MS_BUCKETS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000, 120000)
+BYTES_BUCKETS = tuple(1024 ** 2 * mb for mb in (1, 10, 100, 1024, 10 * 1024, 100 * 1024))
+
+# Statistics fields kept per execution, by the name used in the history table
+STATISTICS_FIELDS = {
+    "queue_ms": "QueryQueueTimeInMillis",
+    "engine_ms": "EngineExecutionTimeInMillis",
+    "service_ms": "ServiceProcessingTimeInMillis",
+    "total_ms": "TotalExecutionTimeInMillis",
+    "bytes_scanned": "DataScannedInBytes",
+}
+ORDER_COLUMNS = {"count": "executions", "bytes": "total_bytes", "time": "total_engine_ms", "cost": "total_cost_usd"}
+
+_COMMENTS = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_NUMBERS = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r"\bin\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.I)
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_sql(sql):
+    """SQL with comments removed, literals replaced by ? and whitespace/case folded"""
+    text = _COMMENTS.sub(" ", sql or "")
+    text = _STRINGS.sub("?", text)
+    text = _NUMBERS.sub("?", text)
+    text = _IN_LISTS.sub("in (?+)", text)
+    return _SPACES.sub(" ", text).strip().rstrip(";").lower()
+
+
+def fingerprint(sql):
+    """Short stable id of a query shape: queries differing only in literals share it"""
+    return hashlib.sha1(normalize_sql(sql).encode("utf-8")).hexdigest()[:16]
+
+
+def scan_cost_usd(bytes_scanned):
+    if not bytes_scanned:
+        return 0.0
+    return max(bytes_scanned, MIN_BILLED_BYTES) / 1024 ** 4 * PRICE_PER_TB_USD
+
+
+class Histogram:
+    """Cumulative-bucket histogram with fixed upper bounds (the last bucket is +Inf)"""
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def snapshot(self):
+        cumulative, running = {}, 0
+        for bound, count in zip(self.bounds + ("+Inf",), self.counts):
+            running += count
+            cumulative[str(bound)] = running
+        return {"buckets": cumulative, "sum": self.total, "count": self.count}
+
+
+class FingerprintStats:
+    def __init__(self, normalized_sql):
+        self.normalized_sql = normalized_sql
+        self.executions = 0
+        self.failures = 0
+        self.rows = 0
+        self.cost_usd = 0.0
+        self.last_seen = 0.0
+        self.histograms = {
+            "queue_ms": Histogram(MS_BUCKETS),
+            "engine_ms": Histogram(MS_BUCKETS),
+            "service_ms": Histogram(MS_BUCKETS),
+            "bytes_scanned": Histogram(BYTES_BUCKETS),
+        }
+
+    def snapshot(self):
+        return {
+            "sql": self.normalized_sql,
+            "executions": self.executions,
+            "failures": self.failures,
+            "rows": self.rows,
+            "cost_usd": round(self.cost_usd, 6),
+            "last_seen": self.last_seen,
+            "histograms": {name: histogram.snapshot() for name, histogram in self.histograms.items()},
+        }
+
+
+class QueryHistory:
+    """
+    In-memory per-fingerprint aggregates plus an append-only SQLite history (opened on first use).
+    record() only updates the aggregates and queues the row; a worker thread batches rows into the
+    history and prunes rows older than retention_days or beyond the newest max_rows.
+    """
+
+    def __init__(self, db_path=HISTORY_DB_PATH, max_queue=HISTORY_QUEUE_SIZE, max_batch=HISTORY_MAX_BATCH,
+                 max_rows=HISTORY_MAX_ROWS, retention_days=HISTORY_RETENTION_DAYS,
+                 max_fingerprints=HISTORY_MAX_FINGERPRINTS, prune_every=HISTORY_PRUNE_EVERY):
+        self.db_path = db_path
+        self.max_batch = max_batch
+        self.max_rows = max_rows
+        self.retention_days = retention_days
+        self.max_fingerprints = max_fingerprints
+        self.prune_every = prune_every
+        self.stats = OrderedDict()
+        self.writes = {"queued": 0, "written": 0, "dropped": 0, "failed": 0, "pruned": 0, "evicted": 0}
+        self._lock = threading.Lock()  # guards stats and writes
+        self._db_lock = threading.Lock()  # guards the connection, shared by the writer and top()
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._worker = None
+        self._since_prune = None  # None until the first prune, which runs on the first write
+        self._db = None
+
+    def _connection(self):
+        if self._db is None:
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS query_history (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    ts REAL NOT NULL,
+                    query_id TEXT,
+                    fingerprint TEXT NOT NULL,
+                    normalized_sql TEXT NOT NULL,
+                    sql TEXT NOT NULL,
+                    database TEXT,
+                    actor_id TEXT,
+                    session_id TEXT,
+                    state TEXT,
+                    queue_ms INTEGER,
+                    engine_ms INTEGER,
+                    service_ms INTEGER,
+                    total_ms INTEGER,
+                    bytes_scanned INTEGER,
+                    rows INTEGER,
+                    cost_usd REAL
+                )""")
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_query_history_fingerprint ON query_history (fingerprint, ts)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_query_history_ts ON query_history (ts)")
+        return self._db
+
+    def record(self, sql, database, query_id, state, statistics, rows=None, actor_id=None, session_id=None):
+        """Record one execution; never raises or blocks, so metrics can't break or slow a query"""
+        try:
+            statistics = statistics or {}
+            values = {name: statistics.get(field) for name, field in STATISTICS_FIELDS.items()}
+            normalized = normalize_sql(sql)
+            key = fingerprint(sql)
+            cost = scan_cost_usd(values["bytes_scanned"])
+            now = time.time()
+            with self._lock:
+                stats = self.stats.get(key)
+                if stats is None:
+                    stats = self.stats[key] = FingerprintStats(normalized)
+                    if len(self.stats) > self.max_fingerprints:
+                        self.stats.popitem(last=False)
+                        self.writes["evicted"] += 1
+                self.stats.move_to_end(key)
+                stats.executions += 1
+                stats.failures += state != "SUCCEEDED"
+                stats.rows += rows or 0
+                stats.cost_usd += cost
+                stats.last_seen = now
+                for name, histogram in stats.histograms.items():
+                    if values.get(name) is not None:
+                        histogram.observe(values[name])
+
+            row = (now, query_id, key, normalized, sql, database, actor_id, session_id, state, values["queue_ms"],
+                   values["engine_ms"], values["service_ms"], values["total_ms"], values["bytes_scanned"], rows, cost)
+            try:
+                self._queue.put_nowait(row)
+            except queue.Full:
+                self._count("dropped")
+                logger.warning("⚠️ Query history queue full; dropped the row for query %s", query_id)
+                return
+            self._count("queued")
+            self._ensure_worker()
+        except Exception:
+            logger.warning("⚠️ Failed to record Athena query statistics", exc_info=True)
+
+    def flush(self, timeout=None):
+        """Wait until queued rows are written; False on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def reopen(self, db_path):
+        """Write the history to db_path from now on (e.g. a per-test file); queued rows go to the old one first"""
+        self.flush(HISTORY_FLUSH_SECONDS)
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+            self._db, self.db_path = None, db_path
+            self._since_prune = None
+
+    def close(self, timeout=HISTORY_FLUSH_SECONDS):
+        if not self.flush(timeout):
+            logger.error("❌ %d query history rows still pending at shutdown", self._queue.unfinished_tasks)
+
+    def snapshot(self):
+        """Per-fingerprint counters and histograms since this process started"""
+        with self._lock:
+            return {key: stats.snapshot() for key, stats in self.stats.items()}
+
+    def writer_snapshot(self):
+        with self._lock:
+            return {**self.writes, "pending": self._queue.unfinished_tasks}
+
+    def top(self, order_by="cost", limit=10, since=None):
+        """Hottest or most expensive query shapes from the history store"""
+        column = ORDER_COLUMNS[order_by]
+        with self._db_lock:
+            cursor = self._connection().execute(f"""
+                SELECT fingerprint, MIN(normalized_sql), COUNT(*) AS executions,
+                       SUM(state != 'SUCCEEDED'), SUM(COALESCE(bytes_scanned, 0)) AS total_bytes,
+                       SUM(COALESCE(engine_ms, 0)) AS total_engine_ms, AVG(engine_ms), AVG(queue_ms),
+                       SUM(cost_usd) AS total_cost_usd, COUNT(DISTINCT actor_id)
+                FROM query_history WHERE ts >= ?
+                GROUP BY fingerprint ORDER BY {column} DESC LIMIT ?""", (since or 0, limit))
+            rows = cursor.fetchall()
+        names = ("fingerprint", "sql", "executions", "failures", "total_bytes", "total_engine_ms",
+                 "avg_engine_ms", "avg_queue_ms", "total_cost_usd", "actors")
+        return [dict(zip(names, row)) for row in rows]
+
+    def prune(self):
+        """Delete rows past retention_days and all but the newest max_rows; returns the number removed"""
+        with self._db_lock:
+            db = self._connection()
+            removed = 0
+            if self.retention_days:
+                removed += db.execute("DELETE FROM query_history WHERE ts < ?",
+                                      (time.time() - self.retention_days * 86400,)).rowcount
+            if self.max_rows:
+                # ids only grow (AUTOINCREMENT), so the newest rows are the highest ids
+                removed += db.execute("DELETE FROM query_history WHERE id <= (SELECT MAX(id) FROM query_history) - ?",
+                                      (self.max_rows,)).rowcount
+            db.commit()
+        if removed:
+            self._count("pruned", removed)
+            logger.info("🧹 Pruned %d query history rows", removed)
+        return removed
+
+    def _ensure_worker(self):
+        # is_alive() also covers a worker lost to a fork
+        if self._worker is None or not self._worker.is_alive():
+            with self._lock:
+                if self._worker is None or not self._worker.is_alive():
+                    self._worker = threading.Thread(target=self._run, name="query-history-writer", daemon=True)
+                    self._worker.start()
+
+    def _run(self):
+        while True:
+            rows = [self._queue.get()]
+            while len(rows) < self.max_batch:
+                try:
+                    rows.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(rows)
+            except Exception:
+                self._count("failed", len(rows))
+                logger.warning("⚠️ Failed to write %d query history rows", len(rows), exc_info=True)
+            finally:
+                for _ in rows:
+                    self._queue.task_done()
+
+    def _write(self, rows):
+        with self._db_lock:
+            db = self._connection()
+            db.executemany(
+                "INSERT INTO query_history (ts, query_id, fingerprint, normalized_sql, sql, database, actor_id,"
+                " session_id, state, queue_ms, engine_ms, service_ms, total_ms, bytes_scanned, rows, cost_usd)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            db.commit()
+        self._count("written", len(rows))
+        if self._since_prune is None or self._since_prune + len(rows) >= self.prune_every:
+            self._since_prune = 0
+            self.prune()
+        else:
+            self._since_prune += len(rows)
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self.writes[name] += amount
+
+
+query_history = QueryHistory()
+atexit.register(query_history.close)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show the hottest or most expensive Athena query shapes")
+    parser.add_argument("--order-by", choices=sorted(ORDER_COLUMNS), default="cost")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--hours", type=float, help="only executions from the last N hours")
+    parser.add_argument("--db", default=HISTORY_DB_PATH)
+    args = parser.parse_args()
+
+    since = time.time() - args.hours * 3600 if args.hours else None
+    for entry in QueryHistory(args.db).top(args.order_by, args.top, since):
+        print(f"{entry['fingerprint']}  runs={entry['executions']:<5} fail={entry['failures']:<3} "
+              f"scanned={entry['total_bytes'] / 1024 ** 2:,.1f}MB engine={entry['total_engine_ms'] / 1000:,.1f}s "
+              f"avg_queue={entry['avg_queue_ms'] or 0:,.0f}ms cost=${entry['total_cost_usd']:.4f}")
+        print(f"    {entry['sql'][:200]}")
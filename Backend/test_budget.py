@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Test per-request budgets: usage accounting, refusals and loop cancellation"""
+import threading
+from strands import Agent, tool
+from strands.models import Model
+from Backend.agent.budget import (DEFAULT_LIMITS, OUT_OF_TURNS_MESSAGE, RequestBudget, add_usage,
+                                  empty_usage)
+from Backend.benchmarks.fakes import ScriptedModel
+
+
+class LoopingModel(Model):
+    """Calls the lookup tool on every turn; with obey=True it answers once a tool call is refused"""
+
+    def __init__(self, obey=False):
+        self.obey = obey
+        self.calls = 0
+
+    def update_config(self, **model_config):
+        pass
+
+    def get_config(self):
+        return {"model_id": "looping"}
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        raise NotImplementedError
+        yield
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        self.calls += 1
+        refused = any("Budget exhausted" in str(block) for block in messages[-1]["content"])
+        yield {"messageStart": {"role": "assistant"}}
+        if self.obey and refused:
+            yield {"contentBlockStart": {"start": {}}}
+            yield {"contentBlockDelta": {"delta": {"text": "Answer with what I have."}}}
+            yield {"contentBlockStop": {}}
+            stop_reason = "end_turn"
+        else:
+            yield {"contentBlockStart": {"start": {"toolUse": {"toolUseId": f"t{self.calls}", "name": "lookup"}}}}
+            yield {"contentBlockDelta": {"delta": {"toolUse": {"input": "{}"}}}}
+            yield {"contentBlockStop": {}}
+            stop_reason = "tool_use"
+        yield {"messageStop": {"stopReason": stop_reason}}
+        yield {"metadata": {"usage": {"inputTokens": 100, "outputTokens": 10, "totalTokens": 110},
+                            "metrics": {"latencyMs": 1}}}
+
+
+@tool
+def lookup() -> str:
+    """Look something up"""
+    return "more data"
+
+
+def run(model, limits):
+    budget = RequestBudget()
+    agent = Agent(model=model, tools=[lookup], hooks=[budget], callback_handler=None)
+    budget.start(agent, limits)
+    result = agent("How are sales?")
+    return str(result).strip(), budget.report(agent)
+
+
+def test_parallel_usage_updates_are_not_lost():
+    agent = Agent(model=ScriptedModel(), callback_handler=None)
+    agent.state.set("usage", empty_usage())
+
+    def scan():
+        for _ in range(200):
+            add_usage(agent, bytes_scanned=10)
+
+    # As supporting queries do, each on its own pool thread
+    threads = [threading.Thread(target=scan) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert agent.state.get("usage")["bytes_scanned"] == 8 * 200 * 10
+    print("✅ Concurrent add_usage calls all count against the scan budget")
+
+
+def test_refused_tool_call_makes_the_model_answer():
+    answer, report = run(LoopingModel(obey=True), {"max_tool_calls": 2})
+    assert answer == "Answer with what I have."
+    # Two tool calls, a refused one, then the answer
+    assert report["usage"]["tool_calls"] == 2 and report["usage"]["model_turns"] == 4
+    assert report["budget_exhausted"] == "max_tool_calls"
+    print("✅ Tool calls past the limit are refused and the model answers")
+
+
+def test_model_ignoring_refusals_is_cancelled():
+    answer, report = run(LoopingModel(), {"max_model_turns": 5, "max_tool_calls": 2})
+    assert answer == OUT_OF_TURNS_MESSAGE
+    # The cancelled call is not a turn
+    assert report["usage"]["model_turns"] == 5 and report["usage"]["input_tokens"] == 500
+    assert report["usage"]["tool_calls"] == 2
+    # The tool budget ran out first, but the turn budget is what stopped the loop
+    assert report["budget_exhausted"] == "max_model_turns"
+    print("✅ A model that keeps calling tools is stopped at the turn limit, reported as such")
+
+
+def test_overrides_only_tighten():
+    budget = RequestBudget()
+    agent = Agent(model=ScriptedModel(), callback_handler=None)
+    budget.start(agent, {"max_tool_calls": 3, "max_model_turns": 10 ** 6, "max_bytes": 1,
+                         "max_output_tokens": "lots"})
+    assert budget.limits == {**DEFAULT_LIMITS, "max_tool_calls": 3}
+
+    # Each request starts from the defaults again
+    budget.start(agent)
+    assert budget.limits == DEFAULT_LIMITS and budget.report(agent)["budget_exhausted"] is None
+    print("✅ Per-request limits can be lowered but not raised; unknown and invalid ones are ignored")
+
+
+if __name__ == "__main__":
+    test_parallel_usage_updates_are_not_lost()
+    test_refused_tool_call_makes_the_model_answer()
+    test_model_ignoring_refusals_is_cancelled()
+    test_overrides_only_tighten()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Test recording a session into a cassette and replaying it deterministically"""
+import os
+import time
+import tempfile
+from Backend.benchmarks.fakes import SCENARIOS, InMemoryMemoryClient, ScriptedModel, SQLiteAthena, wire
+from Backend.benchmarks.cassette import (Cassette, CassetteMismatch, MEMORY_SERVICE, RecordingClient,
+                                         RecordingModel, install_replay)
+
+ATHENA_LATENCY = 0.05
+PAYLOADS = [{"user_query": SCENARIOS[1]["question"], "user_id": "tape.user", "session_id": "t" * 33},
+            {"user_query": SCENARIOS[2]["question"], "user_id": "tape.user", "session_id": "t" * 33}]
+
+
+def answers(results):
+    return [(result["type"], result["data"], result["explanation"]) for result in results]
+
+
+def record(path):
+    """Record against the stand-ins, as install_recorder does against the live services"""
+    cassette = Cassette(poll_interval=0)
+    athena = RecordingClient(SQLiteAthena(ATHENA_LATENCY), "athena", cassette)
+    wire(lambda model_id: RecordingModel(ScriptedModel(model_id=model_id), cassette), lambda service_name: athena,
+         RecordingClient(InMemoryMemoryClient(), MEMORY_SERVICE, cassette), poll_interval=0, synchronous_memory=True)
+    from Backend import main as entrypoint
+
+    cassette.payloads = PAYLOADS
+    results = [entrypoint.main(dict(payload)) for payload in PAYLOADS]
+    cassette.save(path)
+    return results
+
+
+def replay(path, speed):
+    cassette = Cassette.load(path)
+    install_replay(cassette, speed=speed, strict=True)
+    from Backend import main as entrypoint
+
+    start = time.perf_counter()
+    results = [entrypoint.main(dict(payload)) for payload in cassette.payloads]
+    return results, time.perf_counter() - start
+
+
+def test_replay_matches_recording():
+    path = os.path.join(tempfile.mkdtemp(), "session.json")
+    recorded = record(path)
+    operations = {(i["service"], i["operation"]) for i in Cassette.load(path).interactions}
+    assert {("model", "stream"), ("athena", "start_query_execution"), ("memory", "create_event"),
+            ("memory", "get_last_k_turns")} <= operations
+
+    fast, fast_seconds = replay(path, speed=0)
+    timed, timed_seconds = replay(path, speed=1.0)
+    assert answers(fast) == answers(recorded) == answers(timed)
+    # Two Athena queries were recorded at ATHENA_LATENCY each
+    assert timed_seconds >= 2 * ATHENA_LATENCY > fast_seconds
+    print(f"✅ Replay reproduces the recorded answers (fast {fast_seconds:.3f}s, recorded speed {timed_seconds:.3f}s)")
+
+
+def test_strict_replay_rejects_unrecorded_calls():
+    cassette = Cassette()
+    cassette.add("athena", "get_query_execution", {"args": [], "kwargs": {"QueryExecutionId": "q1"}}, 0.01,
+                 response={"QueryExecution": {}})
+    try:
+        cassette.take("athena", "get_query_execution", {"args": [], "kwargs": {"QueryExecutionId": "q2"}}, strict=True)
+    except CassetteMismatch:
+        pass
+    else:
+        raise AssertionError("strict replay accepted a call that was never recorded")
+    assert cassette.take("athena", "get_query_execution", {"args": [], "kwargs": {"QueryExecutionId": "q2"}})
+    print("✅ Strict replay fails on calls the cassette doesn't contain")
+
+
+if __name__ == "__main__":
+    test_replay_matches_recording()
+    test_strict_replay_rejects_unrecorded_calls()
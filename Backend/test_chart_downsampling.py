@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""Test chart downsampling and paged access to the full data"""
+import numpy as np
+from Backend.analytics.downsample import downsample, lttb_indices
+from Backend.agent.result_store import ResultStore
+
+
+def series(count):
+    return [{"label": f"2024-{i:05d}", "value": str(round(np.sin(i / 200) * 100, 2))} for i in range(count)]
+
+
+def test_lttb_keeps_shape():
+    data = series(10000)
+    data[4321]["value"] = "5000"  # a spike must survive downsampling
+    points, method = downsample("line", data, max_points=300)
+
+    assert method == "lttb" and len(points) == 300
+    assert points[0] is data[0] and points[-1] is data[-1]
+    assert any(p["value"] == "5000" for p in points), "peak was dropped"
+    labels = [p["label"] for p in points]
+    assert labels == sorted(labels), "points must stay in order"
+    print(f"✅ LTTB kept {len(points)} of {len(data)} points including the spike")
+
+
+def test_lttb_small_series_untouched():
+    assert list(lttb_indices(np.arange(5.0), 10)) == [0, 1, 2, 3, 4]
+    data = series(20)
+    assert downsample("line", data) == (data, None)
+    print("✅ Small series returned as is")
+
+
+def test_scatter_binned():
+    data = [{"label": str(i), "value": str(i % 10)} for i in range(5000)]
+    points, method = downsample("scatter", data, max_points=100)
+
+    assert method == "binned_mean" and len(points) == 100
+    assert sum(p["count"] for p in points) == 5000
+    print("✅ Scatter points averaged into 100 bins")
+
+
+def test_pie_top_n_plus_other():
+    data = [{"label": f"Product {i}", "value": str(i)} for i in range(1, 41)]
+    points, method = downsample("pie", data, max_points=10)
+
+    assert method == "top_n_other" and len(points) == 10
+    assert [p["label"] for p in points[:9]] == [f"Product {i}" for i in range(32, 41)]
+    assert points[-1] == {"label": "Other (31)", "value": str(sum(range(1, 32)))}
+    print(f"✅ Pie folded to top 9 + {points[-1]['label']}")
+
+
+def test_result_store_pages_within_session():
+    store = ResultStore(max_results=2)
+    data = series(1200)
+    result_id = store.put("session-a", data)
+
+    page = store.page("session-a", result_id, offset=1000, limit=500)
+    assert page["total"] == 1200 and len(page["data"]) == 200 and page["data"][0] is data[1000]
+    assert store.page("session-b", result_id) is None, "results must not leak across sessions"
+
+    store.put("session-a", [])
+    store.put("session-a", [])
+    assert store.page("session-a", result_id) is None, "oldest result should be evicted"
+    print("✅ Full data paged, scoped to its session and evicted when the store is full")
+
+
+if __name__ == "__main__":
+    test_lttb_keeps_shape()
+    test_lttb_small_series_untouched()
+    test_scatter_binned()
+    test_pie_top_n_plus_other()
+    test_result_store_pages_within_session()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""Test that importing the entrypoint stays light and that import-time profiles parse"""
+import sys
+import json
+import tempfile
+import subprocess
+from Backend.benchmarks.bench_cold_start import COLD_START_BUDGET_MS, cold_start, median_ms
+from Backend.benchmarks.import_profile import parse
+
+HEAVY = ("strands", "boto3", "botocore", "numpy", "bedrock_agentcore.memory")
+
+
+def test_entrypoint_import_defers_heavy_modules():
+    check = f"import sys, json, Backend.main; print(json.dumps([m for m in {HEAVY!r} if m in sys.modules]))"
+    completed = subprocess.run([sys.executable, "-c", check], capture_output=True, text=True, check=True)
+    assert json.loads(completed.stdout.strip().splitlines()[-1]) == []
+    print("✅ import Backend.main loads none of strands, boto3, numpy or the memory client")
+
+
+def test_entrypoint_import_is_within_the_cold_start_budget():
+    # Each run has no memory ID cache, so a lookup during import would cost the simulated latency
+    cache_dir = tempfile.mkdtemp()
+    results = [cold_start(0.3, f"{cache_dir}/memory_id_{i}.json") for i in range(3)]
+    imported_ms = median_ms(results, "import_seconds")
+    assert all(result["aws_calls_during_import"] == 0 for result in results)
+    assert imported_ms <= COLD_START_BUDGET_MS, f"import Backend.main took {imported_ms:.0f} ms"
+    print(f"✅ import Backend.main took {imported_ms:.0f} ms, within the {COLD_START_BUDGET_MS} ms budget")
+
+
+def test_importtime_output_is_nested():
+    lines = ["import time: self [us] | cumulative | imported package",
+             "import time:       120 |        120 |     c",
+             "import time:       300 |        420 |   b",
+             "import time:        50 |        470 | a",
+             "import time:        10 |         10 | d"]
+    entries = {e["module"]: e for e in parse(lines)}
+    assert entries["c"]["parent"] is entries["b"] and entries["b"]["parent"] is entries["a"]
+    assert entries["d"]["parent"] is None and entries["a"]["cumulative_us"] == 470
+    print("✅ -X importtime lines parse into an import tree")
+
+
+if __name__ == "__main__":
+    test_entrypoint_import_defers_heavy_modules()
+    test_entrypoint_import_is_within_the_cold_start_budget()
+    test_importtime_output_is_nested()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""Test building conversation history from memory turns under a token budget"""
+import json
+from types import SimpleNamespace
+from Backend.memory.conversation_context import build_history, estimate_tokens, strip_data, summarize
+from Backend.memory.memory_hook import MemoryHookProvider
+from Backend.memory.turn_cache import turn_cache
+
+
+def turn(question, rows, explanation="Premium by zone", sql="SELECT zone, SUM(premium) FROM policies GROUP BY zone"):
+    answer = json.dumps({"type": "bar", "data": [{"zone": f"Z{i}", "premium": i * 1000} for i in range(rows)],
+                         "explanation": explanation, "query_executed": sql})
+    return [{"role": "USER", "content": {"text": question}}, {"role": "ASSISTANT", "content": {"text": answer}}]
+
+
+def test_data_arrays_are_removed():
+    reply = "Here you go:\n" + turn("q", 50)[1]["content"]["text"]
+    stripped = strip_data(reply)
+    assert stripped.startswith("Here you go:\n") and "[50 rows omitted]" in stripped
+    assert json.loads(stripped[stripped.index("{"):])["explanation"] == "Premium by zone"
+    assert strip_data("plain text answer") == "plain text answer"
+    assert summarize("ASSISTANT", reply).startswith("[bar answer, 50 rows] Premium by zone SQL: SELECT zone")
+    print(f"✅ A 50-row reply shrinks from {estimate_tokens(reply)} to {estimate_tokens(stripped)} tokens")
+
+
+def test_old_turns_are_summarized_within_budget():
+    turns = [turn(f"question {i}", 30, explanation="x" * 400) for i in range(5)]  # newest first
+    history = build_history(turns, budget_tokens=400, verbatim_turns=2)
+
+    assert [m["role"] for m in history] == ["user", "assistant"] * (len(history) // 2)
+    assert history[-2]["content"][0]["text"] == "question 0"
+    assert sum(estimate_tokens(m["content"][0]["text"]) for m in history) <= 400
+    # The two newest answers are verbatim without rows; older ones fell back to summaries
+    assert "rows omitted" in history[-1]["content"][0]["text"] and "rows omitted" in history[-3]["content"][0]["text"]
+    older = [m["content"][0]["text"] for m in history[:-4] if m["role"] == "assistant"]
+    assert older and all(text.startswith("[bar answer, 30 rows]") for text in older)
+    assert len(history) < 10
+    print(f"✅ {len(turns)} turns fit the budget as {len(history) // 2} turns, older ones summarized")
+
+
+def test_unanswered_question_keeps_roles_alternating():
+    turns = [[{"role": "USER", "content": {"text": "second"}}], turn("first", 1)]
+    history = build_history(turns)
+    assert [m["role"] for m in history] == ["user", "assistant"]
+    print("✅ A question without an answer doesn't break role alternation")
+
+
+def test_hook_adds_history_as_messages():
+    actor, session = "ctx_user", "x" * 33
+    turn_cache.put(actor, session, [turn("earlier question", 3)])
+    state = {"actor_id": actor, "session_id": session}
+    agent = SimpleNamespace(messages=[], system_prompt="static prompt", state=SimpleNamespace(get=state.get))
+    MemoryHookProvider(None, "mem").on_agent_initialized(SimpleNamespace(agent=agent))
+
+    assert agent.system_prompt == "static prompt"
+    assert [m["role"] for m in agent.messages] == ["user", "assistant"]
+    assert agent.messages[0]["content"][0]["text"] == "earlier question"
+    print("✅ History reaches the agent as messages and the system prompt stays static")
+
+
+if __name__ == "__main__":
+    test_data_arrays_are_removed()
+    test_old_turns_are_summarized_within_budget()
+    test_unanswered_question_keeps_roles_alternating()
+    test_hook_adds_history_as_messages()
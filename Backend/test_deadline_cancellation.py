@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""Test that request deadlines stop Athena queries and the agent loop within a bounded time"""
+import time
+import asyncio
+from types import SimpleNamespace
+from strands import Agent
+from strands.agent.state import AgentState
+from strands.models import Model
+from Backend.agent.deadline import Deadline, DeadlineExceeded, deadline_signal
+from Backend.agent.model_router import ModelRouter, STANDARD
+from Backend.tools import athena_query as athena_module
+from Backend.test_query_history import temp_history
+
+# Cancellation must land within this long after the deadline passes
+GRACE_SECONDS = 1.5
+
+
+class NeverFinishingAthena:
+    """Athena client whose queries stay RUNNING until stopped"""
+
+    def __init__(self):
+        self.stopped = []
+
+    def start_query_execution(self, **kwargs):
+        return {"QueryExecutionId": "query-1"}
+
+    def get_query_execution(self, QueryExecutionId):
+        state = "CANCELLED" if QueryExecutionId in self.stopped else "RUNNING"
+        return {"QueryExecution": {"Status": {"State": state}}}
+
+    def stop_query_execution(self, QueryExecutionId):
+        self.stopped.append(QueryExecutionId)
+
+
+class SlowModel(Model):
+    """Streams a long answer slowly, like a model writing a large response"""
+
+    def update_config(self, **model_config):
+        pass
+
+    def get_config(self):
+        return {}
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        raise NotImplementedError
+        yield
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        yield {"messageStart": {"role": "assistant"}}
+        yield {"contentBlockStart": {"start": {}}}
+        for _ in range(100):
+            await asyncio.sleep(0.1)
+            yield {"contentBlockDelta": {"delta": {"text": "token "}}}
+        yield {"contentBlockStop": {}}
+        yield {"messageStop": {"stopReason": "end_turn"}}
+
+
+def test_athena_query_stopped_at_deadline():
+    client = NeverFinishingAthena()
+    original_client = athena_module.boto3.client
+    athena_module.boto3.client = lambda *args, **kwargs: client
+    athena_module._client = None
+    athena_module.query_history, original_history = temp_history(), athena_module.query_history
+    try:
+        agent = SimpleNamespace(state=AgentState({"deadline": time.time() + 1}))
+        start = time.time()
+        result = athena_module.athena_query(sql="SELECT * FROM insurance_data", database="insurance_db", agent=agent)
+        elapsed = time.time() - start
+    finally:
+        athena_module.boto3.client = original_client
+        athena_module._client = None
+        athena_module.query_history = original_history
+
+    assert "deadline exceeded" in result
+    assert client.stopped == ["query-1"], "query execution was not stopped"
+    assert elapsed < 1 + GRACE_SECONDS, f"took {elapsed:.2f}s to cancel"
+    print(f"✅ Athena query stopped {elapsed:.2f}s after start (deadline 1s)")
+
+
+def test_expired_deadline_skips_query():
+    client = NeverFinishingAthena()
+    original_client = athena_module.boto3.client
+    athena_module.boto3.client = lambda *args, **kwargs: client
+    athena_module._client = None
+    try:
+        agent = SimpleNamespace(state=AgentState({"deadline": time.time() - 1}))
+        result = athena_module.athena_query(sql="SELECT 1", database="sentra_db", agent=agent)
+    finally:
+        athena_module.boto3.client = original_client
+
+    assert "not started" in result and client.stopped == []
+    print("✅ No query started once the deadline has passed")
+
+
+def test_agent_loop_cancelled_at_deadline():
+    router = ModelRouter(model_factory=lambda model_id: SlowModel())
+    agent = Agent(model=router.get_model(STANDARD), callback_handler=None)
+    deadline = Deadline.after(1)
+    start = time.time()
+    try:
+        with deadline_signal(deadline) as cancel_signal:
+            router.invoke(agent, "Show premium by agent", "Show premium by agent", tier=STANDARD,
+                          cancel_signal=cancel_signal)
+        raise AssertionError("agent ran to completion past its deadline")
+    except DeadlineExceeded:
+        elapsed = time.time() - start
+
+    assert elapsed < 1 + GRACE_SECONDS, f"took {elapsed:.2f}s to cancel"
+    print(f"✅ Agent loop cancelled {elapsed:.2f}s after start (deadline 1s, full answer needs 10s)")
+
+
+if __name__ == "__main__":
+    test_athena_query_stopped_at_deadline()
+    test_expired_deadline_skips_query()
+    test_agent_loop_cancelled_at_deadline()
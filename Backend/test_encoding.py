@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""Test the shared response encoder and content negotiation"""
+import gzip
+import json
+import datetime
+from decimal import Decimal
+import numpy as np
+from Backend.utils import encoding
+
+
+def test_encodes_decimal_datetime_and_numpy():
+    payload = {
+        "premium": Decimal("1250.50"),
+        "policies": Decimal("12"),
+        "issued": datetime.date(2025, 3, 1),
+        "updated": datetime.datetime(2025, 3, 1, 9, 30),
+        "values": np.array([1.5, 2.5]),
+        "count": np.int64(3),
+    }
+    decoded = json.loads(encoding.dumps(payload))
+
+    assert decoded == {"premium": 1250.5, "policies": 12, "issued": "2025-03-01",
+                       "updated": "2025-03-01T09:30:00", "values": [1.5, 2.5], "count": 3}
+    print("✅ Decimal, datetime and numpy values encoded")
+
+
+def test_negotiation():
+    assert encoding.negotiate_encoding("gzip, deflate") == "gzip"
+    assert encoding.negotiate_encoding("identity") is None
+    assert encoding.negotiate_encoding("gzip;q=0, deflate") is None
+    if encoding.brotli:
+        assert encoding.negotiate_encoding("gzip, deflate, br") == "br"
+        assert encoding.negotiate_encoding("br;q=0.5, gzip") == "gzip"
+    assert encoding.negotiate_format("application/json, */*") == encoding.JSON_MIMETYPE
+    print("✅ Accept-Encoding and Accept negotiated")
+
+
+def test_encode_body_compresses_large_bodies_only():
+    rows = {"rows": [{"agent": f"Agent {i}", "gwp": str(i * 1000)} for i in range(500)]}
+    body, headers = encoding.encode_body(rows, accept_encoding="gzip")
+    small, small_headers = encoding.encode_body({"status": "ok"}, accept_encoding="gzip")
+
+    assert headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(body)) == rows
+    assert "Content-Encoding" not in small_headers and json.loads(small) == {"status": "ok"}
+    print(f"✅ Large body gzipped to {len(body):,} bytes, small body left as is")
+
+
+def test_raw_json_relayed_and_msgpack_opt_in():
+    raw = b'{"type": "text", "data": "", "explanation": "Hello"}'
+    body, headers = encoding.encode_body(None, accept="application/json", raw_json=raw)
+    assert body is raw and headers["Content-Type"] == encoding.JSON_MIMETYPE
+
+    if encoding.msgpack:
+        body, headers = encoding.encode_body(None, accept="application/msgpack", raw_json=raw)
+        assert headers["Content-Type"] == encoding.MSGPACK_MIMETYPE
+        assert encoding.msgpack.unpackb(body) == json.loads(raw)
+    print("✅ Raw JSON relayed untouched; MessagePack only on request")
+
+
+if __name__ == "__main__":
+    test_encodes_decimal_datetime_and_numpy()
+    test_negotiation()
+    test_encode_body_compresses_large_bodies_only()
+    test_raw_json_relayed_and_msgpack_opt_in()
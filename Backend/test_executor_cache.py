@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""Test reusing a session's live agent across requests"""
+import time
+from types import SimpleNamespace
+from Backend.benchmarks.fakes import SCENARIOS, install_fakes
+from Backend.agent.executor_cache import ExecutorCache
+
+
+def fake_executor(session_id, messages=None):
+    return SimpleNamespace(actor_id="alice", session_id=session_id, agent=SimpleNamespace(messages=messages or []))
+
+
+def test_checkout_hands_an_executor_to_one_request():
+    cache = ExecutorCache()
+    executor = fake_executor("s1")
+    assert cache.checkout("alice", "s1") is None
+    cache.checkin(executor)
+    assert cache.checkout("alice", "s1") is executor
+    # Checked out: a concurrent request of the session gets its own agent
+    assert cache.checkout("alice", "s1") is None
+    stats = cache.snapshot()
+    assert stats["hits"] == 1 and stats["misses"] == 2 and stats["sessions"] == 0
+    print("✅ A cached executor is lent to one request at a time")
+
+
+def test_idle_capacity_and_memory_eviction():
+    cache = ExecutorCache(max_sessions=2, idle_seconds=0.05, max_rss_mb=0)
+    for session in ("s1", "s2", "s3"):
+        cache.checkin(fake_executor(session))
+    assert cache.checkout("alice", "s1") is None and cache.snapshot()["evicted"] == 1
+    time.sleep(0.06)
+    assert cache.checkout("alice", "s3") is None and cache.snapshot()["expired"] == 1
+
+    rss = {"mb": 100}
+    cache = ExecutorCache(max_rss_mb=500, memory_probe=lambda: rss["mb"])
+    for session in ("s1", "s2", "s3", "s4"):
+        cache.checkin(fake_executor(session))
+    rss["mb"] = 600
+    cache.checkin(fake_executor("s5"))
+    assert cache.snapshot()["sessions"] == 3 and cache.snapshot()["evicted_memory"] == 2
+    assert cache.checkout("alice", "s1") is None and cache.checkout("alice", "s5") is not None
+
+    # Alone in the cache, the executor being checked in is kept even under memory pressure
+    cache = ExecutorCache(max_rss_mb=500, memory_probe=lambda: 600)
+    executor = fake_executor("s1")
+    cache.checkin(executor)
+    assert cache.checkout("alice", "s1") is executor and cache.snapshot()["evicted_memory"] == 0
+    print("✅ Idle, least recently used and memory-pressure evictions")
+
+
+def test_failed_request_discards_its_executor():
+    install_fakes()
+    from Backend import main as entrypoint
+    from Backend.agent.executor_cache import executor_cache
+    payload = {"user_id": "failing.user", "session_id": "f" * 33, "user_query": SCENARIOS[0]["question"]}
+    entrypoint.main(dict(payload))
+    executor = executor_cache.checkout("failing_user", "f" * 33)
+    executor_cache.checkin(executor)
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("model unavailable")
+
+    executor.execute_sql = fail
+    discarded = executor_cache.snapshot()["discarded"]
+    assert "model unavailable" in entrypoint.main(dict(payload))["explanation"]
+    assert executor_cache.snapshot()["discarded"] == discarded + 1
+    assert executor_cache.checkout("failing_user", "f" * 33) is None
+    print("✅ An executor whose request failed is discarded, not reused")
+
+
+def test_checkin_trims_the_conversation():
+    answer = '{"type": "bar", "data": [{"label": "North", "value": "1"}], "explanation": "By zone"}'
+    messages = [
+        {"role": "user", "content": [{"text": "Total premium by zone?"}]},
+        {"role": "assistant", "content": [{"text": "Let me query that."}, {"toolUse": {"toolUseId": "t1"}}]},
+        {"role": "user", "content": [{"toolResult": {"toolUseId": "t1", "content": [{"text": "rows"}]}}]},
+        {"role": "assistant", "content": [{"text": answer}]},
+    ]
+    executor = fake_executor("s1", messages)
+    ExecutorCache().checkin(executor)
+
+    assert [m["role"] for m in executor.agent.messages] == ["user", "assistant"]
+    assert "1 rows omitted" in executor.agent.messages[1]["content"][0]["text"]
+    print("✅ Tool calls and row data are dropped from a cached agent's messages")
+
+
+def test_follow_up_question_reuses_the_agent():
+    fakes = install_fakes()
+    from Backend import main as entrypoint
+    payload = {"user_id": "reuse.user", "session_id": "r" * 33}
+    before = entrypoint.main({**payload, "action": "memory_stats"})
+    entrypoint.main({**payload, "user_query": SCENARIOS[0]["question"]})
+    entrypoint.main({**payload, "user_query": SCENARIOS[1]["question"]})
+    result = entrypoint.main({**payload, "user_query": SCENARIOS[2]["question"]})
+
+    after = entrypoint.main({**payload, "action": "memory_stats"})
+    # Only the first request loaded history; the others started from the live agent
+    assert fakes.memory.reads == 1 and result["type"] == "line"
+    assert after["turn_cache"]["misses"] - before["turn_cache"]["misses"] == 1
+    assert after["turn_cache"]["hits"] == before["turn_cache"]["hits"]
+    assert after["executor_cache"]["hits"] - before["executor_cache"]["hits"] == 2
+    print("✅ Follow-up questions skip memory loading entirely")
+
+
+if __name__ == "__main__":
+    test_checkout_hands_an_executor_to_one_request()
+    test_idle_capacity_and_memory_eviction()
+    test_failed_request_discards_its_executor()
+    test_checkin_trims_the_conversation()
+    test_follow_up_question_reuses_the_agent()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Test the queued JSON logging setup: structure, size caps, sampling and non-blocking enqueue"""
+import io
+import json
+import queue
+import logging
+from Backend.config import logger as log_config
+
+
+def capture(sample_rates=None):
+    stream = io.StringIO()
+    # Importing an entrypoint (e.g. another test module) may have configured logging already
+    log_config.stop_logging()
+    handler = log_config.configure_logging(stream=stream, sample_rates=sample_rates)
+    return stream, handler
+
+
+def records(stream):
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_json_records_with_capped_fields():
+    stream, _ = capture()
+    log = logging.getLogger("Backend.test")
+    try:
+        log.info("Query returned %d rows", 3, extra={"category": "sql", "sql": "SELECT " + "x" * 5000})
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            log.error("Query failed", exc_info=True)
+    finally:
+        log_config.stop_logging()
+
+    info, error = records(stream)
+    assert info["message"] == "Query returned 3 rows" and info["category"] == "sql"
+    assert len(info["sql"]) < log_config.MAX_FIELD_CHARS + 50 and info["sql"].endswith("chars]")
+    assert error["level"] == "ERROR" and "ValueError: boom" in error["exception"]
+    print("✅ Records are JSON with capped fields and tracebacks")
+
+
+def test_sampling_keeps_warnings():
+    stream, _ = capture(sample_rates={"payload": 0.0})
+    log = logging.getLogger("Backend.test")
+    try:
+        for _ in range(50):
+            log.info("payload", extra={"category": "payload", "payload": {"a": 1}})
+        log.warning("payload problem", extra={"category": "payload"})
+        log.info("unsampled category", extra={"category": "sql"})
+    finally:
+        log_config.stop_logging()
+
+    assert [r["message"] for r in records(stream)] == ["payload problem", "unsampled category"]
+    print("✅ Sampled category dropped, warnings and other categories kept")
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = log_config.NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    log = logging.getLogger("Backend.test.full")
+    log.propagate = False
+    log.addHandler(handler)
+    try:
+        for _ in range(3):
+            log.warning("record")
+    finally:
+        log.removeHandler(handler)
+
+    assert handler.dropped == 2
+    print("✅ Full queue drops records without blocking")
+
+
+if __name__ == "__main__":
+    test_json_records_with_capped_fields()
+    test_sampling_keeps_warnings()
+    test_full_queue_drops_instead_of_blocking()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""Test the memory backends offline: turn lookup, user and session isolation, and backend selection"""
+import os
+import tempfile
+import threading
+from Backend.benchmarks.fakes import SCENARIOS, install_fakes
+from Backend.memory import memory_backends, memory_setup
+from Backend.memory.memory_backends import AgentCoreMemoryBackend, SQLiteMemoryBackend
+
+
+def sqlite_backend():
+    return SQLiteMemoryBackend(os.path.join(tempfile.mkdtemp(), "memory.db"))
+
+
+def texts(turns):
+    return [[message["content"]["text"] for message in turn] for turn in turns]
+
+
+def test_last_k_turns_newest_first():
+    backend = sqlite_backend()
+    backend.create_event("mem", "alice", "s1", [("q1", "user"), ("a1", "assistant")], event_timestamp=1.0)
+    backend.create_event("mem", "alice", "s1", [("q2", "user")], event_timestamp=2.0)
+    backend.create_event("mem", "alice", "s1", [("a2", "assistant"), ("q3", "user")], event_timestamp=3.0)
+
+    assert texts(backend.get_last_k_turns("mem", "alice", "s1", k=5)) == [["q3"], ["q2", "a2"], ["q1", "a1"]]
+    assert texts(backend.get_last_k_turns("mem", "alice", "s1", k=2)) == [["q3"], ["q2", "a2"]]
+    assert backend.get_last_k_turns("mem", "alice", "s1", k=1)[0][0]["role"] == "USER"
+    print("✅ Turns come back newest first, k at most, in get_last_k_turns' shape")
+
+
+def test_lookup_uses_the_session_index():
+    backend = sqlite_backend()
+    plan = backend._connection().execute(
+        "EXPLAIN QUERY PLAN SELECT role, text FROM memory_messages WHERE memory_id = ? AND actor_id = ? "
+        "AND session_id = ? ORDER BY event_timestamp DESC, id DESC", ("mem", "alice", "s1")).fetchall()
+    detail = " ".join(row[-1] for row in plan)
+    assert "memory_messages_session" in detail and "TEMP B-TREE" not in detail
+    assert backend._connection().execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    print("✅ A session's turns are an index range scan, without a sort, on a WAL database")
+
+
+def test_actors_sessions_and_memories_are_isolated():
+    backend = sqlite_backend()
+    for memory_id, actor, session in (("mem", "alice", "s1"), ("mem", "alice", "s2"), ("mem", "bob", "s1"),
+                                      ("other", "alice", "s1")):
+        backend.create_event(memory_id, actor, session, [(f"{memory_id}/{actor}/{session}", "user")])
+
+    assert texts(backend.get_last_k_turns("mem", "alice", "s1")) == [["mem/alice/s1"]]
+    assert texts(backend.get_last_k_turns("mem", "bob", "s1")) == [["mem/bob/s1"]]
+    assert texts(backend.get_last_k_turns("other", "alice", "s1")) == [["other/alice/s1"]]
+    assert backend.get_last_k_turns("mem", "carol", "s1") == []
+    print("✅ Each (memory, actor, session) sees only its own events")
+
+
+def test_concurrent_writers_and_readers():
+    path = os.path.join(tempfile.mkdtemp(), "memory.db")
+    writer, reader = SQLiteMemoryBackend(path), SQLiteMemoryBackend(path)  # as two processes sharing the file
+    errors = []
+
+    def write(actor):
+        try:
+            for i in range(50):
+                writer.create_event("mem", actor, "s1", [(f"q{i}", "user"), (f"a{i}", "assistant")])
+                reader.get_last_k_turns("mem", actor, "s1")
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(f"user{n}",)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    for n in range(4):
+        assert texts(reader.get_last_k_turns("mem", f"user{n}", "s1", k=1)) == [["q49", "a49"]]
+    print("✅ Threads and connections write and read the same file concurrently")
+
+
+def test_request_path_keeps_users_apart():
+    backend = sqlite_backend()
+    install_fakes(memory=backend)
+    from Backend import main as entrypoint
+    alice = {"user_id": "alice@example.com", "session_id": "a" * 33}
+    bob = {"user_id": "bob@example.com", "session_id": "b" * 33}
+    entrypoint.main({**alice, "user_query": SCENARIOS[0]["question"]})
+    entrypoint.main({**bob, "user_query": SCENARIOS[1]["question"]})
+    entrypoint.memory_writer.flush(timeout=5)
+
+    alice_turns = backend.get_last_k_turns(memory_setup.get_memory_id(), "alice_at_example_com", "a" * 33)
+    bob_turns = backend.get_last_k_turns(memory_setup.get_memory_id(), "bob_at_example_com", "b" * 33)
+    assert len(alice_turns) == len(bob_turns) == 1
+    assert SCENARIOS[0]["question"] in alice_turns[0][0]["content"]["text"]
+    assert SCENARIOS[1]["question"] in bob_turns[0][0]["content"]["text"]
+    print("✅ Two users' requests land in their own sessions of the local memory")
+
+
+def test_backend_is_chosen_by_memory_backend():
+    class StubClient:
+        def get_last_k_turns(self, memory_id, actor_id, session_id, k):
+            return [[{"role": "USER", "content": {"text": f"{memory_id}/{actor_id}/{session_id}/{k}"}}]]
+
+    agentcore = AgentCoreMemoryBackend("ap-south-1", client=StubClient())
+    assert texts(agentcore.get_last_k_turns("mem", "alice", "s1", k=3)) == [["mem/alice/s1/3"]]
+
+    saved = memory_setup.MEMORY_BACKEND, memory_setup._client, memory_setup._backend, memory_setup._memory_id
+    memory_backends.SQLITE_PATH = os.path.join(tempfile.mkdtemp(), "memory.db")
+    memory_setup.MEMORY_BACKEND = "sqlite"
+    memory_setup._client, memory_setup._backend, memory_setup._memory_id = None, None, None
+    os.environ.pop(memory_setup.MEMORY_ID_ENV, None)
+    try:
+        assert memory_setup.get_backend().path == memory_backends.SQLITE_PATH
+        assert memory_setup.get_memory_id() == memory_setup.memory_name
+        assert memory_setup._client is None
+    finally:
+        memory_setup.MEMORY_BACKEND, memory_setup._client, memory_setup._backend, memory_setup._memory_id = saved
+
+    # The AgentCore backend wraps the MemoryClient that get_client() still returns
+    client = StubClient()
+    memory_setup.configure(client=client)
+    try:
+        assert memory_setup.get_client() is client and memory_setup.get_backend().client is client
+    finally:
+        memory_setup.MEMORY_BACKEND, memory_setup._client, memory_setup._backend, memory_setup._memory_id = saved
+    print("✅ MEMORY_BACKEND=sqlite needs no AWS client and no memory lookup")
+
+
+if __name__ == "__main__":
+    test_last_k_turns_newest_first()
+    test_lookup_uses_the_session_index()
+    test_actors_sessions_and_memories_are_isolated()
+    test_concurrent_writers_and_readers()
+    test_request_path_keeps_users_apart()
+    test_backend_is_chosen_by_memory_backend()
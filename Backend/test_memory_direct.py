@@ -1,11 +1,12 @@
 #!/usr/bin/env python3
 """Direct test of memory client isolation"""
 import time
-from memory.memory_setup import client, memory_id
+from Backend.memory.memory_setup import get_client, get_memory_id
 
 def test_memory_isolation():
     """Test that memory client properly isolates by session_id"""
     
+    client, memory_id = get_client(), get_memory_id()
     actor_id = "test_actor"
     session_1 = f"direct_test_session_1_{int(time.time())}"
     session_2 = f"direct_test_session_2_{int(time.time())}"
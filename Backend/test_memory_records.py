@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Test compact memory records and rehydrating their rows"""
+import json
+from Backend.agent.result_store import result_store
+from Backend.benchmarks.fakes import SCENARIOS, install_fakes
+from Backend.memory import memory_records
+from Backend.memory.memory_records import compact, decode, expand
+from Backend.memory.memory_writer import memory_writer
+
+
+def answer(rows):
+    return json.dumps({"type": "bar", "data": [{"label": f"Zone {i}", "value": i * 1000.5} for i in range(rows)],
+                       "explanation": "Total premium by zone", "customer_specific": "False",
+                       "query_executed": "SELECT zone, SUM(premium) FROM policies WHERE year = 2024 GROUP BY zone"})
+
+
+def test_answers_become_small_records_with_a_result_handle():
+    text = answer(500)
+    stored = compact("s" * 33, text, question="Total premium by zone?", database="insurance_db")
+    record = decode(stored)
+
+    assert record["rows"] == 500 and result_store.get("s" * 33, record["result_id"])[0]["label"] == "Zone 0"
+    assert record["fingerprint"] and record["database"] == "insurance_db" and "data" not in record
+    assert len(stored) < len(text) / 20
+    assert json.loads(expand(stored))["data"] == "[500 rows omitted]"
+    # The rows go under the id the caller gives, so the response can point to the same record
+    again = decode(compact("s" * 33, text, result_id="answer-1"))
+    assert again["result_id"] == "answer-1" and len(result_store.get("s" * 33, "answer-1")) == 500
+    assert compact("s" * 33, "Which year do you mean?") == "Which year do you mean?"
+    print(f"✅ A 500-row answer is stored in {len(stored)} bytes instead of {len(text)}")
+
+
+def test_compressed_records_round_trip():
+    memory_records.RECORD_COMPRESSION, compress_bytes = True, memory_records.RECORD_COMPRESS_BYTES
+    memory_records.RECORD_COMPRESS_BYTES = 10
+    try:
+        stored = compact("s" * 33, answer(3), question="q" * 400)
+    finally:
+        memory_records.RECORD_COMPRESSION, memory_records.RECORD_COMPRESS_BYTES = False, compress_bytes
+    assert stored.startswith(memory_records.COMPRESSED_PREFIX)
+    assert decode(stored)["question"] == "q" * 400
+    print("✅ Compressed records decode to the same record")
+
+
+def test_fetch_data_rehydrates_a_result_this_instance_lost():
+    fakes = install_fakes()
+    from Backend import main as entrypoint
+    payload = {"user_id": "rehydrate.user", "session_id": "r" * 33}
+    result = entrypoint.main({**payload, "user_query": SCENARIOS[1]["question"]})
+    assert memory_writer.flush(timeout=5)
+    record = decode(fakes.memory.events[("rehydrate_user", "r" * 33)][-1][0]["content"]["text"])
+    assert record["database"] == SCENARIOS[1]["database"]
+
+    result_store._results.clear()
+    queries = len(fakes.athena.executions)
+    page = entrypoint.main({**payload, "action": "fetch_data", "result_id": record["result_id"]})
+    assert page["total"] == len(result["data"]) and len(fakes.athena.executions) == queries + 1
+    print("✅ fetch_data re-runs the recorded SQL when the cached rows are gone")
+
+
+def test_downsampled_result_id_is_the_memory_record_id():
+    fakes = install_fakes()
+    from Backend import main as entrypoint
+    from Backend.analytics import downsample
+    payload = {"user_id": "downsample.user", "session_id": "d" * 33}
+    max_line_points = downsample.MAX_POINTS["line"]
+    downsample.MAX_POINTS["line"] = 10
+    try:
+        result = entrypoint.main({**payload, "user_query": SCENARIOS[2]["question"]})
+    finally:
+        downsample.MAX_POINTS["line"] = max_line_points
+    assert memory_writer.flush(timeout=5)
+    result_id = result["downsampled"]["result_id"]
+    record = decode(fakes.memory.events[("downsample_user", "d" * 33)][-1][0]["content"]["text"])
+    assert record["result_id"] == result_id
+    assert len([key for key, entry in result_store._results.items() if entry[0] == "d" * 33]) == 1
+
+    result_store._results.clear()
+    page = entrypoint.main({**payload, "action": "fetch_data", "result_id": result_id})
+    assert page["result_id"] == result_id and page["total"] == result["downsampled"]["original_points"]
+    print("✅ The downsampled response's result_id can be fetched after the store lost it")
+
+
+if __name__ == "__main__":
+    test_answers_become_small_records_with_a_result_handle()
+    test_compressed_records_round_trip()
+    test_fetch_data_rehydrates_a_result_this_instance_lost()
+    test_downsampled_result_id_is_the_memory_record_id()
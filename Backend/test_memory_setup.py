@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Test lazy memory ID resolution: env var, then the cache file, then a single lookup"""
+import os
+import tempfile
+import threading
+from Backend.memory import memory_setup
+
+
+class LookupClient:
+    def __init__(self, memories=()):
+        self.memories = list(memories)
+        self.calls = []
+
+    def list_memories(self):
+        self.calls.append("list_memories")
+        return self.memories
+
+    def create_memory_and_wait(self, name, **kwargs):
+        self.calls.append("create_memory_and_wait")
+        return {"id": f"{name}-created"}
+
+
+def fresh(client):
+    """Reset memory_setup to a cold process with an empty cache file"""
+    memory_setup.MEMORY_ID_CACHE = os.path.join(tempfile.mkdtemp(), "memory_id.json")
+    memory_setup._memory_id = None
+    memory_setup.configure(client=client)
+    os.environ.pop(memory_setup.MEMORY_ID_ENV, None)
+
+
+def test_lookup_runs_once_and_fills_the_cache():
+    client = LookupClient([{"id": "Other-1"}, {"id": f"{memory_setup.memory_name}-abc"}])
+    fresh(client)
+    threads = [threading.Thread(target=memory_setup.get_memory_id) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert memory_setup.get_memory_id() == f"{memory_setup.memory_name}-abc"
+    assert client.calls == ["list_memories"]
+
+    # The next process reads the cache file instead of calling AWS
+    memory_setup._memory_id = None
+    assert memory_setup.get_memory_id() == f"{memory_setup.memory_name}-abc"
+    assert client.calls == ["list_memories"]
+    print("✅ Concurrent first calls share one lookup; the next cold start uses the cache file")
+
+
+def test_env_var_wins_and_missing_memory_is_created():
+    client = LookupClient()
+    fresh(client)
+    os.environ[memory_setup.MEMORY_ID_ENV] = "from-env"
+    try:
+        assert memory_setup.get_memory_id() == "from-env" and client.calls == []
+    finally:
+        os.environ.pop(memory_setup.MEMORY_ID_ENV)
+
+    memory_setup.invalidate()
+    assert memory_setup.get_memory_id() == f"{memory_setup.memory_name}-created"
+    assert client.calls == ["list_memories", "create_memory_and_wait"]
+    print("✅ AGENT_MEMORY_ID skips the lookup; a missing memory resource is created once")
+
+
+def test_background_resolution_and_invalidate():
+    client = LookupClient([{"id": f"{memory_setup.memory_name}-bg"}])
+    fresh(client)
+    memory_setup.resolve_in_background().join()
+    assert memory_setup._memory_id == f"{memory_setup.memory_name}-bg"
+
+    memory_setup.invalidate()
+    client.memories = [{"id": f"{memory_setup.memory_name}-new"}]
+    assert memory_setup.get_memory_id() == f"{memory_setup.memory_name}-new"
+    assert client.calls == ["list_memories", "list_memories"]
+    print("✅ Startup resolves in the background; invalidate() forces a fresh lookup")
+
+
+if __name__ == "__main__":
+    test_lookup_runs_once_and_fills_the_cache()
+    test_env_var_wins_and_missing_memory_is_created()
+    test_background_resolution_and_invalidate()
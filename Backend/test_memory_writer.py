@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Test batched background memory writes and which messages MemoryHookProvider keeps"""
+import time
+import threading
+from types import SimpleNamespace
+from Backend.memory.memory_hook import MemoryHookProvider
+from Backend.memory.memory_writer import MemoryWriter, memory_writer
+from Backend.memory.memory_records import decode
+
+
+class SlowMemoryClient:
+    """create_event blocks until released, and fails the first `failures` calls"""
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.events = []
+        self.release = threading.Event()
+
+    def create_event(self, memory_id, actor_id, session_id, messages):
+        self.release.wait(5)
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("throttled")
+        self.events.append((actor_id, session_id, list(messages)))
+
+
+def test_queued_messages_are_batched_per_session():
+    client = SlowMemoryClient()
+    writer = MemoryWriter(backoff_seconds=0)
+    writer.submit(client, "mem", "alice", "s1", "first", "user")
+    time.sleep(0.05)  # The worker picks "first" up and blocks on it
+    for text, session in (("a", "s1"), ("b", "s2"), ("c", "s1")):
+        writer.submit(client, "mem", "alice", session, text, "user")
+    client.release.set()
+
+    assert writer.flush(timeout=5)
+    assert client.events == [("alice", "s1", [("first", "user")]),
+                             ("alice", "s1", [("a", "user"), ("c", "user")]),
+                             ("alice", "s2", [("b", "user")])]
+    assert writer.snapshot()["events"] == 3 and writer.snapshot()["written"] == 4
+    print("✅ Four messages written as three create_event calls, in order per session")
+
+
+def test_failed_writes_are_retried_with_backoff():
+    client = SlowMemoryClient(failures=2)
+    client.release.set()
+    writer = MemoryWriter(retries=3, backoff_seconds=0.01)
+    start = time.perf_counter()
+    writer.submit(client, "mem", "alice", "s1", "hello", "user")
+    assert writer.flush(client, "mem", "alice", "s1", timeout=5)
+
+    assert client.events == [("alice", "s1", [("hello", "user")])]
+    assert writer.snapshot()["retries"] == 2 and time.perf_counter() - start >= 0.03
+    print("✅ Throttled writes are retried with growing delays")
+
+
+def texts(client):
+    return [text for _, _, messages in client.events for text, _ in messages]
+
+
+def test_full_queue_waits_for_room_and_close_flushes():
+    client = SlowMemoryClient()
+    writer = MemoryWriter(max_queue=1)
+    writer.submit(client, "mem", "alice", "s1", "one", "user")
+    time.sleep(0.05)
+    writer.submit(client, "mem", "alice", "s1", "two", "user")  # queued behind the blocked worker
+    threading.Timer(0.1, client.release.set).start()
+    start = time.perf_counter()
+    writer.submit(client, "mem", "alice", "s1", "three", "user")  # queue full: waits for the worker
+
+    assert time.perf_counter() - start >= 0.05
+    writer.close(timeout=5)
+    assert texts(client) == ["one", "two", "three"]
+    stats = writer.snapshot()
+    assert stats["inline"] == 0 and stats["pending"] == 0 and stats["failed"] == 0
+    print("✅ A full queue pushes back on the caller instead of dropping; close() flushes the rest")
+
+
+def test_inline_write_keeps_the_session_order():
+    blocked, client = SlowMemoryClient(), SlowMemoryClient()
+    client.release.set()
+    writer = MemoryWriter(max_queue=1, full_wait_seconds=0.2)
+    writer.submit(blocked, "mem", "bob", "s2", "other", "user")
+    time.sleep(0.05)  # The worker blocks on bob's write
+    writer.submit(client, "mem", "alice", "s1", "one", "user")  # fills the queue
+    threading.Timer(0.3, blocked.release.set).start()
+    # No room within 0.2s, so "two" is written inline, once "one" is written at about 0.3s
+    writer.submit(client, "mem", "alice", "s1", "two", "user")
+
+    assert writer.flush(timeout=5)
+    assert texts(client) == ["one", "two"] and writer.snapshot()["inline"] == 1
+    print("✅ An inline write waits for its session's queued messages, so memory keeps the order")
+
+
+def test_hook_skips_tool_messages():
+    client = SlowMemoryClient()
+    client.release.set()
+    hook = MemoryHookProvider(client, "mem")
+    state = {"actor_id": "alice", "session_id": "s" * 33}
+    messages = [
+        {"role": "user", "content": [{"text": "Total premium by zone?"}]},
+        {"role": "assistant", "content": [{"text": "Let me query that."}, {"toolUse": {"toolUseId": "t1"}}]},
+        {"role": "user", "content": [{"toolResult": {"toolUseId": "t1", "content": []}}]},
+        {"role": "assistant", "content": [{"text": "{\"type\": \"bar\"}"}]},
+    ]
+    for i in range(len(messages)):
+        agent = SimpleNamespace(messages=messages[:i + 1], state=SimpleNamespace(get=state.get))
+        hook.on_message_added(SimpleNamespace(agent=agent))
+
+    assert memory_writer.flush(timeout=5)
+    saved = [text for _, _, batch in client.events for text, _ in batch]
+    assert saved[0] == "Total premium by zone?" and decode(saved[1])["type"] == "bar" and len(saved) == 2
+    print("✅ Tool calls and tool results never reach memory")
+
+
+if __name__ == "__main__":
+    test_queued_messages_are_batched_per_session()
+    test_failed_writes_are_retried_with_backoff()
+    test_full_queue_waits_for_room_and_close_flushes()
+    test_inline_write_keeps_the_session_order()
+    test_hook_skips_tool_messages()
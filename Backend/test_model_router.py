@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""Test model tiering and escalation offline against stubbed models"""
+import json
+from strands import Agent
+from strands.models import Model
+from Backend.agent.model_router import FAST, STANDARD, ModelRouter
+from Backend.benchmarks.fakes import InMemoryMemoryClient
+from Backend.memory.memory_hook import MemoryHookProvider
+from Backend.memory.memory_records import decode
+from Backend.memory.memory_writer import memory_writer
+from Backend.memory.turn_cache import turn_cache
+
+
+class StubModel(Model):
+    """Replies with a fixed text on every call"""
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.calls = 0
+
+    def update_config(self, **model_config):
+        pass
+
+    def get_config(self):
+        return {}
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        raise NotImplementedError
+        yield
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        self.calls += 1
+        yield {"messageStart": {"role": "assistant"}}
+        yield {"contentBlockStart": {"start": {}}}
+        yield {"contentBlockDelta": {"delta": {"text": self.reply}}}
+        yield {"contentBlockStop": {}}
+        yield {"messageStop": {"stopReason": "end_turn"}}
+        yield {"metadata": {"usage": {"inputTokens": 100, "outputTokens": 20, "totalTokens": 120},
+                            "metrics": {"latencyMs": 1}}}
+
+
+VALID = json.dumps({"type": "text", "data": "42", "explanation": "There are 42 customers.",
+                    "customer_specific": "False", "query_executed": "SELECT COUNT(*) FROM dm_customer_master"})
+INVALID = '{"type": "bar", "data": "not a list", "explanation": "oops"}'
+
+
+def make_router(fast_reply, standard_reply):
+    models = {"fast-model": StubModel(fast_reply), "standard-model": StubModel(standard_reply)}
+    router = ModelRouter(fast_model_id="fast-model", standard_model_id="standard-model",
+                         model_factory=lambda model_id: models[model_id])
+    return router, models
+
+
+def test_classification():
+    router, _ = make_router(VALID, VALID)
+    assert router.classify("How many customers do we have?") == FAST
+    assert router.classify("Show details for customer CIF123") == FAST
+    assert router.classify("Show premium by agent") == STANDARD
+    assert router.classify("Which zone has the least sales") == STANDARD
+    assert router.classify("Compare loan balances across branches") == STANDARD
+    print("✅ Simple questions route to fast tier, insurance/multi-step to standard")
+
+
+def test_fast_answer_is_kept():
+    router, models = make_router(VALID, VALID)
+    agent = Agent(model=models["standard-model"], callback_handler=None)
+    sql_dict, tier = router.invoke(agent, "User Request: How many customers?", "How many customers?", "s1")
+    assert tier == FAST and sql_dict["data"] == "42"
+    assert models["standard-model"].calls == 0
+    assert router.snapshot()[FAST]["calls"] == 1
+    assert router.snapshot()[FAST]["input_tokens"] == 100
+    print("✅ Valid fast-tier answer returned without touching the standard model")
+
+
+def test_escalation_on_invalid_output():
+    router, models = make_router(INVALID, VALID)
+    agent = Agent(model=models["standard-model"], callback_handler=None)
+    sql_dict, tier = router.invoke(agent, "User Request: How many customers?", "How many customers?", "s2")
+    assert tier == STANDARD and sql_dict["data"] == "42"
+    # The failed attempt is dropped from the conversation
+    assert len(agent.messages) == 2
+    snapshot = router.snapshot()
+    assert snapshot[FAST]["escalations"] == 1 and snapshot[STANDARD]["calls"] == 1
+    # Later questions in the same session go straight to the standard model
+    assert router.classify("How many customers?", "s2") == STANDARD
+    print("✅ Invalid fast-tier answer escalated to standard model")
+
+
+def test_rejected_attempt_never_reaches_memory():
+    router, models = make_router(INVALID, VALID)
+    memory = InMemoryMemoryClient()
+    hook = MemoryHookProvider(memory, "mem")
+    agent = Agent(model=models["standard-model"], callback_handler=None, hooks=[hook],
+                  state={"actor_id": "alice", "session_id": "s3"})
+    router.invoke(agent, "User Request: How many customers?", "How many customers?", "s3", memory=hook)
+    assert memory_writer.flush(timeout=5)
+
+    saved = [message["content"]["text"] for event in memory.events[("alice", "s3")] for message in event]
+    assert saved[0] == "User Request: How many customers?" and len(saved) == 2
+    assert decode(saved[1])["type"] == "text"
+    cached = [message["content"]["text"] for turn in turn_cache.get("alice", "s3") for message in turn]
+    assert cached == saved
+    print("✅ The fast tier's rejected answer is kept out of memory and the turn cache")
+
+
+if __name__ == "__main__":
+    test_classification()
+    test_fast_answer_is_kept()
+    test_escalation_on_invalid_output()
+    test_rejected_attempt_never_reaches_memory()
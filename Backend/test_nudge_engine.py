@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Test the nudge facts computed from grouped insurance results"""
+from Backend.analytics.nudge_engine import compute_nudge_facts, format_facts, period_key, rows_for_entities
+
+
+def close(a, b):
+    return abs(a - b) < 1e-9
+
+
+def zone_rows():
+    values = {"North": 500, "South": 100, "East": 300, "West": 200, "Central": 400, "Island": 50}
+    return [{"zone": zone, "total_premium": str(value)} for zone, value in values.items()]
+
+
+def test_bottom_n_mean_median_and_share():
+    facts = compute_nudge_facts(zone_rows(), {"zone": "varchar", "total_premium": "double"})
+
+    assert facts["measure"] == "total_premium" and facts["entity_column"] == "zone"
+    assert facts["entity_count"] == 6 and facts["total"] == 1550
+    assert close(facts["mean"], 1550 / 6) and facts["median"] == 250
+    assert facts["top"] == {"entity": "North", "value": 500}
+    # 6-15 entities: the lowest two
+    assert [(entry["rank"], entry["entity"]) for entry in facts["bottom"]] == [(1, "Island"), (2, "South")]
+    island = facts["bottom"][0]
+    assert close(island["gap_vs_mean_pct"], (50 - 1550 / 6) / (1550 / 6) * 100)
+    assert close(island["gap_vs_median_pct"], -80.0)
+    assert close(island["gap_vs_top_pct"], -90.0)
+    assert close(island["share_of_total_pct"], 50 / 1550 * 100)
+    assert "mom_change_pct" not in island
+    print("✅ Bottom-N, gaps to mean, median and top, and share of total")
+
+
+def test_month_over_month_orders_unpadded_periods():
+    rows = []
+    for agent, (august, september, october) in {"Agent A": (90, 100, 300), "Agent B": (500, 600, 650),
+                                               "Agent C": (800, 900, 700)}.items():
+        rows += [{"agent_name": agent, "issue_month": "2024-8", "premium": str(august)},
+                 {"agent_name": agent, "issue_month": "2024-9", "premium": str(september)},
+                 {"agent_name": agent, "issue_month": "2024-10", "premium": str(october)}]
+    facts = compute_nudge_facts(rows)
+
+    assert facts["mom_periods"] == ("2024-9", "2024-10")
+    assert facts["bottom"][0]["entity"] == "Agent A"
+    assert close(facts["bottom"][0]["mom_change_pct"], 200.0)
+    assert "+200.0% 2024-9→2024-10" in format_facts(facts)
+    print("✅ Month-over-month compares the last two months in calendar order")
+
+
+def test_period_keys():
+    assert period_key("2024-9") < period_key("2024-10") < period_key("2025-1")
+    assert period_key("2024-9") == period_key("2024-09")
+    assert period_key("2024-09-02") > period_key("2024-09-01 23:00:00")
+    assert period_key("2024-Q1") < period_key("2024-Q2")
+    assert period_key("") < period_key("2020")
+    print("✅ Period labels sort chronologically, padded or not")
+
+
+def test_results_without_an_entity_shape():
+    assert compute_nudge_facts([{"customers": "500"}]) is None
+    assert compute_nudge_facts([{"name": "a"}, {"name": "b"}]) is None
+    assert compute_nudge_facts([{"zone": "North", "total": "1"}, {"zone": "North", "total": "2"}]) is None
+    print("✅ Single values, rows without numbers and single entities give no facts")
+
+
+def test_format_facts_and_rows_for_entities():
+    facts = compute_nudge_facts(zone_rows())
+    text = format_facts(facts)
+    assert text.startswith("NUDGE FACTS for total_premium by zone")
+    assert "Total: 1,550 | Mean: 258.33 | Median: 250 | Top: North (500)" in text
+    assert "1. Island: 50 (-80.6% vs mean, -80.0% vs median, -90.0% vs top, 3.2% of total)" in text
+
+    supporting = [{"zone": "Island", "policies": "3"}, {"zone": "North", "policies": "40"}]
+    assert rows_for_entities(supporting, ["Island", "South"]) == supporting[:1]
+    assert rows_for_entities(supporting, ["Nowhere"]) == supporting
+    assert len(rows_for_entities(supporting * 40, ["North"], limit=5)) == 5
+    print("✅ Facts render as the model's block; supporting rows are narrowed to the bottom entities")
+
+
+if __name__ == "__main__":
+    test_bottom_n_mean_median_and_share()
+    test_month_over_month_orders_unpadded_periods()
+    test_period_keys()
+    test_results_without_an_entity_shape()
+    test_format_facts_and_rows_for_entities()
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""Test a full request through main.main offline, against the benchmark stand-ins"""
+import asyncio
+from Backend.benchmarks.fakes import SCENARIOS, install_fakes
+from Backend.memory.memory_writer import memory_writer
+
+
+def test_sync_request_runs_the_whole_path():
+    fakes = install_fakes()
+    from Backend import main as entrypoint
+    payload = {"user_query": SCENARIOS[1]["question"], "user_id": "offline.user", "session_id": "o" * 33}
+    result = entrypoint.main(payload)
+
+    assert result["type"] == "bar" and len(result["data"]) == 5
+    assert "trend" in result and result["metadata"]["usage"]["tool_calls"] == 1
+    # The question and the final answer were saved to memory, the tool call and its result weren't
+    assert memory_writer.flush(timeout=5)
+    messages = [message for event in fakes.memory.events[("offline_user", "o" * 33)] for message in event]
+    assert [message["role"] for message in messages] == ["USER", "ASSISTANT"]
+    print("✅ main.main runs model, Athena and memory stand-ins end to end")
+
+
+def test_stream_request_ends_with_data():
+    install_fakes()
+    from Backend import main as entrypoint
+    payload = {"user_query": SCENARIOS[0]["question"], "user_id": "offline.user", "session_id": "p" * 33,
+               "stream": True}
+
+    async def consume():
+        return [event async for event in entrypoint.main(payload)]
+
+    events = asyncio.run(consume())
+    assert events[0] == {"event": "progress", "stage": "started"}
+    assert events[-1]["event"] == "data" and events[-1]["response"]["data"] == "500"
+    print("✅ Streaming request yields progress events and the final response")
+
+
+if __name__ == "__main__":
+    test_sync_request_runs_the_whole_path()
+    test_stream_request_ends_with_data()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Test the Flask proxy's Prometheus metrics: route/stage latency, errors, sizes, in-flight and cache hits"""
+import io
+import json
+from types import SimpleNamespace
+from prometheus_client import REGISTRY
+from Backend import Agent_Trigger as trigger
+
+AGENT_RESPONSE = {"type": "text", "data": "", "explanation": "x" * 2000, "customer_specific": "False",
+                  "query_executed": ""}
+
+
+class FakeAgentCore:
+    def __init__(self, stream=False):
+        self.stream = stream
+
+    def invoke_agent_runtime(self, **kwargs):
+        if self.stream:
+            return {"contentType": "text/event-stream",
+                    "response": SimpleNamespace(iter_lines=lambda chunk_size: iter([b'data: {"event": "done"}']))}
+        return {"contentType": "application/json", "response": io.BytesIO(json.dumps(AGENT_RESPONSE).encode())}
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def fake_boto3(client):
+    return SimpleNamespace(client=lambda *args, **kwargs: client)
+
+
+def test_query_route_and_stage_metrics():
+    trigger._clients.clear()
+    trigger.boto3, original = fake_boto3(FakeAgentCore()), trigger.boto3
+    try:
+        app = trigger.app.test_client()
+        before_requests = sample("proxy_request_duration_seconds_count", route="/query", status="200")
+        before_invokes = sample("proxy_stage_duration_seconds_count", stage="agent_invoke")
+        before_hits = sample("proxy_cache_requests_total", cache="boto3_client", result="hit")
+        before_sizes = sample("proxy_response_size_bytes_sum", route="/query")
+        for _ in range(2):
+            response = app.post("/query", json={"user_id": "u1", "session_id": "s" * 33, "user_query": "hi"})
+            assert response.status_code == 200
+            response.close()
+    finally:
+        trigger.boto3 = original
+        trigger._clients.clear()
+
+    assert sample("proxy_request_duration_seconds_count", route="/query", status="200") == before_requests + 2
+    assert sample("proxy_stage_duration_seconds_count", stage="agent_invoke") == before_invokes + 2
+    assert sample("proxy_cache_requests_total", cache="boto3_client", result="hit") == before_hits + 1
+    assert sample("proxy_response_size_bytes_sum", route="/query") > before_sizes
+    assert sample("proxy_requests_in_flight", route="/query") == 0
+    print("✅ /query records route and stage latency, response size and client cache hits")
+
+
+def test_errors_by_type():
+    app = trigger.app.test_client()
+    before = sample("proxy_errors_total", route="/query", type="missing_session_id")
+    response = app.post("/query", json={"user_id": "u1"})
+    assert response.status_code == 400
+    response.close()
+    assert sample("proxy_errors_total", route="/query", type="missing_session_id") == before + 1
+    assert sample("proxy_request_duration_seconds_count", route="/query", status="400") >= 1
+    print("✅ Error responses are counted by error type")
+
+
+def test_stream_is_timed_until_the_body_ends():
+    trigger._clients.clear()
+    trigger.boto3, original = fake_boto3(FakeAgentCore(stream=True)), trigger.boto3
+    try:
+        app = trigger.app.test_client()
+        before = sample("proxy_request_duration_seconds_count", route="/query", status="200")
+        response = app.post("/query", json={"user_id": "u1", "session_id": "s" * 33, "stream": True},
+                            buffered=False)
+        assert sample("proxy_requests_in_flight", route="/query") == 1
+        assert b"done" in b"".join(response.response)
+        response.close()
+    finally:
+        trigger.boto3 = original
+        trigger._clients.clear()
+
+    assert sample("proxy_requests_in_flight", route="/query") == 0
+    assert sample("proxy_request_duration_seconds_count", route="/query", status="200") == before + 1
+    print("✅ Streamed responses stay in flight until the last event is sent")
+
+
+def test_metrics_endpoint():
+    response = trigger.app.test_client().get("/metrics")
+    assert response.status_code == 200
+    text = response.get_data(as_text=True)
+    assert "proxy_request_duration_seconds_bucket" in text and "proxy_requests_in_flight" in text
+    print("✅ /metrics serves the Prometheus text format")
+
+
+if __name__ == "__main__":
+    test_query_route_and_stage_metrics()
+    test_errors_by_type()
+    test_stream_is_timed_until_the_body_ends()
+    test_metrics_endpoint()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""Test SQL fingerprinting and the per-fingerprint Athena statistics history"""
+import os
+import time
+import tempfile
+from strands import Agent
+from Backend.metrics import query_history as history_module
+from Backend.metrics.query_history import QueryHistory, fingerprint, normalize_sql
+from Backend.tools import athena_query as athena_module
+from Backend.test_model_router import VALID, StubModel
+
+STATISTICS = {"QueryQueueTimeInMillis": 120, "EngineExecutionTimeInMillis": 900,
+              "ServiceProcessingTimeInMillis": 30, "TotalExecutionTimeInMillis": 1050,
+              "DataScannedInBytes": 50 * 1024 ** 2}
+
+
+class FinishedAthena:
+    def start_query_execution(self, **kwargs):
+        return {"QueryExecutionId": "query-1"}
+
+    def get_query_execution(self, QueryExecutionId):
+        return {"QueryExecution": {"Status": {"State": "SUCCEEDED"}, "Statistics": STATISTICS}}
+
+    def get_query_results(self, QueryExecutionId):
+        return {"ResultSet": {"Rows": [{"Data": [{"VarCharValue": "zone"}]},
+                                       {"Data": [{"VarCharValue": "North"}]}]}}
+
+
+def temp_history(**kwargs):
+    return QueryHistory(os.path.join(tempfile.mkdtemp(), "history.sqlite3"), **kwargs)
+
+
+def test_fingerprint_ignores_literals():
+    first = "SELECT zone, SUM(premium) FROM insurance_data WHERE year = 2023 AND state IN ('KA', 'TN') GROUP BY zone"
+    second = """select zone,   sum(premium)
+                from insurance_data -- filtered
+                where year = 2024 and state in ('MH') group by zone;"""
+    assert fingerprint(first) == fingerprint(second)
+    assert "2023" not in normalize_sql(first) and "'ka'" not in normalize_sql(first)
+    assert fingerprint(first) != fingerprint("SELECT zone FROM insurance_data WHERE year = 2023")
+    print("✅ Queries differing only in literals, case or whitespace share a fingerprint")
+
+
+def test_histograms_and_top_shapes():
+    history = temp_history()
+    for year in (2022, 2023, 2024):
+        history.record(f"SELECT * FROM claims WHERE year = {year}", "insurance_db", f"q{year}", "SUCCEEDED",
+                       STATISTICS, rows=10, actor_id="alice", session_id="s1")
+    history.record("SELECT COUNT(*) FROM policies", "insurance_db", "q-small", "FAILED",
+                   {"EngineExecutionTimeInMillis": 80, "DataScannedInBytes": 1024}, actor_id="bob")
+    assert history.flush(timeout=5)
+
+    snapshot = history.snapshot()
+    claims = snapshot[fingerprint("SELECT * FROM claims WHERE year = 1")]
+    assert claims["executions"] == 3 and claims["rows"] == 30 and claims["failures"] == 0
+    engine = claims["histograms"]["engine_ms"]
+    assert engine["count"] == 3 and engine["buckets"]["500"] == 0 and engine["buckets"]["1000"] == 3
+    assert claims["histograms"]["service_ms"]["sum"] == 90
+
+    by_cost = history.top("cost")
+    assert by_cost[0]["executions"] == 3 and by_cost[0]["actors"] == 1
+    assert by_cost[1]["failures"] == 1
+    assert history.top("count", limit=1)[0]["sql"] == "select * from claims where year = ?"
+    print("✅ Executions aggregate into per-fingerprint histograms and rank by cost and count")
+
+
+def test_execute_query_records_statistics():
+    history = temp_history()
+    original = history_module.query_history
+    athena_module.query_history = history
+    try:
+        agent = Agent(model=StubModel(VALID), callback_handler=None,
+                      state={"actor_id": "alice", "session_id": "session-1"})
+        athena_module.execute_query(FinishedAthena(), "SELECT zone FROM insurance_data", "insurance_db", agent=agent)
+    finally:
+        athena_module.query_history = original
+    assert history.flush(timeout=5)
+
+    row = history._connection().execute(
+        "SELECT query_id, actor_id, session_id, state, queue_ms, engine_ms, service_ms, bytes_scanned, rows"
+        " FROM query_history").fetchone()
+    assert row == ("query-1", "alice", "session-1", "SUCCEEDED", 120, 900, 30, 50 * 1024 ** 2, 1)
+    print("✅ Every Athena execution is recorded with its statistics, user and session")
+
+
+def test_record_does_not_wait_for_the_database():
+    history = temp_history()
+    history._db_lock.acquire()  # as if the writer were stuck on a slow disk
+    try:
+        started = time.perf_counter()
+        for i in range(50):
+            history.record(f"SELECT * FROM claims WHERE year = {i}", "insurance_db", f"q{i}", "SUCCEEDED",
+                           STATISTICS)
+        assert time.perf_counter() - started < 0.5
+        assert history.snapshot()[fingerprint("SELECT * FROM claims WHERE year = 1")]["executions"] == 50
+    finally:
+        history._db_lock.release()
+    assert history.flush(timeout=5) and history.writer_snapshot()["written"] == 50
+
+    full = temp_history(max_queue=2)
+    full._db_lock.acquire()
+    try:
+        for i in range(10):
+            full.record("SELECT 1", "insurance_db", f"q{i}", "SUCCEEDED", STATISTICS)
+    finally:
+        full._db_lock.release()
+    assert full.flush(timeout=5)
+    writes = full.writer_snapshot()
+    assert writes["dropped"] >= 6 and writes["queued"] + writes["dropped"] == 10 and writes["pending"] == 0
+    print("✅ Rows are written by a background thread; a full queue drops rows instead of blocking")
+
+
+def test_history_rows_are_pruned_by_age_and_count():
+    history = temp_history(max_rows=5, prune_every=1)
+    for i in range(12):
+        history.record("SELECT * FROM claims WHERE year = 1", "insurance_db", f"q{i}", "SUCCEEDED", STATISTICS)
+        assert history.flush(timeout=5)
+    ids = [row[0] for row in history._connection().execute("SELECT query_id FROM query_history ORDER BY id")]
+    assert ids == ["q7", "q8", "q9", "q10", "q11"]
+
+    history.max_rows = None
+    history._connection().execute("UPDATE query_history SET ts = ? WHERE query_id IN ('q7', 'q8')",
+                                  (time.time() - 31 * 86400,))
+    assert history.prune() == 2
+    assert history.top("count")[0]["executions"] == 3
+    print("✅ History keeps the newest max_rows rows and nothing older than the retention window")
+
+
+def test_fingerprint_stats_are_bounded():
+    history = temp_history(max_fingerprints=3)
+    for table in ("claims", "policies", "agents"):
+        history.record(f"SELECT * FROM {table}", "insurance_db", table, "SUCCEEDED", STATISTICS)
+    history.record("SELECT * FROM claims", "insurance_db", "claims-again", "SUCCEEDED", STATISTICS)
+    history.record("SELECT * FROM zones", "insurance_db", "zones", "SUCCEEDED", STATISTICS)
+
+    kept = {stats["sql"] for stats in history.snapshot().values()}
+    assert kept == {"select * from claims", "select * from agents", "select * from zones"}
+    assert history.writer_snapshot()["evicted"] == 1
+    history.flush(timeout=5)
+    print("✅ In-memory stats keep the most recently seen fingerprints only")
+
+
+if __name__ == "__main__":
+    test_fingerprint_ignores_literals()
+    test_histograms_and_top_shapes()
+    test_execute_query_records_statistics()
+    test_record_does_not_wait_for_the_database()
+    test_history_rows_are_pruned_by_age_and_count()
+    test_fingerprint_stats_are_bounded()
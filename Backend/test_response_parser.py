@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Test repairing, incrementally extracting and validating the model's JSON response"""
+import json
+from Backend.agent.response_parser import StreamingJSONExtractor, extract_response, repair_json, validate_response
+
+ANSWER = json.dumps({
+    "type": "bar",
+    "explanation": "Premium by zone",
+    "data": [{"label": "North", "value": 120.5}, {"label": "South", "value": -3}],
+    "customer_specific": False,
+    "query_executed": "SELECT zone, SUM(premium) FROM insurance_policies GROUP BY zone",
+})
+
+
+def test_repair_cuts_back_to_the_last_complete_value():
+    cases = {
+        '{"data":[{"label":"a","value":1},{"label":"b","value":2.': {"data": [{"label": "a", "value": 1},
+                                                                           {"label": "b"}]},
+        '{"data":[1,-': {"data": [1]},
+        '{"data":[1e': {"data": []},
+        '{"a":true,"b":fal': {"a": True},
+        '{"a":n': {},
+        '{"a":[1,2': {"a": [1, 2]},
+        '{"a":[1, 2 ,]}': {"a": [1, 2]},
+        '{"a":"cut off expla': {"a": "cut off expla"},
+        '{"a":1,"b"': {"a": 1},
+    }
+    for truncated, expected in cases.items():
+        assert json.loads(repair_json(truncated)) == expected, truncated
+    # Every prefix of a real answer repairs to valid JSON
+    for end in range(1, len(ANSWER) + 1):
+        json.loads(repair_json(ANSWER[:end]))
+    print("✅ Truncated output is cut back to the last complete value and closed")
+
+
+def test_cut_inside_a_number_keeps_the_earlier_points():
+    response, problems = extract_response(ANSWER[:ANSWER.index("-3") + 1])
+    assert problems == [] and response["data"] == [{"label": "North", "value": 120.5}]
+    print("✅ A dangling number drops only the partial point, not the whole data array")
+
+
+def test_extractor_completes_fields_across_chunk_boundaries():
+    for size in (1, 3, 7, 64):
+        extractor = StreamingJSONExtractor()
+        completed = []
+        for start in range(0, len(ANSWER), size):
+            completed += extractor.feed(("Here you go: " if start == 0 else "") + ANSWER[start:start + size])
+        assert [field for field, _ in completed] == ["type", "explanation", "data", "customer_specific",
+                                                    "query_executed"], size
+        assert dict(completed)["data"][1]["value"] == -3
+        assert extractor.complete and extractor.finish() == json.loads(ANSWER) and not extractor.repaired
+        assert extractor.text == "Here you go: " + ANSWER
+    print("✅ Fields complete in order whatever the chunk size")
+
+
+def test_extractor_skips_an_unreadable_key():
+    extractor = StreamingJSONExtractor()
+    completed = extractor.feed('{"\\x": "bad", "type": "text", "explanation": "ok"}')
+    assert completed == [("type", "text"), ("explanation", "ok")]
+    print("✅ A field name with a bad escape is skipped instead of ending the stream")
+
+
+def test_validate_response():
+    response, problems = validate_response({"type": "bar", "explanation": "x", "data": "oops"})
+    assert problems == ["'bar' response needs a list in 'data'"]
+
+    sparse = {"type": "line", "explanation": "x", "customer_specific": True,
+              "data": [{"label": "a", "value": 1, "target": 2}, {"label": "b", "value": 3}]}
+    response, problems = validate_response(sparse)
+    assert problems == [] and len(response["data"]) == 2
+    assert response["customer_specific"] == "True" and response["query_executed"] == ""
+    # Only output that was cut off can end with a partial point
+    response, problems = validate_response(sparse, repaired=True)
+    assert problems == [] and response["data"] == [{"label": "a", "value": 1, "target": 2}]
+
+    _, problems = validate_response({"type": "map", "nudge": "Try this"})
+    assert problems == ["missing field 'explanation'", "unknown response type 'map'",
+                        "'nudge' and 'cta' must be provided together"]
+
+    response, problems = validate_response(["not", "an", "object"])
+    assert response["type"] == "text" and problems == ["response is not a JSON object"]
+    print("✅ Responses are normalized and schema problems reported")
+
+
+if __name__ == "__main__":
+    test_repair_cuts_back_to_the_last_complete_value()
+    test_cut_inside_a_number_keeps_the_earlier_points()
+    test_extractor_completes_fields_across_chunk_boundaries()
+    test_extractor_skips_an_unreadable_key()
+    test_validate_response()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Test the streaming path: agent event order, the error event and the proxy's SSE relay"""
+import io
+import json
+import asyncio
+from types import SimpleNamespace
+from Backend.benchmarks.fakes import SCENARIOS, install_fakes
+from Backend import Agent_Trigger as trigger
+
+
+def collect(events):
+    async def consume():
+        return [event async for event in events]
+    return asyncio.run(consume())
+
+
+def test_events_arrive_in_order():
+    install_fakes()
+    from Backend import main as entrypoint
+    events = collect(entrypoint.main({"user_query": SCENARIOS[1]["question"], "user_id": "stream.user",
+                                      "session_id": "t" * 33, "stream": True}))
+
+    steps = [event.get("stage") or event.get("name") or event["event"] for event in events]
+    assert steps == ["started", "tool_call", "generating", "type", "explanation", "customer_specific",
+                     "query_executed", "data"]
+    assert events[1]["tool"] == "athena_query" and events[3]["value"] == "bar"
+    assert events[4]["text"] == f"Here is the answer to: {SCENARIOS[1]['question']}"
+    # The explanation goes out before the full payload, which carries everything else
+    assert events[-1]["response"]["type"] == "bar" and len(events[-1]["response"]["data"]) == 5
+    print("✅ started → tool_call → generating → fields and explanation → data")
+
+
+def test_failure_ends_the_stream_with_an_error_event():
+    from Backend import main as entrypoint
+
+    async def failing_stream(user_query, user_id, deadline=None, budget_limits=None):
+        yield {"event": "progress", "stage": "started"}
+        raise RuntimeError("model unavailable")
+
+    generator = SimpleNamespace(actor_id="stream_user", session_id="e" * 33, stream_sql=failing_stream)
+    events = collect(entrypoint.stream_events(generator, "Show premium", "stream.user"))
+
+    assert events[0] == {"event": "progress", "stage": "started"}
+    assert events[-1]["event"] == "error" and events[-1]["response"]["type"] == "text"
+    assert "model unavailable" in events[-1]["response"]["explanation"]
+    print("✅ A failure mid-stream becomes a final error event instead of a dropped connection")
+
+
+def test_relay_forwards_events_and_wraps_plain_json():
+    lines = [b'data: {"event": "progress", "stage": "started"}', b"", b'data: {"event": "data"}']
+    sse = {"contentType": "text/event-stream",
+           "response": SimpleNamespace(iter_lines=lambda chunk_size: iter(lines))}
+    assert list(trigger.relay_agent_events(sse)) == ['data: {"event": "progress", "stage": "started"}\n\n',
+                                                     'data: {"event": "data"}\n\n']
+
+    error = {"error": "missing_session_id", "message": "session_id is required"}
+    plain = {"contentType": "application/json", "response": io.BytesIO(json.dumps(error).encode())}
+    relayed = list(trigger.relay_agent_events(plain))
+    assert len(relayed) == 1 and relayed[0].startswith("data: ") and relayed[0].endswith("\n\n")
+    assert json.loads(relayed[0][len("data: "):]) == {"event": "data", "response": error}
+    print("✅ SSE lines are relayed as they come; a plain JSON reply becomes one data event")
+
+
+def test_query_route_streams_on_request():
+    class StreamingAgentCore:
+        def invoke_agent_runtime(self, **kwargs):
+            self.payload = json.loads(kwargs["payload"])
+            return {"contentType": "text/event-stream",
+                    "response": SimpleNamespace(iter_lines=lambda chunk_size: iter([b'data: {"event": "data"}']))}
+
+    agent_core = StreamingAgentCore()
+    trigger._clients.clear()
+    trigger.boto3, original = SimpleNamespace(client=lambda *args, **kwargs: agent_core), trigger.boto3
+    try:
+        response = trigger.app.test_client().post("/query", json={"user_id": "u1", "session_id": "s" * 33,
+                                                                  "user_query": "hi"},
+                                                  headers={"Accept": "text/event-stream"})
+        body = response.get_data(as_text=True)
+    finally:
+        trigger.boto3 = original
+        trigger._clients.clear()
+
+    assert response.mimetype == "text/event-stream" and response.headers["Cache-Control"] == "no-cache"
+    assert agent_core.payload["stream"] is True and body == 'data: {"event": "data"}\n\n'
+    print("✅ An SSE Accept header makes /query stream the agent's events")
+
+
+if __name__ == "__main__":
+    test_events_arrive_in_order()
+    test_failure_ends_the_stream_with_an_error_event()
+    test_relay_forwards_events_and_wraps_plain_json()
+    test_query_route_streams_on_request()
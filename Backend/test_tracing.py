@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Test request spans and trace propagation from the Flask proxy payload into the agent"""
+from strands import Agent
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from Backend.config.tracing import TRACE_CONTEXT_KEY, extracted_context, inject_context, span
+from Backend.agent.model_tracing import ModelCallTracer
+from Backend.agent.response_parser import extract_response
+from Backend.tools import athena_query as athena_module
+from Backend.test_model_router import VALID, StubModel
+from Backend.test_query_history import temp_history
+
+exporter = InMemorySpanExporter()
+provider = TracerProvider()
+provider.add_span_processor(SimpleSpanProcessor(exporter))
+trace.set_tracer_provider(provider)
+
+
+def finished(name):
+    return [s for s in exporter.get_finished_spans() if s.name == name]
+
+
+class FinishedAthena:
+    def start_query_execution(self, **kwargs):
+        return {"QueryExecutionId": "query-1"}
+
+    def get_query_execution(self, QueryExecutionId):
+        return {"QueryExecution": {"Status": {"State": "SUCCEEDED"}, "Statistics": {
+            "QueryQueueTimeInMillis": 120, "EngineExecutionTimeInMillis": 900,
+            "TotalExecutionTimeInMillis": 1050, "DataScannedInBytes": 4096}}}
+
+    def get_query_results(self, QueryExecutionId):
+        return {"ResultSet": {"Rows": [{"Data": [{"VarCharValue": "zone"}]},
+                                       {"Data": [{"VarCharValue": "North"}]}]}}
+
+
+def test_context_crosses_payload():
+    exporter.clear()
+    with span("proxy.invoke_agent_runtime"):
+        payload = inject_context({"user_query": "hi"})
+    assert "traceparent" in payload[TRACE_CONTEXT_KEY]
+
+    # Agent side: a fresh context, as in the runtime process
+    with extracted_context(payload), span("agent.request"):
+        pass
+
+    proxy, = finished("proxy.invoke_agent_runtime")
+    agent, = finished("agent.request")
+    assert agent.context.trace_id == proxy.context.trace_id
+    assert agent.parent.span_id == proxy.context.span_id
+    print("✅ Agent span joins the proxy's trace through the payload")
+
+
+def test_athena_span_attributes():
+    exporter.clear()
+    athena_module.query_history, original_history = temp_history(), athena_module.query_history
+    try:
+        result = athena_module.execute_query(FinishedAthena(), "SELECT zone FROM insurance_data", "insurance_db")
+    finally:
+        athena_module.query_history = original_history
+
+    assert result[0] == [{"zone": "North"}]
+    athena, = finished("athena.query")
+    assert athena.attributes["athena.queue_ms"] == 120
+    assert athena.attributes["athena.execution_ms"] == 900
+    assert athena.attributes["athena.bytes_scanned"] == 4096
+    assert athena.attributes["athena.rows"] == 1
+    print("✅ Athena span carries queue/execution time, bytes scanned and rows")
+
+
+def test_model_and_extraction_spans():
+    exporter.clear()
+    agent = Agent(model=StubModel(VALID), hooks=[ModelCallTracer()], callback_handler=None)
+    with span("agent.request"):
+        result = agent("How many customers?")
+        extract_response(str(result))
+
+    model_call, = finished("model.call")
+    extraction, = finished("response.extract")
+    request, = finished("agent.request")
+    assert model_call.attributes["gen_ai.usage.input_tokens"] == 100
+    assert model_call.attributes["gen_ai.usage.output_tokens"] == 20
+    assert extraction.attributes["response.type"] == "text"
+    assert model_call.context.trace_id == request.context.trace_id
+    print("✅ Model call span has token counts; extraction span records the response type")
+
+
+if __name__ == "__main__":
+    test_context_crosses_payload()
+    test_athena_span_attributes()
+    test_model_and_extraction_spans()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""Test the server-side trend summary attached to chart responses"""
+from Backend.analytics.trend import attach_trend, compute_trend, trend_from_rows
+
+
+def test_trend_matches_client_summary():
+    # "Show monthly policy trends for 2025" from TREND_ANALYSIS_EXPLANATION.md
+    months = ["Jan", "Feb", "Mar", "Apr", "May", "Jun"]
+    trend = compute_trend(months, ["45", "52", "48", "61", "58", "67"])
+
+    assert trend["highest"] == {"label": "Jun", "value": 67.0}
+    assert trend["lowest"] == {"label": "Jan", "value": 45.0}
+    assert trend["average"] == 55.17
+    assert trend["change_pct"] == 28.3 and trend["direction"] == "up"
+    assert trend["slope"] > 0 and trend["growth_rate_pct"] > 0
+    assert trend["outliers"] == []
+    print(f"✅ Trend: {trend}")
+
+
+def test_outliers_and_unparseable_values():
+    labels = ["A", "B", "C", "D", "E", "F", "G"]
+    trend = compute_trend(labels, ["10", "11", "", "12", "95", "n/a", "10"])
+
+    assert trend["count"] == 5, "blank and non-numeric points must be ignored"
+    assert [o["label"] for o in trend["outliers"]] == ["E"]
+    assert trend["outliers"][0]["position"] == "high"
+    print("✅ Outlier flagged, unparseable points skipped")
+
+
+def test_attach_trend_only_to_charts():
+    chart = attach_trend({"type": "bar", "data": [{"label": "North", "value": "125000"},
+                                                  {"label": "South", "value": "98000"}]})
+    text = attach_trend({"type": "text", "data": "", "explanation": "Hello"})
+
+    assert chart["trend"]["highest"]["label"] == "North"
+    assert "trend" not in text
+    print("✅ Trend attached to chart responses only")
+
+
+def test_trend_facts_from_query_rows():
+    rows = [{"month": "2025-01", "gwp": "100"}, {"month": "2025-02", "gwp": "80"}, {"month": "2025-03", "gwp": "60"}]
+    trend = trend_from_rows(rows, {"month": "varchar", "gwp": "double"})
+    wide = trend_from_rows([{f"c{i}": "x" for i in range(8)}])
+
+    assert trend["measure"] == "gwp" and trend["direction"] == "down"
+    assert trend["growth_rate_pct"] < 0
+    assert wide is None
+    print("✅ Trend facts computed from a typed series result")
+
+
+if __name__ == "__main__":
+    test_trend_matches_client_summary()
+    test_outliers_and_unparseable_values()
+    test_attach_trend_only_to_charts()
+    test_trend_facts_from_query_rows()
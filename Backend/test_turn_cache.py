@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""Test the per-session turn cache in front of get_last_k_turns"""
+import time
+from Backend.benchmarks.fakes import SCENARIOS, install_fakes
+from Backend.memory.turn_cache import TurnCache
+
+
+def test_write_through_keeps_the_last_k_turns():
+    cache = TurnCache(k=2)
+    assert cache.get("alice", "s1") is None
+    cache.append("alice", "s1", "ignored", "user")  # nothing cached yet: no partial history
+    cache.put("alice", "s1", [[{"role": "USER", "content": {"text": "q1"}}]], remote_seconds=0.05)
+
+    cache.append("alice", "s1", "a1", "assistant")
+    cache.append("alice", "s1", "q2", "user")
+    cache.append("alice", "s1", "a2", "assistant")
+    cache.append("alice", "s1", "q3", "user")
+    turns = cache.get("alice", "s1")
+    assert [[m["content"]["text"] for m in turn] for turn in turns] == [["q3"], ["q2", "a2"]]
+
+    stats = cache.snapshot()
+    assert stats["hits"] == 1 and stats["misses"] == 1 and stats["hit_ratio"] == 0.5
+    assert stats["latency_saved_ms"] == 50.0
+    print("✅ Appends build newest-first turns, capped at k, from a full remote read")
+
+
+def test_ttl_and_lru_eviction():
+    cache = TurnCache(max_sessions=2, ttl_seconds=0.05)
+    for session in ("s1", "s2", "s3"):
+        cache.put("alice", session, [])
+    assert cache.get("alice", "s1") is None and cache.snapshot()["evicted"] == 1
+    time.sleep(0.06)
+    assert cache.get("alice", "s3") is None and cache.snapshot()["expired"] == 1
+    print("✅ Least recently used sessions are evicted and idle ones expire")
+
+
+def test_follow_up_question_reads_from_cache():
+    fakes = install_fakes()
+    from Backend import main as entrypoint
+    payload = {"user_id": "cache.user", "session_id": "c" * 33}
+    before = entrypoint.main({**payload, "action": "memory_stats"})["turn_cache"]
+    entrypoint.main({**payload, "user_query": SCENARIOS[0]["question"]})
+    reads = fakes.memory.reads
+    # A new agent for the same session, as after its cached agent was evicted
+    entrypoint.executor_cache.clear()
+    entrypoint.main({**payload, "user_query": SCENARIOS[1]["question"]})
+
+    assert fakes.memory.reads == reads == 1
+    after = entrypoint.main({**payload, "action": "memory_stats"})["turn_cache"]
+    assert after["hits"] - before["hits"] == 1 and after["misses"] - before["misses"] == 1
+    print("✅ The second question of a session doesn't read remote memory")
+
+
+if __name__ == "__main__":
+    test_write_through_keeps_the_last_k_turns()
+    test_ttl_and_lru_eviction()
+    test_follow_up_question_reads_from_cache()
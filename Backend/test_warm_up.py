@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""Test the warm_up action against the benchmark stand-ins"""
+import os
+from Backend.benchmarks.fakes import SCENARIOS, install_fakes
+from Backend.memory.memory_writer import memory_writer
+
+
+def test_warm_up_builds_clients_and_runs_hot_queries_once():
+    fakes = install_fakes()
+    from Backend import main as entrypoint
+    from Backend.agent import warmup
+    from Backend.tools import athena_query
+    warmup._hot_queries_started = False
+
+    # No user_id or session_id: warm-up isn't tied to a user
+    result = entrypoint.main({"action": "warm_up", "queries": [SCENARIOS[0]["question"]]})
+    assert result["warmed"] is True
+    assert {"imports", "models", "athena_client", "memory", "hot_queries", "total"} <= set(result["timings_ms"])
+    assert set(fakes.models) == set(fakes.router.model_ids.values())
+    assert athena_query._client is fakes.athena
+    assert memory_writer.flush(timeout=5)
+    warm_up_sessions = [key for key in fakes.memory.events if key[0] == warmup.WARM_UP_ACTOR]
+    assert len(warm_up_sessions) == 1
+
+    # Hot queries run once per process; later warm-ups only check the clients
+    again = entrypoint.main({"action": "warm_up", "queries": [SCENARIOS[1]["question"]]})
+    assert "hot_queries" not in again["timings_ms"]
+    assert memory_writer.flush(timeout=5)
+    assert [key for key in fakes.memory.events if key[0] == warmup.WARM_UP_ACTOR] == warm_up_sessions
+    print(f"✅ Warm-up initialized models and clients in {result['timings_ms']['total']:.0f} ms")
+
+
+def test_warm_up_rejects_malformed_queries():
+    install_fakes()
+    from Backend import main as entrypoint
+    assert entrypoint.main({"action": "warm_up", "queries": "SELECT 1"})["error"] == "invalid_queries"
+    print("✅ Warm-up rejects queries that aren't a list of questions")
+
+
+def test_warm_up_ignores_a_malformed_environment_value():
+    install_fakes()
+    from Backend.agent import warmup
+    warmup._hot_queries_started = False
+    for value in ("[How many customers?]", '"How many customers?"', "[1, 2]"):
+        os.environ[warmup.WARM_UP_QUERIES_ENV] = value
+        try:
+            timings = warmup.warm_up()
+        finally:
+            del os.environ[warmup.WARM_UP_QUERIES_ENV]
+        assert "hot_queries" not in timings and "total" in timings
+    assert warmup._hot_queries_started is False
+    print("✅ A malformed WARM_UP_QUERIES is logged and ignored instead of failing the import")
+
+
+if __name__ == "__main__":
+    test_warm_up_builds_clients_and_runs_hot_queries_once()
+    test_warm_up_rejects_malformed_queries()
+    test_warm_up_ignores_a_malformed_environment_value()
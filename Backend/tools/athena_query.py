@@ -1,7 +1,36 @@
 import boto3
 import time
-from typing import Any, Dict, List, Union
+import logging
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Union
 from strands import tool
+from Backend.agent.deadline import Deadline
+from Backend.agent.budget import add_usage
+from Backend.analytics.nudge_engine import compute_nudge_facts, format_facts, rows_for_entities
+from Backend.analytics.trend import format_trend, trend_from_rows
+from Backend.config.tracing import mark_error, set_attributes, span
+from Backend.metrics.query_history import query_history
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL_SECONDS = 1
+MAX_SPAN_SQL_CHARS = 2000
+
+# boto3 clients are thread-safe and slow to build, so every tool call shares one
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_athena_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = boto3.client("athena")
+    return _client
+
 
 @tool(
     name="athena_query",
@@ -12,7 +41,12 @@ CRITICAL: You MUST specify the correct database parameter:
 - For banking queries (customer, account, loan, card) → database="sentra_db"
 
 The insurance_db database EXISTS and contains INSURANCE_POLICIES and INSURANCE_CLAIMS tables with real data.
-DO NOT default to sentra_db for insurance queries!""",
+DO NOT default to sentra_db for insurance queries!
+
+For insurance_db results grouped by an entity, the tool returns {"rows": [...], "nudge_facts": "..."}
+with the lowest performers, gaps to mean/median, share of total and month-over-month change already computed.
+Results shaped like a series (one label column plus measures) also get "trend_facts": highest, lowest,
+average, half-over-half change, slope, growth rate, volatility and outliers.""",
     inputSchema={
         "type": "object",
         "properties": {
@@ -25,21 +59,94 @@ DO NOT default to sentra_db for insurance queries!""",
                 "description": "REQUIRED: Database name. Use 'insurance_db' for insurance queries, 'sentra_db' for banking queries.",
                 "enum": ["sentra_db", "insurance_db"]
             },
+            "supporting_sql": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "Optional related queries (same database) to run in parallel with the main query, e.g. agent counts or product mix for the lowest performers."
+            },
             "workgroup": {"type": "string"},
             "output_s3": {"type": "string"}
         },
         "required": ["sql", "database"]
     }
 )
-def athena_query(sql: str, database: str = "sentra_db") -> Union[str, List[Dict[str, Any]]]:
-    import logging
-    logger = logging.getLogger(__name__)
-    
-    logger.info(f"🔍 ATHENA QUERY TOOL CALLED")
-    logger.info(f"   Database: {database}")
-    logger.info(f"   SQL: {sql}")
+def athena_query(sql: str, database: str = "sentra_db", supporting_sql: Optional[List[str]] = None,
+                 agent=None) -> Union[str, List[Dict[str, Any]], Dict[str, Any]]:
+    logger.info("🔍 Athena query on %s", database, extra={"category": "sql", "sql": sql})
+
+    # The agent is injected by strands; its state carries the request deadline
+    deadline = Deadline.from_agent(agent)
+    if deadline and deadline.expired():
+        logger.warning("   ⏰ Request deadline already passed - not starting query")
+        return "Athena query not started: request deadline exceeded. Answer with the data you already have."
     
-    client = boto3.client("athena")
+    client = get_athena_client()
+    supporting_sql = supporting_sql or []
+
+    if not supporting_sql:
+        result = execute_query(client, sql, database, deadline, agent)
+        if isinstance(result, str):
+            return result
+        data, column_types = result
+    else:
+        # Main and supporting queries are independent; run them side by side
+        logger.info("   Running %d supporting queries in parallel", len(supporting_sql))
+        with ThreadPoolExecutor(max_workers=len(supporting_sql) + 1) as pool:
+            # Copy the context so each query's span nests under the tool call
+            futures = [pool.submit(contextvars.copy_context().run, execute_query, client, query, database, deadline, agent)
+                       for query in [sql] + supporting_sql]
+            results = [future.result() for future in futures]
+        if isinstance(results[0], str):
+            return results[0]
+        data, column_types = results[0]
+
+    if not data:
+        return data
+
+    # Series results get precomputed trend facts so the explanation can quote them
+    trend = trend_from_rows(data, column_types)
+    # Insurance answers carry a nudge; hand the model precomputed facts instead of raw math
+    facts = compute_nudge_facts(data, column_types) if database == "insurance_db" else None
+    if facts is None and trend is None and not supporting_sql:
+        return data
+
+    response = {"rows": data}
+    if facts is not None:
+        response["nudge_facts"] = format_facts(facts)
+    if trend is not None:
+        response["trend_facts"] = format_trend(trend)
+    if supporting_sql:
+        bottom_entities = [entry["entity"] for entry in facts["bottom"]] if facts else []
+        response["supporting_results"] = [
+            {"sql": query, "rows": result if isinstance(result, str) else rows_for_entities(result[0], bottom_entities)}
+            for query, result in zip(supporting_sql, results[1:])
+        ]
+    return response
+
+
+def execute_query(client, sql, database, deadline=None, agent=None):
+    """Run one query to completion; returns (rows, column_types) or an error message string"""
+    with span("athena.query", **{"db.system": "athena", "db.name": database,
+                                 "db.statement": sql[:MAX_SPAN_SQL_CHARS]}) as current:
+        execution = {}
+        result = _execute_query(client, sql, database, deadline, agent, current, execution)
+        rows = None
+        if isinstance(result, str):
+            mark_error(current, result)
+        else:
+            rows = len(result[0])
+            set_attributes(current, **{"athena.rows": rows})
+
+    if "query_id" in execution:
+        state = agent.state if agent is not None else None
+        query_history.record(sql, database, execution["query_id"], execution["state"], execution["statistics"],
+                             rows=rows,
+                             actor_id=state.get("actor_id") if state else None,
+                             session_id=state.get("session_id") if state else None)
+    return result
+
+
+def _execute_query(client, sql, database, deadline, agent, current, execution):
     workgroup = "primary"
     output_s3 = "s3://bedrock-agentcore-runtime-628897991744-ap-south-1-3m5mgapsu7/TestQueryOutput/"
 
@@ -57,33 +164,44 @@ def athena_query(sql: str, database: str = "sentra_db") -> Union[str, List[Dict[
             ResultConfiguration=result_conf if result_conf else None
         )
         query_id = resp["QueryExecutionId"]
-        logger.info(f"   Query ID: {query_id}")
+        logger.debug("   Query ID: %s", query_id)
 
-        while True:
-            status = client.get_query_execution(QueryExecutionId=query_id)
-            state = status["QueryExecution"]["Status"]["State"]
-            if state in ("SUCCEEDED", "FAILED", "CANCELLED"):
-                break
-            time.sleep(1)
+        status, state = wait_for_query(client, query_id, deadline)
+        statistics = status["QueryExecution"].get("Statistics", {})
+        set_attributes(current, **{
+            "athena.query_id": query_id,
+            "athena.state": state,
+            "athena.queue_ms": statistics.get("QueryQueueTimeInMillis"),
+            "athena.execution_ms": statistics.get("EngineExecutionTimeInMillis"),
+            "athena.service_ms": statistics.get("ServiceProcessingTimeInMillis"),
+            "athena.total_ms": statistics.get("TotalExecutionTimeInMillis"),
+            "athena.bytes_scanned": statistics.get("DataScannedInBytes"),
+        })
+        execution.update(query_id=query_id, state=state, statistics=statistics)
+        # Scanned bytes count against the request budget whether or not the query succeeded
+        add_usage(agent, bytes_scanned=statistics.get("DataScannedInBytes", 0))
+        if state == "DEADLINE_EXCEEDED":
+            logger.warning("   ⏰ Request deadline exceeded - stopped query %s", query_id)
+            return "Athena query cancelled: request deadline exceeded. Answer with the data you already have."
 
         if state != "SUCCEEDED":
             error_msg = f"Athena query failed: {state}"
-            logger.error(f"   ❌ {error_msg}")
             if state == "FAILED":
                 reason = status["QueryExecution"]["Status"].get("StateChangeReason", "Unknown")
                 error_msg += f" - Reason: {reason}"
-                logger.error(f"   Failure reason: {reason}")
+            logger.error("   ❌ %s", error_msg, extra={"query_id": query_id})
             return error_msg
 
         res = client.get_query_results(QueryExecutionId=query_id)
         rows = res["ResultSet"]["Rows"]
         
         if len(rows) == 0:
-            logger.warning(f"   ⚠️ Query returned 0 rows (no data)")
-            return []
+            logger.warning("   ⚠️ Query returned 0 rows (no data)")
+            return [], {}
         
         headers = [col["VarCharValue"] for col in rows[0]["Data"]]
-        logger.info(f"   Columns: {headers}")
+        column_info = res["ResultSet"].get("ResultSetMetadata", {}).get("ColumnInfo", [])
+        column_types = {info["Name"]: info.get("Type") for info in column_info}
 
         data: List[Dict[str, Any]] = []
         for row in rows[1:]:
@@ -91,13 +209,32 @@ def athena_query(sql: str, database: str = "sentra_db") -> Union[str, List[Dict[
             row_dict = dict(zip(headers, values))
             data.append(row_dict)
 
-        logger.info(f"   ✅ Query succeeded - returned {len(data)} rows")
-        if len(data) > 0:
-            logger.info(f"   Sample row: {data[0]}")
+        logger.info("   ✅ Query succeeded - returned %d rows", len(data), extra={"query_id": query_id})
+        if data:
+            logger.info("   Sample row", extra={"category": "sample_row", "columns": headers, "row": data[0]})
         
-        return data
+        return data, column_types
 
     except Exception as e:
         error_msg = f"Error executing Athena query: {str(e)}"
-        logger.error(f"   ❌ {error_msg}")
+        logger.error("   ❌ %s", error_msg)
         return error_msg
+
+
+def wait_for_query(client, query_id, deadline=None):
+    """
+    Poll until the query reaches a terminal state and return (status, state).
+    If the deadline passes first the execution is stopped so it stops scanning,
+    and the state "DEADLINE_EXCEEDED" is returned.
+    """
+    while True:
+        status = client.get_query_execution(QueryExecutionId=query_id)
+        state = status["QueryExecution"]["Status"]["State"]
+        if state in ("SUCCEEDED", "FAILED", "CANCELLED"):
+            return status, state
+
+        if deadline and deadline.expired():
+            client.stop_query_execution(QueryExecutionId=query_id)
+            return status, "DEADLINE_EXCEEDED"
+
+        time.sleep(min(POLL_INTERVAL_SECONDS, deadline.remaining()) if deadline else POLL_INTERVAL_SECONDS)
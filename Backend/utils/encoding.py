@@ -0,0 +1,149 @@
+"""
+Response Encoding
+Shared JSON/MessagePack encoding and HTTP compression for the AgentCore entrypoint and the Flask proxy.
+orjson is used when installed (it serializes datetimes and numpy arrays natively); Decimal, sets and
+numpy scalars are converted by a default hook. brotli and msgpack are optional: without them clients
+fall back to gzip and JSON.
+"""
+import sys
+import json
+import gzip
+import logging
+import datetime
+from decimal import Decimal
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+JSON_MIMETYPE = "application/json"
+MSGPACK_MIMETYPE = "application/msgpack"
+MSGPACK_MIMETYPES = (MSGPACK_MIMETYPE, "application/x-msgpack")
+
+# Compressing tiny bodies costs more than it saves
+MIN_COMPRESS_BYTES = 1024
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+
+ORJSON_OPTIONS = (orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+
+def to_builtin(obj):
+    """Default hook for types neither encoder handles natively"""
+    if isinstance(obj, Decimal):
+        return int(obj) if obj == obj.to_integral_value() else float(obj)
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    # numpy values can only exist once something else imported it, so this never pays for the import
+    np = sys.modules.get("numpy")
+    if np is not None:
+        if isinstance(obj, np.generic):
+            return obj.item()
+        if isinstance(obj, np.ndarray):
+            return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj):
+    """Encode obj as UTF-8 JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=to_builtin, option=ORJSON_OPTIONS)
+    return json.dumps(obj, default=to_builtin, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def dumps_str(obj):
+    return dumps(obj).decode("utf-8")
+
+
+def loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def packb(obj):
+    """Encode obj as MessagePack; raises RuntimeError when msgpack is not installed"""
+    if msgpack is None:
+        raise RuntimeError("msgpack is not installed")
+    return msgpack.packb(obj, default=to_builtin, use_bin_type=True, datetime=False)
+
+
+def _accepted(header):
+    """Parse an Accept or Accept-Encoding header into {token: quality}, dropping q=0 entries"""
+    accepted = {}
+    for part in (header or "").split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            accepted[token] = quality
+    return accepted
+
+
+def negotiate_format(accept):
+    """MessagePack only when the client asks for it explicitly; JSON otherwise"""
+    accepted = _accepted(accept)
+    if msgpack is not None and any(mimetype in accepted for mimetype in MSGPACK_MIMETYPES):
+        return MSGPACK_MIMETYPE
+    return JSON_MIMETYPE
+
+
+def negotiate_encoding(accept_encoding):
+    """Pick "br" or "gzip" from an Accept-Encoding header, preferring brotli on a tie; None for identity"""
+    accepted = _accepted(accept_encoding)
+    candidates = [("br", accepted.get("br", accepted.get("*", 0))) if brotli is not None else ("br", 0),
+                  ("gzip", accepted.get("gzip", accepted.get("*", 0)))]
+    encoding, quality = max(candidates, key=lambda candidate: candidate[1])
+    return encoding if quality > 0 else None
+
+
+def compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL)
+    return body
+
+
+def encode_body(data, accept=None, accept_encoding=None, raw_json=None):
+    """
+    Encode a response body for the client's Accept and Accept-Encoding headers.
+    raw_json may carry an already encoded JSON body (e.g. relayed from AgentCore) to skip re-encoding.
+    Returns (body_bytes, headers).
+    """
+    mimetype = negotiate_format(accept)
+    if mimetype == MSGPACK_MIMETYPE:
+        body = packb(loads(raw_json) if data is None else data)
+    else:
+        body = raw_json if raw_json is not None else dumps(data)
+
+    headers = {"Content-Type": mimetype, "Vary": "Accept, Accept-Encoding"}
+    encoding = negotiate_encoding(accept_encoding) if len(body) >= MIN_COMPRESS_BYTES else None
+    if encoding:
+        body = compress(body, encoding)
+        headers["Content-Encoding"] = encoding
+    return body, headers
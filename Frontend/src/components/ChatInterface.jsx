@@ -127,6 +127,25 @@ function ChatInterface({ onLogout }) {
     setInput(query)
   }
 
+  // Pages through the full data behind a downsampled chart
+  const fetchDataPage = async (resultId, offset, limit) => {
+    const response = await fetch(`${import.meta.env.VITE_API_URL}/data`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({
+        user_id: userId,
+        session_id: currentSessionId,
+        result_id: resultId,
+        offset,
+        limit
+      })
+    })
+    if (!response.ok) {
+      throw new Error(`API error: ${response.status}`)
+    }
+    return response.json()
+  }
+
   const handleSubmit = async (e) => {
     e.preventDefault()
     if (!input.trim() || loading) return
@@ -400,7 +419,7 @@ function ChatInterface({ onLogout }) {
             </div>
           )}
           {messages.map((message) => (
-            <ChatMessage key={message.id} message={message} />
+            <ChatMessage key={message.id} message={message} fetchDataPage={fetchDataPage} />
           ))}
           {loading && (
             <div className="loading-message">
@@ -383,23 +383,31 @@ function ExpandableSection({ title, children, defaultExpanded = false, icon = '
 }
 
 // Trend Summary Component
-function TrendSummary({ data }) {
-  if (!data || !Array.isArray(data) || data.length === 0) return null
-
+function localTrend(data) {
+  // Fallback for responses without a backend-computed trend (older sessions)
   const values = data.map(item => Number(item.value) || 0)
   const total = values.reduce((sum, val) => sum + val, 0)
-  const average = total / values.length
   const max = Math.max(...values)
   const min = Math.min(...values)
-  const maxItem = data[values.indexOf(max)]
-  const minItem = data[values.indexOf(min)]
-
-  // Calculate trend (comparing first half vs second half)
   const midPoint = Math.floor(values.length / 2)
   const firstHalfAvg = values.slice(0, midPoint).reduce((sum, val) => sum + val, 0) / midPoint
   const secondHalfAvg = values.slice(midPoint).reduce((sum, val) => sum + val, 0) / (values.length - midPoint)
-  const trendPercentage = ((secondHalfAvg - firstHalfAvg) / firstHalfAvg * 100).toFixed(1)
-  const isIncreasing = secondHalfAvg > firstHalfAvg
+  return {
+    highest: { label: data[values.indexOf(max)].label, value: max },
+    lowest: { label: data[values.indexOf(min)].label, value: min },
+    average: total / values.length,
+    change_pct: Number(((secondHalfAvg - firstHalfAvg) / firstHalfAvg * 100).toFixed(1)),
+    direction: secondHalfAvg > firstHalfAvg ? 'up' : 'down',
+    outliers: []
+  }
+}
+
+function TrendSummary({ data, trend }) {
+  if (!trend && (!data || !Array.isArray(data) || data.length === 0)) return null
+
+  // The backend computes the trend on typed values; only recompute when it is missing
+  const { highest, lowest, average, change_pct: trendPercentage, direction, outliers = [] } = trend || localTrend(data)
+  const isIncreasing = direction !== 'down'
 
   return (
     <div className="trend-summary">
@@ -410,11 +418,11 @@ function TrendSummary({ data }) {
       <div className="trend-stats">
         <div className="trend-stat">
           <span className="stat-label">Highest:</span>
-          <span className="stat-value">{maxItem.label} ({max.toLocaleString()})</span>
+          <span className="stat-value">{highest.label} ({highest.value.toLocaleString()})</span>
         </div>
         <div className="trend-stat">
           <span className="stat-label">Lowest:</span>
-          <span className="stat-value">{minItem.label} ({min.toLocaleString()})</span>
+          <span className="stat-value">{lowest.label} ({lowest.value.toLocaleString()})</span>
         </div>
         <div className="trend-stat">
           <span className="stat-label">Average:</span>
@@ -426,6 +434,12 @@ function TrendSummary({ data }) {
             {isIncreasing ? '↗' : '↘'} {Math.abs(trendPercentage)}%
           </span>
         </div>
+        {outliers.length > 0 && (
+          <div className="trend-stat">
+            <span className="stat-label">Outliers:</span>
+            <span className="stat-value">{outliers.map(o => o.label).join(', ')}</span>
+          </div>
+        )}
       </div>
       <div className="trend-suggestion">
         <strong>Suggestion:</strong> {isIncreasing 
@@ -436,7 +450,9 @@ function TrendSummary({ data }) {
   )
 }
 
-function ChatMessage({ message }) {
+const DATA_PAGE_SIZE = 500
+
+function ChatMessage({ message, fetchDataPage }) {
   if (message.type === 'user') {
     return (
       <div className="message user-message">
@@ -456,6 +472,22 @@ function ChatMessage({ message }) {
   // Chart data defaults to 'chart', others default to 'response'
   const defaultTab = isChartData ? 'chart' : 'response'
   const [activeTab, setActiveTab] = useState(defaultTab)
+  // Full rows of a downsampled chart, loaded page by page on request
+  const [fullRows, setFullRows] = useState(null)
+  const [loadingRows, setLoadingRows] = useState(false)
+
+  const loadMoreRows = async () => {
+    setLoadingRows(true)
+    try {
+      const offset = fullRows ? fullRows.length : 0
+      const page = await fetchDataPage(content.downsampled.result_id, offset, DATA_PAGE_SIZE)
+      setFullRows([...(fullRows || []), ...page.data])
+    } catch (error) {
+      console.error('Failed to load full data:', error)
+    } finally {
+      setLoadingRows(false)
+    }
+  }
 
   return (
     <div className="message bot-message">
@@ -620,13 +652,23 @@ function ChatMessage({ message }) {
                     </div>
                     <div className="explanation-text">{content.explanation}</div>
                   </div>
-                  <TrendSummary data={content.data} />
+                  <TrendSummary data={content.data} trend={content.trend} />
                 </div>
               </div>
             )}
 
             {activeTab === 'table' && (
               <div className="table-view">
+                {content.downsampled && (
+                  <div className="downsampled-note">
+                    Showing {(fullRows || content.data).length.toLocaleString()} of {content.downsampled.original_points.toLocaleString()} points
+                    {(!fullRows || fullRows.length < content.downsampled.original_points) && fetchDataPage && (
+                      <button onClick={loadMoreRows} disabled={loadingRows}>
+                        {loadingRows ? 'Loading...' : fullRows ? 'Load more' : 'Load full data'}
+                      </button>
+                    )}
+                  </div>
+                )}
                 <table>
                   <thead>
                     <tr>
@@ -635,7 +677,7 @@ function ChatMessage({ message }) {
                     </tr>
                   </thead>
                   <tbody>
-                    {content.data.map((item, index) => (
+                    {(fullRows || content.data).map((item, index) => (
                       <tr key={index}>
                         <td>{item.label}</td>
                         <td>{item.value.toLocaleString()}</td>